@@ -0,0 +1,65 @@
+"""Routage /execute vs /chat, et spéculation sur les transcriptions partielles.
+
+While the user is still speaking, partial transcripts arrive from the STT
+stage. Once a hypothesis is stable the app can start the chat request on
+it; the final transcript then either commits that request (same words) or
+cancels it and sends its own.
+"""
+import re
+
+ACTION_KEYWORDS = [
+    "open", "run", "make", "delete", "close", "start",
+    "play", "joue", "met",             # Media Play
+    "pause", "stop", "arrete", "coupe", # Media Stop
+    "next", "suivant", "previous", "précédent", # Nav
+    "volume", "son", "mute", "unmute",  # Audio
+    "search", "cherche", "calcul"       # Utils
+]
+
+
+def classify(text):
+    """Endpoint pour une commande: /execute (action locale) ou /chat"""
+    lower = text.lower()
+    return "/execute" if any(k in lower for k in ACTION_KEYWORDS) else "/chat"
+
+
+def normalize(text):
+    return " ".join(re.findall(r"\w+", text.lower()))
+
+
+class SpeculativeRouter:
+    """Décide quand une transcription partielle vaut une requête anticipée.
+
+    A partial is stable when the speaker has paused after it (settled: the
+    audio covered all the speech so far) or when two partials in a row
+    agree. Only /chat is speculated: /execute runs commands with side
+    effects, it waits for the final transcript.
+    """
+
+    def __init__(self):
+        self.speculated = None # Normalized text of the request started ahead
+        self.last = None
+        self.stats = {"speculated": 0, "committed": 0, "cancelled": 0}
+
+    def partial(self, text, settled=False):
+        """-> texte à envoyer en spéculation, ou None"""
+        norm = normalize(text)
+        stable = settled or norm == self.last
+        self.last = norm
+        if not norm or not stable or norm == self.speculated or classify(text) != "/chat":
+            return None
+        self.speculated = norm
+        self.stats["speculated"] += 1
+        return text
+
+    def final(self, text):
+        """Transcription finale: True si la requête anticipée est la bonne (commit), sinon False"""
+        hit = self.speculated is not None and normalize(text) == self.speculated
+        if self.speculated is not None:
+            self.stats["committed" if hit else "cancelled"] += 1
+        self.reset()
+        return hit
+
+    def reset(self):
+        self.speculated = None
+        self.last = None
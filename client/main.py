@@ -6,11 +6,24 @@ from PyQt6.QtWidgets import QApplication
 from PyQt6.QtCore import QThread, pyqtSignal, QTimer
 # Local imports (Now legit!)
 from streaming_tts import StreamingTTS, StreamingAI
+from phrase_cache import DEFAULT_PHRASES
+from pcm_output import PcmOutput
+from intent import SpeculativeRouter, classify
 from optimized_hud import OptimizedHUD
 import datetime
+import uuid
 
 # Configuration
 SERVER_URL = "http://localhost:8000"
+# Phrases synthesized at startup (cached on disk): "|"-separated override
+PREWARM_PHRASES = os.getenv("SONIA_PREWARM_PHRASES", "|".join(DEFAULT_PHRASES)).split("|")
+# Talking over Sonia interrupts her. Off by default: there is no echo cancellation, so on
+# loudspeakers the mic hears her own voice and she cuts herself off (set to 1 with headphones)
+BARGE_IN = os.getenv("SONIA_BARGE_IN", "0") == "1"
+# "ring": continuous PyAudio output (gapless answers); "mixer": one pygame Sound per sentence
+AUDIO_OUTPUT = os.getenv("SONIA_AUDIO_OUTPUT", "ring")
+# Start the chat request on a stable partial transcript, commit it when the final one agrees
+SPECULATE = os.getenv("SONIA_SPECULATE", "1") == "1"
 
 # --- Workers Imports ---
 from workers.voice_worker import VoiceWorker
@@ -30,7 +43,7 @@ class SoniaClient:
         icon_path = os.path.join(base_dir, "hud_icon.png")
         
         self.hud = OptimizedHUD(icon_path) # Local path now
-        self.tts = StreamingTTS()
+        self.tts = StreamingTTS(output=self.open_audio_output())
         self.streaming_ai = StreamingAI(self.tts)
         
         self.voice_worker = VoiceWorker()
@@ -38,25 +51,48 @@ class SoniaClient:
         
         # Connections
         self.voice_worker.voice_detected.connect(self.on_voice_input)
+        self.voice_worker.wake_detected.connect(self.on_wake)
+        self.router = SpeculativeRouter()
+        if SPECULATE:
+            self.voice_worker.partial_detected.connect(self.on_partial)
+        if BARGE_IN:
+            self.voice_worker.speech_started.connect(self.on_speech_started)
         
         self.api_worker.token_received.connect(self.streaming_ai.process_token)
+        self.api_worker.sentence_ended.connect(self.streaming_ai.end_unit) # Server-side segmentation
         self.api_worker.response_complete.connect(self.on_api_complete)
         self.api_worker.error_occurred.connect(self.on_error)
+        self.app.aboutToQuit.connect(self.api_worker.stop)
         
         self.wake_words = ["sonia", "sonya"]
         self.is_processing = False
         
         # --- Conversation Mode (Jarvis Style) ---
         self.conversation_active = False
+        self.session_id = None # One server-side session (turn history) per conversation
         self.conversation_timer = QTimer()
         self.conversation_timer.setSingleShot(True)
         self.conversation_timer.timeout.connect(self.end_conversation_mode)
         
+    def open_audio_output(self):
+        if AUDIO_OUTPUT != "ring":
+            return None
+        try:
+            return PcmOutput().open()
+        except Exception as e:
+            print(f"[Audio] Ring buffer output unavailable ({e}), falling back to the pygame mixer")
+            return None
+
     def end_conversation_mode(self):
         """Called when 20s have passed without voice"""
         if self.conversation_active:
             print("Conversation Timeout. Returning to sleep.")
+            print(f"[STT] {self.voice_worker.stats()}")
+            print(f"[Speculation] {self.router.stats}")
+            self.cancel_speculation()
             self.conversation_active = False
+            self.voice_worker.passive = True # Back to the local wake word spotter: nothing goes to STT
+            self.session_id = None
             self.hud.set_state("idle")
             # Optional: Play a "Sleep" sound
             # self.tts.speak_immediate("Sleeping.")
@@ -64,6 +100,7 @@ class SoniaClient:
     def start(self):
         self.hud.show()
         self.voice_worker.start()
+        self.api_worker.start() # Long-lived: connections stay open between queries
         
         # Dynamic Greeting
         hour = datetime.datetime.now().hour
@@ -75,15 +112,24 @@ class SoniaClient:
             
         final_msg = f"{greeting}, Sir. All systems are fully operational. Awaiting your command."
         self.tts.speak_immediate(final_msg)
+        self.tts.prewarm(PREWARM_PHRASES) # Confirmations then play instantly, even offline
         
         # Activate Conversation Mode immediately
         print("Startup Complete -> Enter Conversation Mode")
-        self.conversation_active = True
-        self.hud.set_state("listening_active")
-        self.conversation_timer.start(20000) # 20 seconds
+        self.activate_conversation()
         
         sys.exit(self.app.exec())
         
+    def on_speech_started(self):
+        """L'utilisateur parle: on coupe la réponse en cours (voix, synthèse et génération serveur)"""
+        if not self.conversation_active or not (self.is_processing or self.tts.is_speaking):
+            return
+        print("[Barge-in] User speaking: interrupting")
+        self.streaming_ai.cancel()
+        self.api_worker.cancel()
+        self.is_processing = False
+        self.hud.set_state("listening_active")
+
     def on_voice_input(self, text):
         # 1. Active Listening Mode (Jarvis Style)
         if self.conversation_active:
@@ -102,10 +148,7 @@ class SoniaClient:
             if w in text_lower:
                 clean = re.split(w, text, flags=re.IGNORECASE)[-1].strip()
         
-        # Activate Conversation Mode
-        self.conversation_active = True
-        self.hud.set_state("listening_active")
-        self.conversation_timer.start(20000) # 20 seconds
+        self.activate_conversation()
         
         if not clean:
             # Silent wake (Visual feedback only via HUD)
@@ -114,8 +157,39 @@ class SoniaClient:
             
         self.process_command(clean)
         
+    def activate_conversation(self):
+        """Enter Conversation Mode: everything said is processed until 20s of silence"""
+        if not self.conversation_active:
+            self.session_id = uuid.uuid4().hex # New conversation: fresh history
+        self.conversation_active = True
+        self.voice_worker.passive = False
+        self.hud.set_state("listening_active")
+        self.conversation_timer.start(20000) # 20 seconds
+
+    def on_wake(self):
+        """Mot d'éveil repéré localement: la suite de la phrase (s'il y en a une) arrive par on_voice_input"""
+        self.activate_conversation()
+
+    def on_partial(self, text, settled):
+        """Transcription partielle: sur une hypothèse stable, la requête /chat part avant la fin de la phrase"""
+        if not self.conversation_active or self.is_processing:
+            return
+        query = self.router.partial(text, settled)
+        if query is None:
+            return
+        print(f"[Speculation] Starting on partial: {query}")
+        self.api_worker.submit(query, endpoint="/chat", session_id=self.session_id, speculative=True)
+
+    def cancel_speculation(self):
+        if self.api_worker.speculative:
+            self.api_worker.cancel()
+        self.router.reset()
+
     def process_command(self, text):
-        if self.is_processing: return
+        if self.is_processing:
+            # Newer command while the last answer streams: it replaces it instead of being dropped
+            print("[API] New command: superseding the current answer")
+            self.streaming_ai.cancel()
         self.is_processing = True
         
         # STOP Timer during processing/speaking so it doesn't expire while she talks
@@ -125,25 +199,19 @@ class SoniaClient:
         self.hud.set_state("thinking")
         self.streaming_ai.reset()
         
+        if self.router.final(text):
+            print("[Speculation] Final transcript matches: committing")
+            self.api_worker.commit() # Whatever already streamed is spoken now
+            return
+        
         # Routing Logic
         # Let's keep it simple: Client decides endpoint
-        action_keywords = [
-            "open", "run", "make", "delete", "close", "start",
-            "play", "joue", "met",             # Media Play
-            "pause", "stop", "arrete", "coupe", # Media Stop
-            "next", "suivant", "previous", "précédent", # Nav
-            "volume", "son", "mute", "unmute",  # Audio
-            "search", "cherche", "calcul"       # Utils
-        ]
-        is_action = any(k in text.lower() for k in action_keywords)
-        
-        if is_action:
+        # submit() cancels whatever is still running (an older answer, a wrong guess)
+        if classify(text) == "/execute":
             self.tts.speak_immediate("On it.")
-            self.api_worker.set_query(text, endpoint="/execute")
+            self.api_worker.submit(text, endpoint="/execute")
         else:
-            self.api_worker.set_query(text, endpoint="/chat")
-            
-        self.api_worker.start()
+            self.api_worker.submit(text, endpoint="/chat", session_id=self.session_id)
         
     def on_api_complete(self, response):
         print("Response Complete")
@@ -0,0 +1,7 @@
+def latency_stats(values):
+    """n, p50, p95, max (ms) d'une série de durées en secondes"""
+    values = sorted(values)
+    if not values:
+        return {"n": 0}
+    pick = lambda p: round(values[min(len(values) - 1, int(len(values) * p))] * 1000)
+    return {"n": len(values), "p50": pick(0.5), "p95": pick(0.95), "max": round(values[-1] * 1000)}
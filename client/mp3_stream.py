@@ -0,0 +1,105 @@
+import io
+
+import pygame
+
+# Layer III bitrates (kbps) by version: MPEG-1, MPEG-2/2.5
+_BITRATES = {
+    1: (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    2: (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+_SAMPLE_RATES = {3: (44100, 48000, 32000), 2: (22050, 24000, 16000), 0: (11025, 12000, 8000)}
+
+
+def parse_header(b0, b1, b2):
+    """(longueur de trame, échantillons, fréquence) d'un en-tête MP3 Layer III, ou None"""
+    if b0 != 0xFF or (b1 & 0xE0) != 0xE0:
+        return None
+    version = (b1 >> 3) & 3 # 3 = MPEG-1, 2 = MPEG-2, 0 = MPEG-2.5
+    layer = (b1 >> 1) & 3
+    bitrate_index = b2 >> 4
+    rate_index = (b2 >> 2) & 3
+    if version == 1 or layer != 1 or bitrate_index in (0, 15) or rate_index == 3:
+        return None
+    padding = (b2 >> 1) & 1
+    bitrate = _BITRATES[1 if version == 3 else 2][bitrate_index] * 1000
+    sample_rate = _SAMPLE_RATES[version][rate_index]
+    if version == 3:
+        return 144 * bitrate // sample_rate + padding, 1152, sample_rate
+    return 72 * bitrate // sample_rate + padding, 576, sample_rate
+
+
+class Mp3FrameSplitter:
+    """Découpe un flux MP3 reçu par morceaux en trames complètes (le reste attend la suite)"""
+
+    def __init__(self):
+        self.buffer = bytearray()
+
+    def feed(self, chunk):
+        """Ajoute chunk, renvoie la liste des trames complètes [(bytes, durée s)]"""
+        self.buffer += chunk
+        frames = []
+        pos = 0
+        buf = self.buffer
+        while len(buf) - pos >= 4:
+            header = parse_header(buf[pos], buf[pos + 1], buf[pos + 2])
+            if header is None:
+                pos += 1 # Resync (ID3 tag, garbage)
+                continue
+            length, samples, sample_rate = header
+            if len(buf) - pos < length:
+                break
+            frames.append((bytes(buf[pos:pos + length]), samples / sample_rate))
+            pos += length
+        del self.buffer[:pos]
+        return frames
+
+
+class ProgressiveDecoder:
+    """Décode un MP3 par segments jouables dès réception, sans fichier temporaire.
+
+    Each segment is decoded together with the last `overlap` frames of the
+    previous one (bit reservoir + MDCT overlap need them), and the PCM those
+    frames produce on their own is cut off: segments join seamlessly.
+    """
+
+    def __init__(self, first_seconds=0.3, segment_seconds=1.0, overlap=4):
+        self.splitter = Mp3FrameSplitter()
+        self.first_seconds = first_seconds     # Small first segment: short time to first audio
+        self.segment_seconds = segment_seconds # Then larger ones: fewer decodes
+        self.overlap = overlap
+        self.pending = []   # (frame, duration) not decoded yet
+        self.pending_duration = 0.0
+        self.context = []   # Last frames of the previous segment
+        self.started = False
+
+    def feed(self, chunk):
+        """Ajoute des octets reçus; renvoie les Sounds prêts à jouer (dans l'ordre)"""
+        for frame, duration in self.splitter.feed(chunk):
+            self.pending.append((frame, duration))
+            self.pending_duration += duration
+        target = self.segment_seconds if self.started else self.first_seconds
+        if self.pending_duration >= target:
+            return [self._decode()]
+        return []
+
+    def flush(self):
+        """Fin du flux: le reste des trames"""
+        return [self._decode()] if self.pending else []
+
+    def _decode(self):
+        frames = self.pending
+        sound = _decode(b"".join(f for f, _ in self.context + frames))
+        if self.context:
+            # The decoder emits exactly one frame's worth of samples per frame: drop the context's
+            freq, size, channels = pygame.mixer.get_init()
+            skip = round(sum(d for _, d in self.context) * freq) * abs(size) // 8 * channels
+            sound = pygame.mixer.Sound(buffer=sound.get_raw()[skip:])
+        self.context = (self.context + frames)[-self.overlap:]
+        self.pending = []
+        self.pending_duration = 0.0
+        self.started = True
+        return sound
+
+
+def _decode(data):
+    return pygame.mixer.Sound(file=io.BytesIO(data))
@@ -0,0 +1,173 @@
+import threading
+import time
+
+import numpy as np
+
+
+def pcm_from_sound(sound, channels=2):
+    """Échantillons int16 (frames, canaux) d'un Sound décodé par le mixer"""
+    return np.frombuffer(sound.get_raw(), dtype=np.int16).reshape(-1, channels)
+
+
+class PcmOutput:
+    """Sortie audio continue: un ring buffer PCM lu par le callback de la carte son.
+
+    Sentences are appended back to back instead of being played as separate
+    Sounds. Silence at the edges of each clip is trimmed down to pad_ms, and
+    consecutive clips are joined by a fade_ms crossfade. Whatever is playing
+    when the ring runs dry is followed by zeros, never by a click.
+    """
+
+    def __init__(self, sample_rate=24000, channels=2, capacity_seconds=8.0, fade_ms=10, pad_ms=40, threshold=300):
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.ring = np.zeros((int(capacity_seconds * sample_rate), channels), dtype=np.int16)
+        self.read_pos = 0  # Absolute frame counters (ring index = pos % capacity)
+        self.write_pos = 0
+        self.cond = threading.Condition()
+        self.drained_at = None # perf_counter() when the last buffered frame was read
+        self.on_drained = None # Called (audio thread) when playback runs out of audio
+        self.fade = int(fade_ms * sample_rate / 1000)
+        self.pad = int(pad_ms * sample_rate / 1000)
+        self.threshold = threshold # |sample| at or below = silence (~-40 dBFS)
+        self.stream = None
+        self.reset_writer()
+
+    def reset_writer(self):
+        """Oublie la phrase en cours d'écriture (appelé par l'écrivain après une interruption)"""
+        self.at_start = True # Next loud sample starts a sentence (leading silence trimmed)
+        self.silence = self.ring[:0] # Quiet frames held back: dropped if the sentence ends here
+        self.tail = None # Faded-out end of the previous sentence, mixed into the next one
+
+    @property
+    def playing(self):
+        return self.write_pos > self.read_pos
+
+    # --- Sound card side ---
+
+    def open(self, frames_per_buffer=512):
+        """Démarre le flux de sortie PyAudio (callback); ~21 ms par bloc à 24 kHz"""
+        import pyaudio # Only needed for real output; tests read() directly
+
+        self._pyaudio = pyaudio.PyAudio()
+        self.stream = self._pyaudio.open(format=pyaudio.paInt16, channels=self.channels, rate=self.sample_rate,
+                                         output=True, frames_per_buffer=frames_per_buffer,
+                                         stream_callback=self._callback)
+        self._continue = pyaudio.paContinue
+        self.stream.start_stream()
+        return self
+
+    def close(self):
+        if self.stream is not None:
+            self.stream.stop_stream()
+            self.stream.close()
+            self._pyaudio.terminate()
+            self.stream = None
+
+    def _callback(self, in_data, frame_count, time_info, status):
+        return self.read(frame_count).tobytes(), self._continue
+
+    def read(self, frames):
+        """Les frames suivantes à jouer; complétées par du silence si le ring est vide"""
+        out = np.zeros((frames, self.channels), dtype=np.int16)
+        drained = False
+        with self.cond:
+            n = min(frames, self.write_pos - self.read_pos)
+            if n > 0:
+                start = self.read_pos % len(self.ring)
+                first = min(n, len(self.ring) - start)
+                out[:first] = self.ring[start:start + first]
+                out[first:n] = self.ring[:n - first]
+                self.read_pos += n
+                if self.read_pos == self.write_pos:
+                    self.drained_at = time.perf_counter()
+                    drained = True
+                if len(self.ring) - (self.write_pos - self.read_pos) >= len(self.ring) // 4:
+                    self.cond.notify_all() # Room for the writer (woken per quarter ring, not per block)
+        if drained and self.on_drained:
+            self.on_drained()
+        return out
+
+    def clear(self):
+        """Barge-in: abandonne tout l'audio pas encore joué (silence au prochain bloc)"""
+        with self.cond:
+            was_playing = self.playing
+            self.read_pos = self.write_pos
+            self.reset_writer()
+            if was_playing:
+                self.drained_at = time.perf_counter()
+            self.cond.notify_all()
+        if was_playing and self.on_drained:
+            self.on_drained()
+
+    # --- Writer side (TTS playback thread) ---
+
+    def write(self, pcm, stopped=None):
+        """Ajoute un segment de la phrase en cours. Bloque tant que le ring est plein."""
+        flat = pcm.reshape(-1) # Per-frame reductions over (n, 2) are ~20x slower
+        loud = (flat > self.threshold) | (flat < -self.threshold)
+        if not loud.any():
+            held = np.concatenate((self.silence, pcm))
+            self.silence = held[len(held) - self.pad:] if self.at_start else held
+            return
+        first = np.argmax(loud) // self.channels
+        last = (len(flat) - 1 - np.argmax(loud[::-1])) // self.channels
+        lead = np.concatenate((self.silence, pcm[:first]))
+        if self.at_start:
+            lead = lead[len(lead) - self.pad:]
+        chunk = np.concatenate((lead, pcm[first:last + 1]))
+        self.silence = pcm[last + 1:]
+        if self.at_start and self.tail is not None:
+            chunk = self._crossfade(self.tail, chunk)
+            self.tail = None
+        self.at_start = False
+        self._push(chunk, stopped)
+
+    def end_sentence(self, more=False, stopped=None):
+        """Fin de phrase: garde pad_ms de son silence final; si more, sa fin sera fondue dans la suivante"""
+        trailing = self.silence[:self.pad]
+        self.reset_writer()
+        if not len(trailing):
+            return
+        if more and self.fade:
+            self.tail = trailing[-self.fade:]
+            self._push(trailing[:-self.fade], stopped)
+        else:
+            self._push(self._fade_out(trailing), stopped)
+
+    def _crossfade(self, tail, chunk):
+        n = min(len(tail), len(chunk))
+        ramp = np.linspace(0.0, 1.0, n, dtype=np.float32)[:, None]
+        mixed = tail[:n] * (1.0 - ramp) + chunk[:n] * ramp
+        chunk = chunk.copy()
+        chunk[:n] = np.clip(mixed, -32768, 32767).astype(np.int16)
+        return chunk
+
+    def _fade_out(self, pcm):
+        n = min(self.fade, len(pcm))
+        if not n:
+            return pcm
+        pcm = pcm.copy()
+        ramp = np.linspace(1.0, 0.0, n, dtype=np.float32)[:, None]
+        pcm[-n:] = (pcm[-n:] * ramp).astype(np.int16)
+        return pcm
+
+    def _push(self, pcm, stopped=None):
+        pos = 0
+        capacity = len(self.ring)
+        while pos < len(pcm):
+            with self.cond:
+                room = min(len(pcm) - pos, capacity // 4)
+                while capacity - (self.write_pos - self.read_pos) < room:
+                    if stopped is not None and stopped.is_set():
+                        return
+                    self.cond.wait(0.5) # Woken by read() or clear(); timeout = safety only
+                if stopped is not None and stopped.is_set():
+                    return # Interrupted: nothing more of this sentence
+                n = min(len(pcm) - pos, capacity - (self.write_pos - self.read_pos))
+                start = self.write_pos % capacity
+                first = min(n, capacity - start)
+                self.ring[start:start + first] = pcm[pos:pos + first]
+                self.ring[:n - first] = pcm[pos + first:pos + n]
+                self.write_pos += n
+                pos += n
@@ -0,0 +1,105 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+import pygame
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache", "tts")
+
+# Spoken often, identical every time: synthesized once, then played from disk/memory
+DEFAULT_PHRASES = [
+    "On it.",
+    "I lost connection to my brain.",
+    "Volume increased.", "Volume decreased.", "Audio muted.", "Audio unmuted.",
+    "Media paused.", "Next track.", "Previous track.", "Spotify resumed.", "Media key pressed.",
+    "Notepad opened.", "Calculator opened.", "Chrome opened.", "VS Code opened.", "Workstation locked.",
+]
+
+
+def phrase_key(text, voice, rate="+0%"):
+    raw = "\0".join((voice, rate, " ".join(text.split())))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class PhraseCache:
+    """Cache audio persistant (MP3 adressés par contenu, LRU borné en taille) + Sounds décodés chauds"""
+
+    def __init__(self, voice, directory=CACHE_DIR, max_disk_bytes=64 * 1024 * 1024, hot_size=64):
+        self.voice = voice
+        self.directory = directory
+        self.max_disk_bytes = max_disk_bytes
+        self.hot_size = hot_size
+        self.hot = OrderedDict()  # key -> pygame.mixer.Sound (decoded, ready to play)
+        self.files = OrderedDict() # key -> size, oldest access first
+        self.disk_bytes = 0
+        self.lock = threading.Lock()
+
+        os.makedirs(directory, exist_ok=True)
+        entries = []
+        for entry in os.scandir(directory):
+            if entry.name.endswith(".mp3"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, entry.name[:-4], stat.st_size))
+        for _, key, size in sorted(entries): # mtime = last use
+            self.files[key] = size
+            self.disk_bytes += size
+
+    def key(self, text):
+        return phrase_key(text, self.voice)
+
+    def path(self, key):
+        return os.path.join(self.directory, f"{key}.mp3")
+
+    def sound(self, text):
+        """Sound décodé pour text, ou None s'il n'a jamais été synthétisé"""
+        key = self.key(text)
+        with self.lock:
+            sound = self.hot.get(key)
+            if sound is not None:
+                self.hot.move_to_end(key)
+                self.files.move_to_end(key)
+                return sound
+            if key not in self.files:
+                return None
+            self.files.move_to_end(key)
+        try:
+            sound = pygame.mixer.Sound(self.path(key))
+            os.utime(self.path(key))
+        except (OSError, pygame.error):
+            with self.lock:
+                self.disk_bytes -= self.files.pop(key, 0)
+            return None
+        self._remember(key, sound)
+        return sound
+
+    def store(self, text, tmp_path):
+        """Adopte un MP3 fraîchement synthétisé (renommage atomique) et renvoie son Sound"""
+        key = self.key(text)
+        path = self.path(key)
+        os.replace(tmp_path, path)
+        size = os.path.getsize(path)
+        evicted = []
+        with self.lock:
+            self.disk_bytes += size - self.files.pop(key, 0)
+            self.files[key] = size
+            while self.disk_bytes > self.max_disk_bytes and len(self.files) > 1:
+                old, old_size = self.files.popitem(last=False)
+                self.disk_bytes -= old_size
+                self.hot.pop(old, None)
+                evicted.append(old)
+        for old in evicted:
+            try:
+                os.unlink(self.path(old))
+            except OSError:
+                pass
+        sound = pygame.mixer.Sound(path)
+        self._remember(key, sound)
+        return sound
+
+    def _remember(self, key, sound):
+        with self.lock:
+            self.hot[key] = sound
+            self.hot.move_to_end(key)
+            while len(self.hot) > self.hot_size:
+                self.hot.popitem(last=False)
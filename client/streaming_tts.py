@@ -4,24 +4,95 @@ import edge_tts
 import pygame
 import tempfile
 import os
+import time
+from collections import deque
 from queue import Queue
 import threading
+from itertools import chain
+from phrase_cache import PhraseCache
+from mp3_stream import ProgressiveDecoder
+from pcm_output import pcm_from_sound
+from metrics import latency_stats
+
+
+class SentenceAudio:
+    """Audio d'une phrase: segments jouables poussés par la synthèse, lus dans l'ordre par la lecture"""
+
+    def __init__(self, generation=0):
+        self.segments = Queue()
+        self.generation = generation # StreamingTTS.interrupt() makes older generations obsolete
+        self.stopped = threading.Event() # Set on interrupt: playback gives up at once
+        self.started = time.perf_counter()
+        self.first_audio = None # perf_counter() of the first playable segment
+
+    def put(self, sound):
+        if self.first_audio is None:
+            self.first_audio = time.perf_counter()
+        self.segments.put(sound)
+
+    def close(self):
+        self.segments.put(None)
+
+    def __iter__(self):
+        while True:
+            sound = self.segments.get()
+            if sound is None:
+                return
+            yield sound
+
 
 class StreamingTTS:
-    def __init__(self, voice="en-US-AriaNeural"):
+    """TTS pipeliné: une boucle asyncio persistante synthétise jusqu'à K phrases d'avance,
+    un thread les joue dans l'ordre d'arrivée."""
+
+    def __init__(self, voice="en-US-AriaNeural", lookahead=3, phrases=None, output=None):
         self.voice = voice
-        self.audio_queue = Queue()
-        self.playback_queue = Queue() # Initialisation ici pour éviter race condition
-        self.is_speaking = False
-        pygame.mixer.init(frequency=24000)
+        self.lookahead = lookahead # Max sentences synthesized but not yet played (backpressure)
+        self.playback_queue = Queue() # SentenceAudio in speaking order (at most lookahead of them)
+        self._speaking = False
+        # PcmOutput: sentences go to one continuous ring buffer; None = one mixer Sound per sentence
+        self.output = output
+        if output is not None:
+            output.on_drained = self._on_drained
+        self.idle = threading.Event() # Set once every queued sentence has played (or was dropped)
+        self.idle.set()
+        self._pending = 0 # Sentences queued and not yet played/dropped
+        self._pending_lock = threading.Lock()
+        if output is not None:
+            # Decoded Sounds must be in the ring's exact format (no device-dictated rate/channels)
+            pygame.mixer.init(frequency=output.sample_rate, channels=output.channels, allowedchanges=0)
+        else:
+            pygame.mixer.init(frequency=24000)
+        # Every synthesized sentence is kept on disk (bounded): repeated phrases skip edge-tts
+        self.phrases = phrases or PhraseCache(voice)
         
-        # Démarrer worker thread pour TTS
-        self.tts_thread = threading.Thread(target=self._tts_worker, daemon=True)
-        self.tts_thread.start()
+        # Inter-sentence gaps (s): silence between two sentences of the same answer
+        self.gaps = deque(maxlen=200)
+        self._last_end = None
+        # Time to first audio (s): synthesis start -> first playable segment, per sentence
+        self.ttfa = deque(maxlen=200)
+        
+        # Barge-in: sentences queued before the last interrupt() are dropped
+        self._generation = 0
+        self._current = None # (SentenceAudio, Channel) being played
+        
+        # One long-lived loop for all synthesis (no asyncio.run per sentence)
+        self.loop = asyncio.new_event_loop()
+        self.loop_thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.loop_thread.start()
+        self._texts = None
+        self._window = None
+        self._tasks = {} # Running synthesis task -> generation (the loop only keeps weak references)
+        asyncio.run_coroutine_threadsafe(self._setup(), self.loop).result()
+        self._dispatcher = asyncio.run_coroutine_threadsafe(self._dispatch(), self.loop)
         
         # Démarrer worker thread pour playback
         self.playback_thread = threading.Thread(target=self._playback_worker, daemon=True)
         self.playback_thread.start()
+
+    async def _setup(self):
+        self._texts = asyncio.Queue()
+        self._window = asyncio.Semaphore(self.lookahead)
     
     def _split_sentences(self, text):
         """Divise le texte en phrases pour streaming"""
@@ -30,82 +101,229 @@ class StreamingTTS:
         sentences = sentence_endings.split(text.strip())
         return [s.strip() for s in sentences if s.strip()]
     
-    def _tts_worker(self):
-        """Worker thread pour génération TTS"""
+    async def _dispatch(self):
+        """Démarre la synthèse des phrases dans l'ordre, au plus lookahead en avance sur la lecture"""
         while True:
-            try:
-                text = self.audio_queue.get()
-                if text is None:  # Signal d'arrêt
-                    break
-                
-                # Emoji Cleaning: Remove non-standard characters to prevent TTS issues
-                clean_text = text.encode('ascii', 'ignore').decode('ascii')
-                clean_text = clean_text.strip()
-                
-                if not clean_text:
-                    self.audio_queue.task_done()
-                    continue
+            text, queued_at, generation = await self._texts.get()
+            if text is None: # Signal d'arrêt
+                self.playback_queue.put(None)
+                break
+            await self._window.acquire() # Released once the sentence has been played
+            if generation != self._generation: # Interrupted while waiting for the window
+                self._window.release()
+                self._done()
+                continue
+            audio = SentenceAudio(generation)
+            task = asyncio.create_task(self._synthesize(text, audio))
+            self._tasks[task] = generation
+            task.add_done_callback(lambda t: self._tasks.pop(t, None))
+            self.playback_queue.put((audio, queued_at))
 
-                # Générer audio avec EdgeTTS
-                asyncio.run(self._generate_audio(clean_text))
-                self.audio_queue.task_done()
-            except Exception as e:
-                print(f"TTS Error: {e}")
+    async def _synthesize(self, text, audio):
+        try:
+            # Emoji Cleaning: Remove non-standard characters to prevent TTS issues
+            clean_text = text.encode('ascii', 'ignore').decode('ascii').strip()
+            if not clean_text:
+                return
+            # Phrase déjà synthétisée: Sound décodé (mémoire) ou MP3 local, sans réseau
+            # (decoding runs in a thread so the other syntheses keep streaming)
+            sound = await asyncio.to_thread(self.phrases.sound, clean_text)
+            if sound is not None:
+                audio.put(sound)
+            else:
+                # Générer audio avec EdgeTTS, joué pendant la réception
+                await self._generate_audio(clean_text, audio)
+        except Exception as e:
+            print(f"Synthesis error: {e}")
+        finally:
+            audio.close()
+            if audio.first_audio is not None:
+                ttfa = audio.first_audio - audio.started
+                self.ttfa.append(ttfa)
+                print(f"[TTS] First audio after {ttfa * 1000:.0f} ms: {text[:40]}")
     
-    async def _generate_audio(self, text):
-        """Génère fichier audio pour une phrase"""
+    async def _generate_audio(self, text, audio=None):
+        """Synthétise en mémoire: les segments décodés partent vers audio dès réception,
+        le MP3 complet va ensuite dans le cache"""
+        data = bytearray()
+        decoder = ProgressiveDecoder()
         try:
             communicate = edge_tts.Communicate(text, self.voice)
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".mp3") as tmp:
-                tmp_path = tmp.name
-            
-            await communicate.save(tmp_path)
-            
-            # Ajouter à la queue de playback
-            self.playback_queue.put(tmp_path)
+            async for chunk in communicate.stream():
+                if chunk["type"] != "audio":
+                    continue
+                data += chunk["data"]
+                if audio is not None:
+                    for sound in await asyncio.to_thread(decoder.feed, chunk["data"]):
+                        audio.put(sound)
+            if audio is not None:
+                for sound in await asyncio.to_thread(decoder.flush):
+                    audio.put(sound)
         except Exception as e:
             print(f"Audio generation error: {e}")
+            return None
+        if not data:
+            return None
+        return await asyncio.to_thread(self._store, text, bytes(data))
+
+    def _store(self, text, data):
+        # Written next to the cache so the final rename is atomic
+        with tempfile.NamedTemporaryFile(delete=False, suffix=".part", dir=self.phrases.directory) as tmp:
+            tmp.write(data)
+        try:
+            return self.phrases.store(text, tmp.name)
+        except Exception as e:
+            print(f"Audio cache error: {e}")
+            if os.path.exists(tmp.name):
+                os.unlink(tmp.name)
+            return None
+
+    def prewarm(self, phrases):
+        """Synthétise en arrière-plan les phrases fréquentes absentes du cache (et les décode)"""
+        async def run():
+            missing = [p for p in phrases if await asyncio.to_thread(self.phrases.sound, p) is None]
+            for phrase in missing:
+                await self._generate_audio(phrase) # One at a time: live sentences keep priority
+            print(f"[TTS] Pre-warmed {len(phrases)} phrases ({len(missing)} synthesized)")
+        asyncio.run_coroutine_threadsafe(run(), self.loop)
     
+    @property
+    def is_speaking(self):
+        return self._speaking or (self.output is not None and self.output.playing)
+
     def _playback_worker(self):
         """Worker thread pour lecture audio séquentielle"""
-        # self.playback_queue est déjà initialisée dans __init__
-        
         while True:
+            item = self.playback_queue.get()
+            if item is None:  # Signal d'arrêt
+                break
+            audio, queued_at = item
             try:
-                audio_file = self.playback_queue.get()
-                if audio_file is None:  # Signal d'arrêt
-                    break
+                if audio.generation != self._generation:
+                    continue # Dropped by interrupt(): its synthesis was cancelled too
+                segments = iter(audio) # Blocks only while synthesis is behind playback
+                sound = next(segments, None)
+                if sound is None or audio.generation != self._generation:
+                    continue
                 
-                self.is_speaking = True
+                started = time.perf_counter()
+                last_end = self._last_end
+                if self.output is not None: # Ring still playing the previous sentence = no gap at all
+                    last_end = started if self.output.playing else self.output.drained_at
+                # Gap = silence between two sentences that were both queued before the first ended
+                if last_end is not None and queued_at < last_end:
+                    gap = started - last_end
+                    self.gaps.append(gap)
+                    if gap > 0.05:
+                        print(f"[TTS] Inter-sentence gap: {gap * 1000:.0f} ms")
                 
-                # Jouer le fichier
-                sound = pygame.mixer.Sound(audio_file)
+                self._speaking = True
+                if self.output is not None:
+                    self._current = (audio, None)
+                    self._write_pcm(audio, sound, segments)
+                    continue
+                
+                # Jouer le premier segment dès qu'il est décodé, la suite arrive pendant la lecture
                 channel = sound.play()
                 
                 if channel:
-                    # Attendre fin de lecture
-                    while channel.get_busy():
-                        pygame.time.wait(10)
+                    self._current = (audio, channel)
+                    if audio.generation != self._generation: # interrupt() ran between play() and here
+                        audio.stopped.set()
+                        channel.stop()
+                    self._wait_playback(audio, channel, sound, segments)
                 else:
                     print("Warning: No audio channel available to play sound.")
-                
-                # Nettoyer fichier temporaire
-                try:
-                    os.unlink(audio_file)
-                except:
-                    pass
-                
-                self.is_speaking = False
-                self.playback_queue.task_done()
-                
+                self._last_end = time.perf_counter()
             except Exception as e:
                 print(f"Playback error: {e}")
-                self.is_speaking = False
-                # Ensure task_done is called even on error if we got an item
-                try:
-                    self.playback_queue.task_done()
-                except ValueError:
-                    pass
+            finally:
+                self._current = None
+                self._speaking = False
+                self._done()
+                self.loop.call_soon_threadsafe(self._window.release)
+
+    def _wait_playback(self, audio, channel, sound, segments):
+        """Attend la fin de la phrase sur l'événement stopped (timeout = durée restante), sans sonder"""
+        ends_at = time.perf_counter() + sound.get_length()
+        for sound in segments:
+            # Channel.queue holds one sound: wait until the queued one has started
+            if audio.stopped.wait(max(0.0, ends_at - time.perf_counter())):
+                return
+            while channel.get_queue() is not None: # Mixer slightly behind the clock
+                if audio.stopped.wait(0.005):
+                    return
+            channel.queue(sound) # Chained by the mixer without a gap
+            ends_at = max(ends_at, time.perf_counter()) + sound.get_length()
+        if audio.stopped.wait(max(0.0, ends_at - time.perf_counter())):
+            return
+        while channel.get_busy(): # Last few ms of the mixer buffer
+            if audio.stopped.wait(0.005):
+                return
+
+    def _write_pcm(self, audio, sound, segments):
+        """Ajoute la phrase au ring buffer au fil des segments; rend la main sans attendre sa lecture"""
+        output = self.output
+        for sound in chain([sound], segments):
+            if audio.stopped.is_set():
+                break
+            output.write(pcm_from_sound(sound, output.channels), audio.stopped)
+        if audio.stopped.is_set():
+            output.reset_writer()
+            return
+        # Next sentence already synthesized or on its way: crossfade into it
+        output.end_sentence(more=not self.playback_queue.empty(), stopped=audio.stopped)
+
+    def interrupt(self):
+        """Barge-in: coupe la phrase en cours et abandonne tout ce qui attend. Thread-safe, immédiat."""
+        self._generation += 1
+        current = self._current
+        if current is not None:
+            audio, channel = current
+            audio.stopped.set()
+            if channel is not None:
+                channel.stop() # Silence now, from the caller's thread
+        if self.output is not None:
+            self.output.clear() # Silence from the next audio block
+        self.loop.call_soon_threadsafe(self._cancel_pending)
+
+    def _cancel_pending(self):
+        # Runs on the synthesis loop: texts not dispatched yet, then syntheses in flight
+        kept = []
+        dropped = 0
+        while not self._texts.empty():
+            item = self._texts.get_nowait()
+            if item[0] is None or item[2] == self._generation:
+                kept.append(item) # Stop signal, or spoken after the interrupt
+            else:
+                dropped += 1
+        for item in kept:
+            self._texts.put_nowait(item)
+        for task, generation in list(self._tasks.items()):
+            if generation != self._generation:
+                task.cancel()
+        if dropped:
+            self._done(dropped)
+
+    def _done(self, count=1):
+        with self._pending_lock:
+            self._pending = max(0, self._pending - count)
+            if not self._pending and not (self.output is not None and self.output.playing):
+                self.idle.set()
+
+    def _on_drained(self):
+        # Audio thread: the ring played its last frame
+        with self._pending_lock:
+            if not self._pending:
+                self.idle.set()
+
+    def gap_stats(self):
+        """Silences entre phrases consécutives (ms): n, p50, p95, max"""
+        return latency_stats(self.gaps)
+
+    def ttfa_stats(self):
+        """Temps jusqu'au premier audio jouable, par phrase (ms): n, p50, p95, max"""
+        return latency_stats(self.ttfa)
     
     def speak_streaming(self, text):
         """Parle en streaming - divise en phrases et génère en parallèle"""
@@ -113,68 +331,73 @@ class StreamingTTS:
         
         for sentence in sentences:
             if sentence:
-                self.audio_queue.put(sentence)
+                self.speak_immediate(sentence)
     
     def speak_immediate(self, text):
-        """Parle immédiatement (pour réponses courtes)"""
-        self.audio_queue.put(text)
+        """Parle immédiatement (pour réponses courtes). Thread-safe, ne bloque jamais l'appelant."""
+        with self._pending_lock:
+            self._pending += 1
+            self.idle.clear()
+        self.loop.call_soon_threadsafe(self._texts.put_nowait, (text, time.perf_counter(), self._generation))
     
     def stop(self):
         """Arrête tous les workers"""
-        self.audio_queue.put(None)
-        self.playback_queue.put(None)
+        self.loop.call_soon_threadsafe(self._texts.put_nowait, (None, None, None))
+        self.playback_thread.join(timeout=2)
+        self.loop.call_soon_threadsafe(self.loop.stop)
 
 class StreamingAI:
-    """Simule IA qui génère du texte en streaming"""
+    """Assemble le texte streamé et le prononce unité par unité (frontières envoyées par le serveur)"""
     
     def __init__(self, tts_engine):
         self.tts = tts_engine
-        self.current_buffer = ""
+        self.parts = []
         self.has_spoken = False
+        self.cancelled = False
 
     def reset(self):
         """Reset state for new generation"""
-        self.current_buffer = ""
+        self.parts = []
         self.has_spoken = False
+        self.cancelled = False
+
+    def cancel(self):
+        """Barge-in: la réponse en cours est abandonnée, ses tokens encore en route sont ignorés"""
+        self.parts = []
+        self.cancelled = True
+        self.tts.interrupt()
     
     def process_token(self, token):
-        """Traite chaque token généré par l'IA"""
-        self.current_buffer += token
-        
-        # Détecter fin de phrase (ou retour à la ligne)
-        # Optimisation "Temps Réel": On coupe aussi sur les virgules si le buffer est assez long
-        # pour éviter d'attendre la fin d'une longue phrase complexe.
-        is_sentence_end = any(p in token for p in ['.', '!', '?', '\n'])
-        is_sub_clause = any(p in token for p in [',', ':', ';'])
-        
-        should_speak = False
-        if is_sentence_end:
-            should_speak = True
-        elif is_sub_clause and len(self.current_buffer) > 40: # ~6-8 mots
-            should_speak = True
-            
-        if should_speak:
-            sentence = self.current_buffer.strip()
-            if sentence and len(sentence) > 2: # Avoid speaking single chars
-                if not self.has_spoken:
-                     print(f"⏱️ First Audio Triggered")
-                print(f"Speaking: {sentence}")
-                self.tts.speak_immediate(sentence)
-                self.current_buffer = ""
-                self.has_spoken = True
+        """Texte d'un frame token: accumulé tel quel, sans rescanner le buffer"""
+        if not self.cancelled:
+            self.parts.append(token)
+
+    def end_unit(self):
+        """Frame sentence_end: l'unité (phrase ou longue proposition) est complète, on la prononce"""
+        sentence = "".join(self.parts)
+        self.parts = []
+        self._speak(sentence)
+    
+    def _speak(self, sentence):
+        sentence = sentence.strip()
+        if sentence and len(sentence) > 2: # Avoid speaking single chars
+            if not self.has_spoken:
+                 print(f"⏱️ First Audio Triggered")
+            print(f"Speaking: {sentence}")
+            self.tts.speak_immediate(sentence)
+            self.has_spoken = True
     
     def flush_buffer(self):
         """Parle le reste du buffer"""
-        if self.current_buffer.strip():
-            print(f"Flushing: {self.current_buffer.strip()}")
-            self.tts.speak_immediate(self.current_buffer.strip())
-            self.current_buffer = ""
+        rest = "".join(self.parts).strip()
+        self.parts = []
+        if rest:
+            print(f"Flushing: {rest}")
+            self.tts.speak_immediate(rest)
             self.has_spoken = True
 
 # Exemple d'usage
 if __name__ == "__main__":
-    import time
-    
     # Initialiser TTS streaming
     tts = StreamingTTS()
     ai = StreamingAI(tts)
@@ -185,6 +408,8 @@ if __name__ == "__main__":
     print("Simulation streaming IA...")
     for i, char in enumerate(response):
         ai.process_token(char)
+        if char in ".!?": # Stand-in for the server's sentence_end frames
+            ai.end_unit()
         time.sleep(0.05)  # Simule latence génération
     
     ai.flush_buffer()
@@ -0,0 +1,83 @@
+import time
+from abc import ABC, abstractmethod
+
+import numpy as np
+import speech_recognition as sr
+
+
+class STTEngine(ABC):
+    """Interface d'un moteur STT: transcribe(AudioData) -> texte ("" si rien de compris). Bloquant."""
+
+    name = "base"
+    local = False # Runs on this machine: extra calls (partials) cost CPU, not cloud round trips
+
+    @abstractmethod
+    def transcribe(self, audio):
+        """Texte reconnu dans audio (speech_recognition.AudioData)"""
+
+
+class GoogleSTTEngine(STTEngine):
+    """Google Web Speech (réseau): un aller-retour cloud par phrase"""
+
+    name = "google"
+
+    def __init__(self, language="en-US"):
+        self.language = language
+        self.recognizer = sr.Recognizer()
+
+    def transcribe(self, audio):
+        try:
+            return self.recognizer.recognize_google(audio, language=self.language)
+        except sr.UnknownValueError:
+            return ""
+
+
+class WhisperSTTEngine(STTEngine):
+    """faster-whisper local (hors ligne): modèle chargé une fois, partagé par les workers"""
+
+    name = "whisper"
+    local = True
+
+    def __init__(self, model="base.en", language="en", device="cpu", compute_type="int8", workers=2):
+        from faster_whisper import WhisperModel # Only needed when this engine is selected
+
+        self.language = language
+        self.model = WhisperModel(model, device=device, compute_type=compute_type, num_workers=workers)
+
+    def transcribe(self, audio):
+        samples = np.frombuffer(audio.get_raw_data(convert_rate=16000, convert_width=2), dtype=np.int16)
+        segments, _ = self.model.transcribe(samples.astype(np.float32) / 32768.0, language=self.language,
+                                            beam_size=1)
+        return " ".join(segment.text.strip() for segment in segments).strip()
+
+
+class FakeSTTEngine(STTEngine):
+    """Moteur déterministe (tests, bancs): le texte est l'audio lui-même, encodé en ASCII.
+
+    Build utterances with fake_utterance(text). latency simulates the time a
+    real engine spends on one utterance.
+    """
+
+    name = "fake"
+    local = True
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+
+    def transcribe(self, audio):
+        if self.latency:
+            time.sleep(self.latency)
+        return audio.frame_data.decode("ascii", "ignore").strip()
+
+
+def fake_utterance(text):
+    return sr.AudioData(text.encode("ascii"), 16000, 2)
+
+
+ENGINES = {"google": GoogleSTTEngine, "whisper": WhisperSTTEngine, "fake": FakeSTTEngine}
+
+
+def create_engine(name="google"):
+    if name not in ENGINES:
+        raise ValueError(f"Unknown STT engine: {name} (available: {', '.join(ENGINES)})")
+    return ENGINES[name]()
@@ -0,0 +1,103 @@
+"""Benchmark: connection setup per query vs the APIWorker's persistent connections.
+
+Local servers, so the numbers are a floor: over a LAN or TLS every extra
+handshake costs more. HTTP: a fresh `requests.post` per /execute (the old
+worker) vs one keep-alive `requests.Session`. WebSocket: connect per chat
+query vs one long-lived /ws connection; the server echoes a done frame.
+
+Usage: python client/tests/bench_api_session.py [queries]
+"""
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import requests
+from websockets.sync.client import connect
+from websockets.sync.server import serve
+
+from workers.api_worker import CONNECT_TIMEOUT
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1" # Keep-alive, like uvicorn
+    disable_nagle_algorithm = True # uvicorn sets TCP_NODELAY too (headers and body are separate writes)
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        body = json.dumps({"status": "success", "summary": "Done"}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def echo(ws):
+    for raw in ws:
+        ws.send(json.dumps({"type": "done", "id": json.loads(raw)["id"]}))
+
+
+def timed(n, query):
+    times = []
+    for i in range(n):
+        t = time.perf_counter()
+        query(i)
+        times.append(time.perf_counter() - t)
+    return times
+
+
+def bench_http(n):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/execute"
+    fresh = timed(n, lambda i: requests.post(url, json={"command": f"q{i}"}, timeout=CONNECT_TIMEOUT).json())
+    session = requests.Session()
+    pooled = timed(n, lambda i: session.post(url, json={"command": f"q{i}"}, timeout=CONNECT_TIMEOUT).json())
+    session.close()
+    server.shutdown()
+    return fresh, pooled
+
+
+def bench_ws(n):
+    server = serve(echo, "127.0.0.1", 0, compression=None)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"ws://127.0.0.1:{server.socket.getsockname()[1]}"
+
+    def chat(ws, i):
+        ws.send(json.dumps({"type": "chat", "id": str(i), "query": f"q{i}"}))
+        return ws.recv(timeout=CONNECT_TIMEOUT)
+
+    def fresh_chat(i):
+        with connect(url, open_timeout=CONNECT_TIMEOUT, compression=None) as ws:
+            chat(ws, i)
+
+    fresh = timed(n, fresh_chat)
+    with connect(url, open_timeout=CONNECT_TIMEOUT, compression=None) as ws:
+        persistent = timed(n, lambda i: chat(ws, i))
+    server.shutdown()
+    return fresh, persistent
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    print(f"{n} queries per run, local server")
+    print(f"{'transport':26} | {'median':>8} {'p95':>8} | {'persistent median':>17} {'p95':>8} | {'saved/query':>11}")
+    for name, bench in (("HTTP /execute", bench_http), ("WebSocket /ws", bench_ws)):
+        fresh, kept = bench(n)
+        p95 = lambda t: sorted(t)[int(len(t) * 0.95)]
+        saved = statistics.median(fresh) - statistics.median(kept)
+        print(f"{name + ' (per query)':26} | {statistics.median(fresh) * 1000:6.2f}ms {p95(fresh) * 1000:6.2f}ms | "
+              f"{statistics.median(kept) * 1000:15.2f}ms {p95(kept) * 1000:6.2f}ms | {saved * 1000:9.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""Benchmark: multi-sentence answer, one mixer Sound per sentence vs the PCM ring buffer.
+
+Each sentence is the test chirp (2.06 s MP3) framed by 150 ms of leading and
+300 ms of trailing silence, like a synthesized clip. Measures, for both
+output stages, the silence heard between sentences and the playback thread's
+CPU time per sentence, plus the cost of decoding MP3 to PCM and of writing it
+to the ring (trim + crossfade + copy). The ring's sound card is simulated by
+a thread reading 512-frame blocks in real time. SDL dummy driver: no sound card needed.
+
+Usage: python client/tests/bench_pcm_output.py
+"""
+import asyncio
+import os
+import sys
+import time
+
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import numpy as np
+import pygame
+
+from pcm_output import PcmOutput, pcm_from_sound
+from streaming_tts import StreamingTTS
+from test_pcm_output import ClockReader, NoCache
+
+CHIRP = os.path.join(os.path.dirname(__file__), "data", "chirp.mp3")
+SENTENCES = 6
+RATE = 24000
+
+
+def padded_clip():
+    pcm = pcm_from_sound(pygame.mixer.Sound(CHIRP))
+    lead, trail = np.zeros((int(0.15 * RATE), 2), np.int16), np.zeros((int(0.3 * RATE), 2), np.int16)
+    return np.concatenate((lead, pcm, trail))
+
+
+class ClipTTS(StreamingTTS):
+    def __init__(self, clip, **kwargs):
+        self.clip = clip
+        super().__init__(phrases=NoCache(), **kwargs)
+
+    async def _generate_audio(self, text, audio=None):
+        await asyncio.sleep(0.05)
+        audio.put(pygame.mixer.Sound(buffer=self.clip.tobytes()))
+
+
+def thread_cpu(thread):
+    return time.clock_gettime(time.pthread_getcpuclockid(thread.ident))
+
+
+def answer(tts):
+    """Joue la réponse; renvoie (durée, CPU du thread de lecture par phrase)"""
+    cpu, wall = thread_cpu(tts.playback_thread), time.perf_counter()
+    for i in range(SENTENCES):
+        tts.speak_immediate(f"Sentence number {i}.")
+    tts.idle.wait(60)
+    return time.perf_counter() - wall, (thread_cpu(tts.playback_thread) - cpu) / SENTENCES
+
+
+def main():
+    pygame.mixer.init(frequency=RATE, channels=2, allowedchanges=0)
+    with open(CHIRP, "rb") as f:
+        mp3 = f.read()
+    runs = 20
+    start = time.perf_counter()
+    for _ in range(runs):
+        pcm = pcm_from_sound(pygame.mixer.Sound(file=__import__("io").BytesIO(mp3)))
+    decode = (time.perf_counter() - start) / runs
+    seconds = len(pcm) / RATE
+    print(f"MP3 -> PCM decode: {decode / seconds * 1000:.2f} ms per second of audio")
+
+    clip = padded_clip()
+    output = PcmOutput(sample_rate=RATE, capacity_seconds=60)
+    start = time.perf_counter()
+    for _ in range(runs):
+        output.write(clip)
+        output.end_sentence(more=True)
+        output.read(output.write_pos - output.read_pos)
+    write = (time.perf_counter() - start) / runs
+    print(f"Ring write (trim + crossfade + copy): {write / (len(clip) / RATE) * 1e6:.0f} µs per second of audio")
+
+    loud = np.flatnonzero(np.abs(pcm[:, 0].astype(np.int32)) > PcmOutput().threshold)
+    speech = SENTENCES * (loud[-1] - loud[0] + 1) / RATE # Without the clip's own quiet edges
+
+    mixer = ClipTTS(clip)
+    wall, cpu = answer(mixer)
+    # The mixer plays every clip whole: its padding is heard, plus any scheduling delay
+    silence = (wall - speech) / (SENTENCES - 1)
+    print(f"mixer: {SENTENCES} sentences in {wall:.2f} s for {speech:.2f} s of speech, "
+          f"~{silence * 1000:.0f} ms between sentences (scheduling p50 {mixer.gap_stats()['p50']} ms), "
+          f"playback thread {cpu * 1000:.2f} ms CPU per sentence")
+    mixer.stop()
+
+    output = PcmOutput(sample_rate=RATE)
+    ring = ClipTTS(clip, output=output)
+    reader = ClockReader(output)
+    reader_cpu = thread_cpu(reader.thread)
+    wall, cpu = answer(ring)
+    reader_cpu = thread_cpu(reader.thread) - reader_cpu
+    played = reader.stop()
+    heard = np.flatnonzero(np.abs(played[:, 0].astype(np.int32)) > output.threshold)
+    silence = ((heard[-1] - heard[0] + 1) / RATE - speech) / (SENTENCES - 1)
+    print(f"ring:  {SENTENCES} sentences in {wall:.2f} s for {speech:.2f} s of speech, "
+          f"~{silence * 1000:.0f} ms between sentences (scheduling max {ring.gap_stats()['max']} ms), "
+          f"playback thread {cpu * 1000:.2f} ms CPU per sentence, "
+          f"output callbacks {reader_cpu / wall * 1000:.2f} ms CPU per s")
+    ring.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""Benchmark: end of speech -> first audio, final-transcript routing vs speculation on partials.
+
+Drives the real VoiceWorker pipeline (Endpointer, STT pool, partial
+snapshots, hints) with the VAD fixtures, fed in real time. The STT engine
+reveals the fixture's words in proportion to the speech it is given, after
+a fixed latency; the server answers its first sentence TTFT after a request
+starts, and the TTS needs TTFA more before the first sample plays. Baseline
+is the previous flow: no partials, request sent on the final transcript.
+
+Usage: python client/tests/bench_speculation.py [stt_ms] [ttft_ms] [ttfa_ms]
+"""
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from PyQt6.QtCore import Qt
+
+from intent import SpeculativeRouter
+from stt_engine import FakeSTTEngine
+from vad import FRAME
+from vad_fixtures import FIXTURES, RATE
+from workers.voice_worker import VoiceWorker
+
+SCRIPTS = {
+    "yes": "yes",
+    "command": "tell me a joke",
+    "hesitant": "what is the weather today",
+    "noisy": "how are you",
+}
+PREROLL = 0.3
+
+
+class ScriptSTT(FakeSTTEngine):
+    """Les mots du script, au prorata de la parole reçue (pré-roll déduit)"""
+
+    def __init__(self, text, speech_seconds, latency):
+        super().__init__(latency)
+        self.words = text.split()
+        self.speech_seconds = speech_seconds
+
+    def transcribe(self, audio):
+        time.sleep(self.latency)
+        heard = len(audio.frame_data) / 2 / RATE - PREROLL
+        n = min(len(self.words), int(len(self.words) * heard / self.speech_seconds + 0.2))
+        return " ".join(self.words[:max(n, 0)])
+
+
+class Brain:
+    """Serveur simulé: première phrase TTFT après le début de la requête"""
+
+    def __init__(self, ttft):
+        self.ttft = ttft
+        self.requests = []
+
+    def start(self, query):
+        self.requests.append((query, time.perf_counter()))
+
+    def first_sentence(self):
+        return self.requests[-1][1] + self.ttft
+
+
+def run(name, speculate, stt, ttft, ttfa):
+    pcm, start, end = FIXTURES[name]()
+    engine = ScriptSTT(SCRIPTS[name], end - start, stt)
+    worker = VoiceWorker(engine=engine, spotter=False, partial_ms=400 if speculate else 0)
+    router = SpeculativeRouter()
+    brain = Brain(ttft)
+    final = threading.Event()
+    result = {}
+
+    def on_partial(text, settled):
+        query = router.partial(text, settled)
+        if query:
+            brain.start(query)
+
+    def on_final(text):
+        result["committed"] = router.final(text)
+        if not result["committed"]:
+            brain.start(text)
+        result["final"] = time.perf_counter()
+        result["first_audio"] = max(result["final"], brain.first_sentence()) + ttfa
+        final.set()
+
+    # No Qt event loop here: callbacks run in the STT threads
+    worker.partial_detected.connect(on_partial, Qt.ConnectionType.DirectConnection)
+    worker.voice_detected.connect(on_final, Qt.ConnectionType.DirectConnection)
+    data = pcm.tobytes()
+    t0 = time.perf_counter()
+    speech_end = t0 + end
+    for i in range(0, len(data), FRAME * 2):
+        time.sleep(max(0.0, t0 + i / 2 / RATE - time.perf_counter())) # Real time: 20 ms per frame
+        worker.process(data[i:i + FRAME * 2])
+        if final.is_set():
+            break
+    final.wait(5)
+    worker.stop()
+    return {
+        "endpoint": worker.endpoint_latencies[0],
+        "final": result["final"] - speech_end,
+        "first_audio": result["first_audio"] - speech_end,
+        "requests": len(brain.requests),
+        "committed": result["committed"],
+    }
+
+
+def main():
+    stt, ttft, ttfa = (int(a) / 1000 for a in (sys.argv[1:] + ["300", "400", "150"][len(sys.argv) - 1:]))
+    print(f"STT {stt * 1000:.0f} ms, TTFT {ttft * 1000:.0f} ms, TTFA {ttfa * 1000:.0f} ms "
+          f"(times from the end of speech)")
+    print(f"{'fixture':9} | {'final routing: endpoint':>23} {'transcript':>10} {'1st audio':>9} | "
+          f"{'speculative: endpoint':>21} {'transcript':>10} {'1st audio':>9} {'requests (final)':>16}")
+    totals = [0.0, 0.0]
+    for name in SCRIPTS:
+        base = run(name, False, stt, ttft, ttfa)
+        spec = run(name, True, stt, ttft, ttfa)
+        totals[0] += base["first_audio"]
+        totals[1] += spec["first_audio"]
+        outcome = "commit" if spec["committed"] else "resent"
+        print(f"{name:9} | {base['endpoint'] * 1000:21.0f}ms {base['final'] * 1000:8.0f}ms {base['first_audio'] * 1000:7.0f}ms | "
+              f"{spec['endpoint'] * 1000:19.0f}ms {spec['final'] * 1000:8.0f}ms {spec['first_audio'] * 1000:7.0f}ms "
+              f"{spec['requests']:7d} ({outcome})")
+    n = len(SCRIPTS)
+    print(f"Mean speech end -> first audio: {totals[0] / n * 1000:.0f} ms -> {totals[1] / n * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
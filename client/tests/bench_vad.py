@@ -0,0 +1,96 @@
+"""Benchmark: endpointing on the VAD fixtures, speech_recognition's listen() vs the frame Endpointer.
+
+Baseline is the old VoiceWorker setup: energy threshold 280 (dynamic),
+pause_threshold 0.4, non_speaking_duration 0.2, phrase_time_limit 5. Both
+read the same fixture in 20 ms chunks; latencies are in audio time (from the
+true end of speech to the moment the utterance is handed over), so they do
+not depend on this machine's speed. Also reports Endpointer CPU per second
+of audio.
+
+Usage: python client/tests/bench_vad.py
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import speech_recognition as sr
+
+from vad import FRAME, Endpointer
+from vad_fixtures import FIXTURES, RATE
+
+
+class FixtureStream:
+    def __init__(self, pcm):
+        self.data = pcm.tobytes()
+        self.pos = 0
+
+    def read(self, size):
+        chunk = self.data[self.pos:self.pos + size * 2]
+        self.pos += len(chunk)
+        return chunk
+
+
+class FixtureSource(sr.AudioSource):
+    """Micro simulé: le fixture, lu par blocs de 20 ms"""
+
+    def __init__(self, pcm):
+        self.stream = FixtureStream(pcm)
+        self.SAMPLE_RATE = RATE
+        self.SAMPLE_WIDTH = 2
+        self.CHUNK = FRAME
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+
+def baseline(pcm, start, end):
+    recognizer = sr.Recognizer()
+    recognizer.energy_threshold = 280
+    recognizer.dynamic_energy_threshold = True
+    recognizer.pause_threshold = 0.4
+    recognizer.phrase_threshold = 0.2
+    recognizer.non_speaking_duration = 0.2
+    source = FixtureSource(pcm)
+    audio = recognizer.listen(source, timeout=5, phrase_time_limit=5)
+    handed_at = source.stream.pos / 2 / RATE
+    kept = len(audio.frame_data) / 2 / RATE
+    return handed_at - end, kept
+
+
+def endpointer(pcm, start, end):
+    ep = Endpointer()
+    data = pcm.tobytes()
+    for i in range(0, len(data), FRAME * 2):
+        for kind, utterance in ep.feed(data[i:i + FRAME * 2]):
+            if kind == "end":
+                return utterance.end - end, len(utterance.pcm) / 2 / RATE
+    return None, 0.0
+
+
+def main():
+    print(f"{'fixture':10} {'speech':>7} | {'listen(): latency':>17} {'kept':>6} | {'Endpointer: latency':>19} {'kept':>6}")
+    for name, make in FIXTURES.items():
+        pcm, start, end = make()
+        old, old_kept = baseline(pcm, start, end)
+        new, new_kept = endpointer(pcm, start, end)
+        print(f"{name:10} {end - start:6.2f}s | {old * 1000:15.0f}ms {old_kept:5.2f}s | {new * 1000:17.0f}ms {new_kept:5.2f}s")
+
+    pcm, _, _ = FIXTURES["long"]()
+    data = pcm.tobytes()
+    runs = 5
+    start = time.process_time()
+    for _ in range(runs):
+        ep = Endpointer()
+        for i in range(0, len(data), FRAME * 2):
+            ep.feed(data[i:i + FRAME * 2])
+    cpu = (time.process_time() - start) / runs
+    print(f"Endpointer CPU: {cpu / (len(pcm) / RATE) * 1000:.2f} ms per second of audio")
+
+
+if __name__ == "__main__":
+    main()
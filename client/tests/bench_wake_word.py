@@ -0,0 +1,48 @@
+"""Benchmark: local wake word spotter on the synthetic fixtures.
+
+False rejects on 24 renditions of "sonia" by the enrolled voice (pitch,
+tempo and noise vary; a third carry a command), false accepts on 32 other
+utterances including near misses. Sweeps the sensitivity, then reports the
+spotter's CPU per second of audio: that is all passive mode now costs, where
+it used to send every utterance to the cloud STT.
+
+Usage: python client/tests/bench_wake_word.py
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from wake_fixtures import ENROLL, NEGATIVES, RATE, negatives, positives
+from wake_word import WakeWordSpotter
+
+
+def main():
+    spotter = WakeWordSpotter(ENROLL)
+    pos, neg = positives(), negatives()
+    pos_scores = [spotter.score(pcm)[0] for pcm, _, _ in pos]
+    neg_scores = [spotter.score(pcm)[0] for pcm, _, _ in neg]
+
+    print(f"{'sensitivity':>11} {'threshold':>9} | {'false rejects':>13} | {'false accepts':>13}  accepted")
+    for sensitivity in (0.0, 0.25, 0.5, 0.75, 1.0):
+        spotter.set_sensitivity(sensitivity)
+        fr = sum(d > spotter.threshold for d in pos_scores)
+        accepted = [p for d, p in zip(neg_scores, NEGATIVES * 2) if d <= spotter.threshold]
+        print(f"{sensitivity:11.2f} {spotter.threshold:9.2f} | {fr:6d}/{len(pos):<2} {fr / len(pos):5.0%} | "
+              f"{len(accepted):6d}/{len(neg):<2} {len(accepted) / len(neg):5.0%}  {', '.join(accepted)}")
+
+    audio = [pcm for pcm, _, _ in pos + neg]
+    seconds = sum(len(pcm) for pcm in audio) / RATE
+    runs = 3
+    start = time.process_time()
+    for _ in range(runs):
+        for pcm in audio:
+            spotter.detect(pcm)
+    cpu = (time.process_time() - start) / runs
+    print(f"Spotter CPU: {cpu / seconds * 1000:.2f} ms per second of audio "
+          f"({cpu / len(audio) * 1000:.1f} ms per utterance, {len(spotter.templates)} templates)")
+
+
+if __name__ == "__main__":
+    main()
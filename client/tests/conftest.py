@@ -0,0 +1,7 @@
+import os
+import sys
+
+# Client modules use flat imports (run as `python client/main.py`)
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+# No sound card needed: SDL plays into the void
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
@@ -0,0 +1,144 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from queue import Empty, Queue
+
+from PyQt6.QtCore import QCoreApplication
+
+import workers.api_worker as api_worker
+from workers.api_worker import APIWorker
+
+app = QCoreApplication.instance() or QCoreApplication([]) # Frames reach the UI side through queued signals
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        app.processEvents()
+        time.sleep(0.005)
+    app.processEvents() # What was posted just before the condition turned true
+
+
+class FakeSocket:
+    """Serveur /ws minimal: chaque chat reçoit `count` phrases (une par `delay`) puis done; cancel arrête le flux"""
+
+    def __init__(self, count=2, delay=0.0):
+        self.count = count
+        self.delay = delay
+        self.sent = []
+        self.frames = Queue()
+        self.cancelled = set()
+
+    def send(self, raw):
+        msg = json.loads(raw)
+        self.sent.append(msg)
+        if msg["type"] == "chat":
+            threading.Thread(target=self._answer, args=(msg["id"], msg["query"]), daemon=True).start()
+        elif msg["type"] == "cancel":
+            self.cancelled.add(msg["id"])
+
+    def _answer(self, req_id, query):
+        for i in range(self.count):
+            time.sleep(self.delay)
+            if req_id in self.cancelled:
+                break
+            self.frames.put(json.dumps({"type": "token", "id": req_id, "text": f"{query} {i}."}))
+            self.frames.put(json.dumps({"type": "sentence_end", "id": req_id, "kind": "sentence"}))
+        self.frames.put(json.dumps({"type": "done", "id": req_id, "cancelled": req_id in self.cancelled}))
+
+    def recv(self, timeout=None):
+        try:
+            return self.frames.get(timeout=timeout)
+        except Empty:
+            raise TimeoutError from None
+
+    def close(self):
+        pass
+
+
+def started_worker(ws):
+    worker = APIWorker()
+    worker.ws = ws
+    events = []
+    worker.token_received.connect(lambda text: events.append(text))
+    worker.sentence_ended.connect(lambda: events.append("|"))
+    worker.response_complete.connect(lambda text: events.append(("done", text)))
+    worker.error_occurred.connect(lambda text: events.append(("error", text)))
+    worker.start()
+    return worker, events
+
+
+def test_newer_query_supersedes_the_one_streaming():
+    ws = FakeSocket(count=5, delay=0.05)
+    worker, events = started_worker(ws)
+    worker.submit("old")
+    wait_for(lambda: "old 0." in events)
+    worker.submit("new") # Never blocks, never dropped
+    wait_for(lambda: events and events[-1] == ("done", "new 0.new 1.new 2.new 3.new 4."))
+    old = ws.sent[0]["id"]
+    assert {"type": "cancel", "id": old} in ws.sent # The server stops generating the stale answer
+    assert not any("old" in str(e) for e in events[events.index("new 0."):]) # Nothing stale after the switch
+    assert ("done", "old 0.old 1.old 2.old 3.old 4.") not in events
+    assert worker.superseded == 1
+    worker.stop()
+
+
+def test_speculative_answer_is_held_until_commit():
+    ws = FakeSocket()
+    worker, events = started_worker(ws)
+    worker.submit("what is the weather", session_id="s1", speculative=True)
+    wait_for(lambda: worker.unconfirmed is not None) # Whole answer streamed, final transcript still pending
+    chat = ws.sent[0]
+    assert chat["speculative"] and events == []
+    worker.commit()
+    assert events == ["what is the weather 0.", "|", "what is the weather 1.", "|",
+                      ("done", "what is the weather 0.what is the weather 1.")]
+    assert ws.sent[-1] == {"type": "commit", "id": chat["id"]} # The server records the turn now
+    worker.stop()
+
+
+def test_wrong_guess_is_never_heard():
+    ws = FakeSocket()
+    worker, events = started_worker(ws)
+    worker.submit("what is the", speculative=True)
+    wait_for(lambda: worker.unconfirmed is not None)
+    worker.submit("what is the time") # Final transcript said something else
+    wait_for(lambda: events and events[-1][0] == "done")
+    assert {"type": "cancel", "id": ws.sent[0]["id"]} in ws.sent # Its turn is dropped server-side
+    assert all("what is the 0." not in str(e) for e in events)
+    chats = [m for m in ws.sent if m["type"] == "chat"]
+    assert chats[-1]["query"] == "what is the time" and not chats[-1]["speculative"]
+    worker.stop()
+
+
+def test_execute_reuses_one_http_connection(monkeypatch):
+    ports = []
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1" # Keep-alive
+
+        def do_POST(self):
+            command = json.loads(self.rfile.read(int(self.headers["Content-Length"])))["command"]
+            ports.append(self.client_address[1])
+            body = json.dumps({"status": "success", "summary": f"Done: {command}"}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setattr(api_worker, "SERVER_URL", f"http://127.0.0.1:{server.server_port}")
+    worker, events = started_worker(FakeSocket())
+    for i in range(3):
+        worker.submit(f"open notepad {i}", endpoint="/execute")
+        wait_for(lambda: ("done", f"Done: open notepad {i}") in events)
+    assert len(ports) == 3 and len(set(ports)) == 1
+    worker.stop()
+    server.shutdown()
@@ -0,0 +1,130 @@
+import threading
+import time
+
+import numpy as np
+
+from pcm_output import PcmOutput
+from streaming_tts import StreamingTTS
+
+RATE = 24000
+
+
+def clip(seconds, lead=0.15, trail=0.3, freq=220):
+    """Phrase synthétique: sinus encadré de silence, comme les clips edge-tts"""
+    t = np.arange(int(seconds * RATE)) / RATE
+    tone = (8000 * np.sin(2 * np.pi * freq * t)).astype(np.int16)
+    pcm = np.concatenate((np.zeros(int(lead * RATE), np.int16), tone, np.zeros(int(trail * RATE), np.int16)))
+    return np.repeat(pcm[:, None], 2, axis=1)
+
+
+def silent_runs(pcm, threshold=300):
+    loud = np.flatnonzero(np.abs(pcm[:, 0].astype(np.int32)) > threshold)
+    return np.diff(loud) - 1
+
+
+class ClockReader:
+    """Carte son simulée: lit le ring par blocs de 512 frames, au rythme réel"""
+
+    def __init__(self, output, block=512):
+        self.output = output
+        self.block = block
+        self.blocks = []
+        self.running = True
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def run(self):
+        period = self.block / RATE
+        next_at = time.perf_counter()
+        while self.running:
+            self.blocks.append(self.output.read(self.block))
+            next_at += period
+            time.sleep(max(0.0, next_at - time.perf_counter()))
+
+    def stop(self):
+        self.running = False
+        self.thread.join()
+        return np.concatenate(self.blocks)
+
+
+def test_sentences_are_trimmed_and_joined():
+    output = PcmOutput(sample_rate=RATE)
+    a, b = clip(0.5), clip(0.4, freq=330)
+    output.write(a[:5000]) # Arrives in segments
+    output.write(a[5000:])
+    output.end_sentence(more=True)
+    output.write(b)
+    output.end_sentence()
+    played = output.read(output.write_pos)
+    assert not output.playing
+    # 0.9 s of speech + 40 ms pads, instead of 0.45 s of silence per clip
+    assert abs(len(played) / RATE - (0.9 + 4 * 0.04 - 0.01)) < 0.01
+    assert silent_runs(played).max() < int(0.1 * RATE) # Pause between sentences ~80 ms
+
+
+def test_ring_wraps_and_applies_backpressure():
+    output = PcmOutput(sample_rate=RATE, capacity_seconds=0.1, pad_ms=0)
+    speech = clip(1.0, lead=0, trail=0)
+    reader = ClockReader(output)
+    writer = threading.Thread(target=lambda: (output.write(speech), output.end_sentence()))
+    started = time.perf_counter()
+    writer.start()
+    writer.join(5)
+    assert time.perf_counter() - started > 0.8 # Held back by a 0.1 s ring
+    time.sleep(0.15)
+    played = reader.stop()
+    loud = np.flatnonzero(played[:, 0])
+    body = speech[1:] # Starts at sin(0) = 0: trimmed as silence
+    assert np.array_equal(played[loud[0]:loud[0] + len(body)], body)
+
+
+class ClipTTS(StreamingTTS):
+    def __init__(self, **kwargs):
+        super().__init__(phrases=NoCache(), **kwargs)
+
+    async def _generate_audio(self, text, audio=None):
+        audio.put(FakeSound(clip(0.5)))
+
+
+class FakeSound:
+    def __init__(self, pcm):
+        self.pcm = pcm
+
+    def get_raw(self):
+        return self.pcm.tobytes()
+
+
+class NoCache:
+    directory = "."
+
+    def sound(self, text):
+        return None
+
+
+def test_streamed_sentences_play_without_gaps_and_interrupt_silences():
+    output = PcmOutput(sample_rate=RATE)
+    tts = ClipTTS(output=output)
+    reader = ClockReader(output)
+    for i in range(4):
+        tts.speak_immediate(f"Sentence number {i}.")
+    assert tts.idle.wait(5)
+    played = reader.stop()
+    loud = np.flatnonzero(played[:, 0])
+    speech = played[loud[0]:loud[-1] + 1]
+    assert silent_runs(speech).max() < int(0.1 * RATE)
+    assert tts.gap_stats()["max"] == 0
+
+    reader = ClockReader(output)
+    tts.speak_immediate("Interrupted sentence.")
+    deadline = time.time() + 5
+    while not output.playing:
+        assert time.time() < deadline
+        time.sleep(0.005)
+    time.sleep(0.1)
+    blocks_before = len(reader.blocks)
+    tts.interrupt()
+    assert tts.idle.wait(1)
+    time.sleep(0.1)
+    after = reader.stop()[(blocks_before + 1) * reader.block:]
+    assert not after.any() # Silent from the next block on (~21 ms)
+    tts.stop()
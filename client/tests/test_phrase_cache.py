@@ -0,0 +1,50 @@
+import io
+import wave
+
+import pygame
+import pytest
+
+from phrase_cache import PhraseCache
+
+
+@pytest.fixture(autouse=True)
+def mixer():
+    pygame.mixer.init(frequency=24000)
+    yield
+    pygame.mixer.quit()
+
+
+def synthesized(tmp_path, name, frames=2400):
+    """Stand-in for an edge-tts download: a short WAV written to a .part file"""
+    path = tmp_path / f"{name}.part"
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(24000)
+        w.writeframes(b"\x00\x01" * frames)
+    path.write_bytes(buf.getvalue())
+    return str(path)
+
+
+def test_store_then_hot_and_disk_hits(tmp_path):
+    cache = PhraseCache("en-US-AriaNeural", directory=str(tmp_path / "tts"))
+    assert cache.sound("On it.") is None
+    sound = cache.store("On it.", synthesized(tmp_path, "a"))
+    assert cache.sound("On it.") is sound # Decoded once, kept hot
+    assert cache.sound("  On   it. ") is sound # Whitespace-normalized key
+
+    restarted = PhraseCache("en-US-AriaNeural", directory=str(tmp_path / "tts"))
+    assert restarted.sound("On it.").get_length() == pytest.approx(0.1, abs=0.01) # From disk, no network
+    assert PhraseCache("fr-FR-DeniseNeural", directory=str(tmp_path / "tts")).sound("On it.") is None
+
+
+def test_disk_size_bound_evicts_least_recently_used(tmp_path):
+    cache = PhraseCache("v", directory=str(tmp_path / "tts"), max_disk_bytes=15000, hot_size=2)
+    for i in range(4):
+        cache.store(f"phrase {i}", synthesized(tmp_path, str(i))) # ~4.8 KB each
+        cache.sound("phrase 0") # Keep it recent
+    assert cache.disk_bytes <= 15000 and len(cache.hot) <= 2
+    assert cache.sound("phrase 0") is not None
+    assert cache.sound("phrase 1") is None
+    assert sorted(p.name for p in (tmp_path / "tts").iterdir()) == sorted(f"{k}.mp3" for k in cache.files)
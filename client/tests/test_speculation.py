@@ -0,0 +1,66 @@
+import time
+
+import workers.voice_worker as voice_worker
+from intent import SpeculativeRouter, classify
+from stt_engine import FakeSTTEngine, GoogleSTTEngine, fake_utterance
+from vad import SAMPLE_RATE
+from workers.stt_pool import STTPool
+from workers.voice_worker import VoiceWorker
+
+
+def test_router_speculates_on_stable_chat_partials_only():
+    router = SpeculativeRouter()
+    assert router.partial("what is") is None # Still moving
+    assert router.partial("what is the weather") is None
+    assert router.partial("What is the weather?") == "What is the weather?" # Same words twice
+    assert router.partial("what is the weather") is None # Already running
+    assert router.final("What is the weather") # Commit
+    assert router.partial("tell me a joke", settled=True) == "tell me a joke" # Speaker paused
+    assert not router.final("tell me a joke about cats") # Cancel, resend
+    assert router.partial("open notepad", settled=True) is None # Side effects: waits for the final
+    assert classify("open notepad") == "/execute" and classify("how are you") == "/chat"
+    assert router.stats == {"speculated": 2, "committed": 1, "cancelled": 1}
+
+
+class SlowSTT(FakeSTTEngine):
+    def __init__(self, latency):
+        super().__init__(latency)
+        self.seen = []
+
+    def transcribe(self, audio):
+        self.seen.append(audio.frame_data)
+        if audio.frame_data.startswith(b"late"):
+            time.sleep(0.3)
+        return super().transcribe(audio)
+
+
+def test_partials_latest_wins_and_never_after_the_final():
+    partials, finals = [], []
+    engine = SlowSTT(0.1)
+    pool = STTPool(engine, finals.append, workers=1, on_partial=lambda text, tag: partials.append(tag),
+                   partial_workers=1)
+    for i, text in enumerate(("what", "what is", "what is the", "what is the time")):
+        pool.submit_partial(fake_utterance(text), i)
+        time.sleep(0.01) # "what" is being transcribed, the next two are replaced before starting
+    time.sleep(0.3)
+    assert partials == [0, 3]
+    assert engine.seen == [b"what", b"what is the time"]
+
+    pool.submit_partial(fake_utterance("late what is the time"), 4)
+    time.sleep(0.01)
+    pool.submit(fake_utterance("what is the time now")) # Transcribed before the slow partial
+    time.sleep(0.6)
+    assert finals == ["what is the time now"]
+    assert partials == [0, 3] # Reporting it now would rewind the app to an older hypothesis
+    pool.stop()
+
+
+def test_partials_default_off_for_cloud_stt(monkeypatch):
+    monkeypatch.setattr(voice_worker, "PARTIAL_MS", None)
+    workers = [VoiceWorker(engine=GoogleSTTEngine(), spotter=False), VoiceWorker(engine=FakeSTTEngine(), spotter=False)]
+    assert [w.partial_every for w in workers] == [0, SAMPLE_RATE * voice_worker.LOCAL_PARTIAL_MS // 1000]
+    monkeypatch.setattr(voice_worker, "PARTIAL_MS", "300") # SONIA_STT_PARTIAL_MS set: used as is
+    workers.append(VoiceWorker(engine=GoogleSTTEngine(), spotter=False))
+    assert workers[-1].partial_every == SAMPLE_RATE * 300 // 1000
+    for worker in workers:
+        worker.stop()
@@ -0,0 +1,70 @@
+import threading
+import time
+
+from stt_engine import FakeSTTEngine, create_engine, fake_utterance
+from workers.stt_pool import STTPool
+
+
+class UnevenSTT(FakeSTTEngine):
+    """Les phrases courtes reviennent plus vite: l'ordre de fin diffère de l'ordre de capture"""
+
+    def transcribe(self, audio):
+        time.sleep(0.2 if len(audio.frame_data) > 10 else 0.02)
+        return super().transcribe(audio)
+
+
+class Collector:
+    def __init__(self, expected):
+        self.texts = []
+        self.expected = expected
+        self.done = threading.Event()
+
+    def __call__(self, text):
+        self.texts.append(text)
+        if len(self.texts) == self.expected:
+            self.done.set()
+
+
+def test_transcripts_keep_capture_order_and_capture_never_waits():
+    utterances = ["open the calculator please", "yes", "what time is it in Tokyo", "no", "stop"]
+    out = Collector(len(utterances))
+    pool = STTPool(UnevenSTT(), out, workers=3)
+    start = time.perf_counter()
+    for text in utterances:
+        pool.submit(fake_utterance(text))
+    assert time.perf_counter() - start < 0.01 # The mic thread is back to listening at once
+    assert out.done.wait(5)
+    assert out.texts == utterances
+    stats = pool.stats()
+    assert stats["latency"]["n"] == 5 and stats["stt"]["max"] >= 200
+    assert stats["queue"]["max"] >= 1 and stats["queue"]["dropped"] == 0
+    pool.stop()
+
+
+def test_full_queue_drops_oldest_utterance():
+    out = Collector(2)
+    pool = STTPool(FakeSTTEngine(latency=0.2), out, workers=1, max_pending=1)
+    for text in ("first", "stale", "latest"):
+        pool.submit(fake_utterance(text))
+        time.sleep(0.01) # "first" is being transcribed, "stale" waits, "latest" replaces it
+    assert out.done.wait(5)
+    assert out.texts == ["first", "latest"]
+    assert pool.stats()["queue"]["dropped"] == 1
+    pool.stop()
+
+
+def test_engine_errors_and_silence_are_skipped():
+    class Flaky(FakeSTTEngine):
+        def transcribe(self, audio):
+            if audio.frame_data == b"boom":
+                raise ConnectionError("network down")
+            return super().transcribe(audio)
+
+    out = Collector(1)
+    pool = STTPool(Flaky(), out)
+    for text in ("boom", "   ", "hello"):
+        pool.submit(fake_utterance(text))
+    assert out.done.wait(5)
+    assert out.texts == ["hello"]
+    assert create_engine("fake").name == "fake"
+    pool.stop()
@@ -0,0 +1,173 @@
+import asyncio
+import os
+import random
+import time
+
+import pygame
+
+import streaming_tts
+from phrase_cache import PhraseCache
+from streaming_tts import StreamingAI, StreamingTTS
+
+PLAY_TIME = 0.08
+
+
+class FakeChannel:
+    def __init__(self, duration):
+        self.until = time.perf_counter() + duration
+
+    def get_busy(self):
+        return time.perf_counter() < self.until
+
+    def get_queue(self):
+        return None
+
+    def stop(self):
+        self.until = 0
+
+
+class FakeSound:
+    def __init__(self, text, played):
+        self.text = text
+        self.played = played
+
+    def play(self):
+        self.played.append(self.text)
+        return FakeChannel(PLAY_TIME)
+
+    def get_length(self):
+        return PLAY_TIME
+
+
+class NoCache:
+    directory = "."
+
+    def sound(self, text):
+        return None
+
+
+class FakeTTS(StreamingTTS):
+    """Synthèse simulée: latence aléatoire, suivi de la concurrence"""
+
+    def __init__(self, synth_time, **kwargs):
+        self.synth_time = synth_time
+        self.played = []
+        self.active = 0
+        self.max_active = 0
+        self.rng = random.Random(3)
+        super().__init__(phrases=NoCache(), **kwargs)
+
+    async def _generate_audio(self, text, audio=None):
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        await asyncio.sleep(self.synth_time * self.rng.uniform(0.5, 1.5))
+        self.active -= 1
+        audio.put(FakeSound(text, self.played))
+
+
+def speak_all(tts, sentences):
+    for sentence in sentences:
+        tts.speak_immediate(sentence)
+    assert tts.idle.wait(10)
+    tts.stop()
+
+
+def test_order_preserved_and_lookahead_bounded():
+    sentences = [f"Sentence number {i}." for i in range(10)]
+    tts = FakeTTS(synth_time=0.06, lookahead=3)
+    speak_all(tts, sentences)
+    assert tts.played == sentences
+    assert tts.max_active == 3 # Concurrent, never more than K ahead
+
+
+def test_lookahead_removes_inter_sentence_gaps():
+    sentences = [f"Sentence number {i}." for i in range(8)]
+    sequential = FakeTTS(synth_time=0.1, lookahead=1)
+    speak_all(sequential, sentences)
+    pipelined = FakeTTS(synth_time=0.1, lookahead=3)
+    speak_all(pipelined, sentences)
+    print("K=1", sequential.gap_stats(), "K=3", pipelined.gap_stats())
+    # K=1 waits for each synthesis after the previous sentence ended
+    assert sequential.gap_stats()["p50"] >= 50
+    assert pipelined.gap_stats()["p50"] < sequential.gap_stats()["p50"] / 2
+
+
+class FakeCommunicate:
+    """edge_tts.Communicate simulé: le MP3 de test arrive par morceaux, à vitesse réseau"""
+
+    def __init__(self, text, voice, rate="+0%"):
+        with open(os.path.join(os.path.dirname(__file__), "data", "chirp.mp3"), "rb") as f:
+            self.data = f.read()
+
+    async def stream(self):
+        yield {"type": "WordBoundary", "offset": 0}
+        for i in range(0, len(self.data), 1024):
+            await asyncio.sleep(0.02)
+            yield {"type": "audio", "data": self.data[i:i + 1024]}
+
+
+def test_playback_starts_before_synthesis_ends(monkeypatch, tmp_path):
+    monkeypatch.setattr(streaming_tts.edge_tts, "Communicate", FakeCommunicate)
+    tts = StreamingTTS(phrases=PhraseCache("test", directory=str(tmp_path)))
+    tts.speak_immediate("Chirp.")
+    deadline = time.time() + 10
+    while not tts.ttfa:
+        assert time.time() < deadline
+        time.sleep(0.01)
+    # 13 chunks x 20 ms to receive the whole clip; the first segment needs ~2
+    assert tts.ttfa_stats()["max"] < 150
+    tts.stop()
+    assert tts.phrases.files # Full MP3 cached once the stream ended
+
+
+class ChirpTTS(FakeTTS):
+    """Chaque phrase est le MP3 de test (2 s), joué par le vrai mixer (pilote SDL dummy)"""
+
+    async def _generate_audio(self, text, audio=None):
+        await asyncio.sleep(0.01)
+        sound = pygame.mixer.Sound(os.path.join(os.path.dirname(__file__), "data", "chirp.mp3"))
+        self.played.append(text)
+        audio.put(sound)
+
+
+def test_interrupt_silences_playback_and_drops_queue():
+    tts = ChirpTTS(synth_time=0, lookahead=2)
+    for i in range(5):
+        tts.speak_immediate(f"Sentence number {i}.")
+    deadline = time.time() + 5
+    while tts._current is None:
+        assert time.time() < deadline
+        time.sleep(0.01)
+    time.sleep(0.2)
+    _, channel = tts._current
+    started = time.perf_counter()
+    tts.interrupt()
+    silent_after = time.perf_counter() - started if not channel.get_busy() else None
+    assert tts.idle.wait(1)
+    idle_after = time.perf_counter() - started
+    print(f"interrupt -> silence {silent_after * 1000:.2f} ms, -> idle {idle_after * 1000:.1f} ms")
+    assert silent_after is not None and silent_after < 0.02
+    assert idle_after < 0.05 # Playback thread woken by the event, not after the 2 s clip
+    time.sleep(0.3)
+    assert not tts.is_speaking
+    assert len(tts.played) <= 3 # Playing + lookahead; the rest never synthesized
+
+    tts.speak_immediate("After the interrupt.") # New sentences play normally
+    assert tts.idle.wait(5)
+    assert tts.played[-1] == "After the interrupt."
+    tts.stop()
+
+
+def test_cancelled_answer_ignores_late_tokens():
+    tts = FakeTTS(synth_time=0.01)
+    ai = StreamingAI(tts)
+    ai.process_token("Hello there.")
+    ai.end_unit()
+    ai.process_token("Still streaming")
+    ai.cancel()
+    ai.process_token(" from the server.") # Already in flight when the user spoke
+    ai.end_unit()
+    ai.flush_buffer()
+    assert tts.idle.wait(5)
+    assert "Still streaming from the server." not in tts.played
+    tts.stop()
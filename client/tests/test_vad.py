@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+
+from vad import Endpointer, EnergyClassifier, frame_features
+from vad_fixtures import FIXTURES, RATE
+
+
+def detect(pcm, endpointer=None, chunk=512):
+    endpointer = endpointer or Endpointer()
+    events = []
+    for i in range(0, len(pcm), chunk): # Odd chunk size: frames straddle mic reads
+        events += endpointer.feed(pcm[i:i + chunk].tobytes())
+    return events
+
+
+@pytest.mark.parametrize("name", sorted(FIXTURES))
+def test_fixture_is_one_utterance_with_preroll_and_exact_end(name):
+    pcm, start, end = FIXTURES[name]()
+    events = detect(pcm)
+    assert [kind for kind, _ in events] == ["start", "end"]
+    utterance = events[1][1]
+    assert start - 0.35 <= utterance.start <= start # Pre-roll keeps the soft onset
+    assert abs(utterance.speech_end - end) <= 0.05
+    assert utterance.endpoint_latency <= 0.6
+    kept = np.frombuffer(utterance.pcm, dtype=np.int16)
+    assert len(kept) / RATE >= end - start # Never truncated (the old limit was 5 s)
+
+
+def test_background_noise_alone_is_not_speech():
+    rng = np.random.default_rng(0)
+    noise = np.clip(rng.normal(0, 10 ** (-40 / 20), RATE * 5) * 32767, -32768, 32767).astype(np.int16)
+    assert detect(noise) == []
+
+
+def test_hangover_follows_pauses_and_partial_transcripts():
+    pcm, _, end = FIXTURES["hesitant"]() # 350 ms pauses inside the phrase
+    events = detect(pcm)
+    assert events[1][1].endpoint_latency > 0.5 # 1.5 x the longest pause
+
+    pcm, _, end = FIXTURES["command"]()
+    cut = int((end + 0.1) * RATE) # Partial transcript arrives in the trailing silence
+    for hint, expected in (("open the", 0.9), ("open the calculator", 0.45)): # Never shortened
+        endpointer = Endpointer()
+        detect(pcm[:cut], endpointer)
+        endpointer.hint(hint)
+        events = detect(pcm[cut:], endpointer)
+        assert events[0][1].endpoint_latency == pytest.approx(expected, abs=0.03)
+
+
+def test_partial_snapshot_and_stale_hints():
+    pcm, start, end = FIXTURES["hesitant"]()
+    endpointer = Endpointer()
+    detect(pcm[:int((start + 0.4) * RATE)], endpointer)
+    snapshot = endpointer.snapshot() # What a partial transcript is made from
+    at = endpointer.pos
+    assert len(snapshot) // 2 == at - endpointer.start and endpointer.silence() < 0.1
+    detect(pcm[at:at + RATE], endpointer) # The speaker went on (past the first pause)
+    endpointer.hint("what is the", at) # Describes words before that: ignored
+    assert endpointer.hint_hangover is None
+    endpointer.hint("what is the", endpointer.pos)
+    assert endpointer.current_hangover() == endpointer.max_hangover
+
+
+def test_features_and_adaptive_floor():
+    t = np.arange(320) / RATE
+    tone = (8000 * np.sin(2 * np.pi * 200 * t)).astype(np.int16)
+    energy, zcr = frame_features(tone)
+    assert energy == pytest.approx(20 * np.log10(8000 / 32768 / np.sqrt(2)), abs=0.1)
+    assert zcr == pytest.approx(400 / RATE, abs=0.005)
+    classifier = EnergyClassifier()
+    quiet = (tone // 200).astype(np.int16)
+    for _ in range(20):
+        assert not classifier.is_speech(quiet)
+    assert classifier.is_speech(tone)
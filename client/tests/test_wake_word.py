@@ -0,0 +1,77 @@
+import threading
+
+from stt_engine import FakeSTTEngine
+from wake_fixtures import COMMAND, ENROLL, RATE, WAKE, negatives, positives, recording
+from wake_word import WakeWordSpotter, load_spotter, write_wav
+from workers.voice_worker import VoiceWorker
+
+
+def error_rates(spotter, pos, neg):
+    false_rejects = sum(not spotter.detect(pcm)[0] for pcm, _, _ in pos)
+    false_accepts = sum(spotter.detect(pcm)[0] for pcm, _, _ in neg)
+    return false_rejects / len(pos), false_accepts / len(neg)
+
+
+def test_default_sensitivity_on_fixtures():
+    spotter = WakeWordSpotter(ENROLL)
+    fr, fa = error_rates(spotter, positives(), negatives())
+    assert fr <= 0.1 and fa <= 0.05 # Near misses ("sofia") are the ones that get through
+
+
+def test_sensitivity_trades_false_rejects_for_false_accepts():
+    spotter = WakeWordSpotter(ENROLL)
+    pos, neg = positives(), negatives()
+    rates = []
+    for sensitivity in (0.0, 0.5, 1.0):
+        spotter.set_sensitivity(sensitivity)
+        rates.append(error_rates(spotter, pos, neg))
+    assert [fr for fr, _ in rates] == sorted((fr for fr, _ in rates), reverse=True)
+    assert [fa for _, fa in rates] == sorted(fa for _, fa in rates)
+    assert rates[0][1] == 0 and rates[-1][0] == 0
+
+
+def test_command_tail_starts_between_wake_word_and_command():
+    spotter = WakeWordSpotter(ENROLL)
+    for tempo in (0.85, 1.0, 1.15):
+        pcm, _, _ = recording(WAKE + " _ " + COMMAND, f0=115, tempo=tempo, noise_db=-45, seed=7)
+        _, _, wake_end = recording(WAKE, f0=115, tempo=tempo, seed=7)
+        fired, _, tail = spotter.detect(pcm)
+        assert fired
+        assert wake_end - 0.03 <= tail / RATE <= wake_end + 0.08 / tempo # Before the word gap ends
+
+
+class LengthSTT(FakeSTTEngine):
+    """Transcrit la durée reçue: on voit ce qui a passé la porte"""
+
+    def __init__(self):
+        super().__init__()
+        self.seconds = []
+        self.done = threading.Event()
+
+    def transcribe(self, audio):
+        self.seconds.append(len(audio.frame_data) / 2 / RATE)
+        self.done.set()
+        return ""
+
+
+def test_passive_mode_only_sends_the_command_tail_to_stt(tmp_path):
+    for i, pcm in enumerate(ENROLL):
+        write_wav(str(tmp_path / f"wake_{i + 1}.wav"), pcm)
+    engine = LengthSTT()
+    worker = VoiceWorker(engine=engine, workers=1, spotter=load_spotter(str(tmp_path)))
+    woke = []
+    worker.wake_detected.connect(lambda: woke.append(True))
+    worker.passive = True
+
+    for pcm, _, _ in negatives()[4:8]: # Not the near misses
+        worker.on_utterance(pcm.tobytes())
+    assert worker.gated == 4 and not woke and engine.seconds == []
+
+    pcm, _, _ = recording(WAKE + " _ " + COMMAND, seed=3)
+    worker.on_utterance(pcm.tobytes())
+    assert woke and not worker.passive
+    assert engine.done.wait(5)
+    _, _, wake_end = recording(WAKE, seed=3)
+    assert abs(engine.seconds[0] - (len(pcm) / RATE - wake_end)) < 0.05 # The command, not "sonia"
+    assert worker.stats()["wake"]["wakes"] == 1
+    worker.stop()
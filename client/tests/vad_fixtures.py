@@ -0,0 +1,46 @@
+"""Enregistrements de synthèse pour la VAD: parole simulée (syllabes voisées + fricatives) sur bruit de fond.
+
+Each fixture is deterministic and comes with its ground truth: where speech
+starts and ends, in seconds. Words are separated by short gaps, phrases by
+longer pauses that must not end the utterance.
+"""
+import numpy as np
+
+RATE = 16000
+
+
+def _syllable(rng, seconds):
+    t = np.arange(int(seconds * RATE)) / RATE
+    f0 = rng.uniform(100, 220)
+    voiced = sum(np.sin(2 * np.pi * f0 * k * t) / k for k in range(1, 8))
+    envelope = np.hanning(len(t))
+    if rng.random() < 0.3: # Fricative onset ("s", "f"): noisy, high zero-crossing rate
+        hiss = rng.normal(0, 0.4, len(t)) * np.linspace(1, 0, len(t)) ** 4
+        voiced = voiced + hiss
+    return voiced * envelope * rng.uniform(0.15, 0.35)
+
+
+def speech(words, seed=0, word_gap=(0.03, 0.12), pauses=(), lead=0.8, trail=1.5, noise_db=-55):
+    """words: syllables per word; pauses: {word index: pause (s) after it}. -> (int16 PCM, start, end)"""
+    rng = np.random.default_rng(seed)
+    parts = [np.zeros(int(lead * RATE))]
+    for i, syllables in enumerate(words):
+        for _ in range(syllables):
+            parts.append(_syllable(rng, rng.uniform(0.12, 0.25)))
+        gap = dict(pauses).get(i, rng.uniform(*word_gap)) if i < len(words) - 1 else 0
+        parts.append(np.zeros(int(gap * RATE)))
+    body = np.concatenate(parts[1:])
+    parts.append(np.zeros(int(trail * RATE)))
+    signal = np.concatenate(parts)
+    signal += rng.normal(0, 10 ** (noise_db / 20), len(signal))
+    pcm = np.clip(signal * 32767, -32768, 32767).astype(np.int16)
+    return pcm, lead, lead + len(body) / RATE
+
+
+FIXTURES = {
+    "yes": lambda: speech([1], seed=1),
+    "command": lambda: speech([2, 1, 3, 2], seed=2),
+    "hesitant": lambda: speech([1, 2, 2, 1, 3], seed=3, pauses={1: 0.35, 3: 0.3}),
+    "long": lambda: speech([2, 3, 1, 2, 3, 2, 1, 2, 3, 2, 2, 1, 3, 2, 2, 3, 1, 2], seed=4, pauses={5: 0.25, 11: 0.25}),
+    "noisy": lambda: speech([2, 2, 3], seed=5, noise_db=-35),
+}
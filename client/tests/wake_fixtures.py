@@ -0,0 +1,100 @@
+"""Mots de synthèse pour le wake word: voyelles à formants, consonnes bruitées, variations de locuteur.
+
+Positives say "sonia" (optionally followed by a command), negatives are
+other words, including near misses ("sofia", "mania", "sunny"). The
+enrolled speaker's renditions vary in pitch, tempo and noise level; all of
+it is deterministic (seeded).
+"""
+import numpy as np
+
+RATE = 16000
+
+VOWELS = {"a": (750, 1250), "e": (450, 1900), "i": (300, 2300), "o": (500, 900), "u": (320, 800)}
+SONORANTS = {"n": (250, 1500), "m": (250, 1000), "l": (350, 1100), "r": (350, 1300), "w": (300, 700)}
+FRICATIVES = {"s": 4500, "f": 1800, "h": 1200}
+STOPS = "ptkbdg"
+
+
+def _resonance(freqs, center, bandwidth):
+    return 1.0 / (1.0 + ((freqs - center) / bandwidth) ** 2)
+
+
+def _voiced(f1, f2, f0, seconds, scale, rng, gain=1.0):
+    t = np.arange(int(seconds * RATE)) / RATE
+    f0_track = f0 * (1 + 0.03 * np.sin(2 * np.pi * rng.uniform(2, 5) * t)) # Slight vibrato
+    phase = 2 * np.pi * np.cumsum(f0_track) / RATE
+    out = np.zeros_like(t)
+    for k in range(1, int(4000 / f0)):
+        freq = k * f0
+        amp = _resonance(freq, f1 * scale, 90) + 0.6 * _resonance(freq, f2 * scale, 130) \
+            + 0.25 * _resonance(freq, 2600 * scale, 200)
+        out += amp * np.sin(k * phase)
+    envelope = np.minimum(1, np.minimum(np.arange(len(t)), np.arange(len(t))[::-1]) / (0.02 * RATE))
+    return gain * out * envelope
+
+
+def _noise(center, seconds, rng, gain):
+    n = int(seconds * RATE)
+    spectrum = np.fft.rfft(rng.normal(0, 1, n))
+    freqs = np.fft.rfftfreq(n, 1 / RATE)
+    shaped = np.fft.irfft(spectrum * _resonance(freqs, center, center / 3), n)
+    return gain * shaped / (np.abs(shaped).max() + 1e-9) * np.hanning(n)
+
+
+def word(phones, f0=120, tempo=1.0, scale=1.0, seed=0):
+    """phones: "s o n i a" -> PCM float (~±1)"""
+    rng = np.random.default_rng(seed)
+    parts = []
+    for phone in phones.split():
+        if phone in VOWELS:
+            parts.append(_voiced(*VOWELS[phone], f0, 0.16 / tempo, scale, rng))
+        elif phone in SONORANTS:
+            parts.append(_voiced(*SONORANTS[phone], f0, 0.07 / tempo, scale, rng, gain=0.4))
+        elif phone in FRICATIVES:
+            parts.append(_noise(FRICATIVES[phone] * scale, 0.11 / tempo, rng, 0.5))
+        elif phone in STOPS:
+            parts.append(np.zeros(int(0.04 / tempo * RATE)))
+            parts.append(_noise(3000, 0.03 / tempo, rng, 0.6))
+        else: # Word gap
+            parts.append(np.zeros(int(0.08 / tempo * RATE)))
+    pcm = np.concatenate(parts)
+    return 0.3 * pcm / (np.abs(pcm).max() + 1e-9)
+
+
+def recording(phones, noise_db=-50, lead=0.3, trail=0.3, seed=0, **voice):
+    """Mot(s) + silence autour + bruit de fond -> int16, (début, fin) de la parole en s"""
+    rng = np.random.default_rng(seed + 1000)
+    speech = word(phones, seed=seed, **voice)
+    signal = np.concatenate((np.zeros(int(lead * RATE)), speech, np.zeros(int(trail * RATE))))
+    signal += rng.normal(0, 10 ** (noise_db / 20), len(signal))
+    return np.clip(signal * 32767, -32768, 32767).astype(np.int16), lead, lead + len(speech) / RATE
+
+
+WAKE = "s o n i a"
+COMMAND = "o p e n _ n o t e p a d"
+# The enrolled user: three calm renditions
+ENROLL = [recording(WAKE, f0=120 * p, tempo=t, seed=i)[0] for i, (p, t) in enumerate(((1.0, 1.0), (1.04, 0.92), (0.97, 1.08)))]
+
+NEGATIVES = ["s o f i a", "m a n i a", "s u n i", "t a n i a", "h e l o", "o k e", "s o n", "n i a",
+             "o p e n _ n o t e p a d", "p l e i _ m u s i k", "w a t _ t a i m", "d i n e r _ i s _ r e d i",
+             "g u d _ m o n i n", "s e n d _ a _ m e s e d", "b o n i t a", "s i e n a"]
+
+
+def positives():
+    """Le locuteur enrôlé, dans des conditions variées (hauteur, débit, bruit), avec ou sans commande"""
+    out = []
+    for i in range(24):
+        rng = np.random.default_rng(100 + i)
+        phones = WAKE + (" _ " + COMMAND if i % 3 == 0 else "")
+        out.append(recording(phones, f0=120 * rng.uniform(0.9, 1.1), tempo=rng.uniform(0.85, 1.15),
+                             noise_db=rng.uniform(-55, -35), seed=100 + i))
+    return out
+
+
+def negatives():
+    out = []
+    for i, phones in enumerate(NEGATIVES * 2):
+        rng = np.random.default_rng(200 + i)
+        out.append(recording(phones.replace("_", " _ "), f0=120 * rng.uniform(0.9, 1.1),
+                             tempo=rng.uniform(0.85, 1.15), noise_db=rng.uniform(-55, -35), seed=200 + i))
+    return out
@@ -0,0 +1,205 @@
+import numpy as np
+
+SAMPLE_RATE = 16000
+FRAME_MS = 20
+FRAME = SAMPLE_RATE * FRAME_MS // 1000 # Samples per frame
+
+# Partial transcripts ending like this are unfinished: wait longer before ending the utterance
+CONTINUATIONS = {"and", "or", "but", "the", "a", "an", "to", "of", "in", "on", "for", "with", "my", "your",
+                 "is", "are", "then", "so", "because", "et", "ou", "le", "la", "les", "de", "du", "un", "une"}
+
+
+def frame_features(frame):
+    """(énergie dBFS, taux de passages par zéro) d'une trame int16"""
+    x = frame.astype(np.float32) / 32768.0
+    energy = 10 * np.log10(np.dot(x, x) / len(x) + 1e-10)
+    zcr = np.count_nonzero(np.diff(np.signbit(frame))) / len(frame)
+    return energy, zcr
+
+
+class EnergyClassifier:
+    """Parole / non-parole par trame: énergie au-dessus d'un plancher de bruit adaptatif + ZCR.
+
+    The noise floor follows quiet frames quickly downwards and drifts up
+    slowly, so a fan starting mid-session raises it without a calibration
+    step. Frames with a hiss-like zero-crossing rate need more energy.
+    """
+
+    name = "energy"
+
+    def __init__(self, margin_db=12.0, min_db=-55.0, hiss_zcr=0.45):
+        self.margin_db = margin_db
+        self.min_db = min_db
+        self.hiss_zcr = hiss_zcr
+        self.floor = None
+
+    def is_speech(self, frame):
+        energy, zcr = frame_features(frame)
+        if self.floor is None:
+            self.floor = energy
+        margin = self.margin_db + (10.0 if zcr > self.hiss_zcr else 0.0)
+        speech = energy > max(self.floor + margin, self.min_db)
+        if energy < self.floor:
+            self.floor = energy
+        elif not speech:
+            self.floor += 0.05 * (energy - self.floor)
+        else:
+            self.floor += 0.01 * (energy - self.floor) # Word gaps pull it back down; a steady noise wins
+        return speech
+
+
+class WebRTCClassifier:
+    """VAD à modèle (webrtcvad, GMM): plus robuste au bruit non stationnaire"""
+
+    name = "webrtc"
+
+    def __init__(self, aggressiveness=2, sample_rate=SAMPLE_RATE):
+        import webrtcvad # Only needed when this classifier is selected
+
+        self.vad = webrtcvad.Vad(aggressiveness)
+        self.sample_rate = sample_rate
+
+    def is_speech(self, frame):
+        return self.vad.is_speech(frame.tobytes(), self.sample_rate)
+
+
+CLASSIFIERS = {"energy": EnergyClassifier, "webrtc": WebRTCClassifier}
+
+
+def create_classifier(name="energy"):
+    if name not in CLASSIFIERS:
+        raise ValueError(f"Unknown VAD: {name} (available: {', '.join(CLASSIFIERS)})")
+    return CLASSIFIERS[name]()
+
+
+class Utterance:
+    """Une phrase détectée: PCM int16 (pré-roll compris) et instants en secondes de flux"""
+
+    def __init__(self, pcm, start, speech_end, end):
+        self.pcm = pcm
+        self.start = start           # First sample kept (pre-roll included)
+        self.speech_end = speech_end # End of the last speech frame
+        self.end = end               # When the endpoint was decided
+
+    @property
+    def endpoint_latency(self):
+        return self.end - self.speech_end
+
+
+class Endpointer:
+    """Découpe un flux micro en phrases, trame par trame, sur un ring buffer de taille fixe.
+
+    feed() returns events: ("start", None) at speech onset, ("end", Utterance)
+    when the trailing silence exceeds the hangover. The hangover adapts: it
+    grows with the pauses the speaker already made inside the utterance, and
+    hint() lets a partial transcript lengthen it (ends on a continuation word).
+    """
+
+    def __init__(self, classifier=None, sample_rate=SAMPLE_RATE, preroll_ms=300, onset_frames=3,
+                 hangover_ms=450, max_hangover_ms=900, max_utterance_s=15.0):
+        self.classifier = classifier or EnergyClassifier()
+        self.sample_rate = sample_rate
+        self.frame = sample_rate * FRAME_MS // 1000
+        self.preroll = sample_rate * preroll_ms // 1000
+        self.onset_frames = onset_frames
+        self.hangover = hangover_ms / 1000
+        self.max_hangover = max_hangover_ms / 1000
+        self.max_samples = int(max_utterance_s * sample_rate)
+        frames = -(-(self.max_samples + self.preroll) // self.frame) + 1
+        self.ring = np.zeros(frames * self.frame, dtype=np.int16) # Whole frames: a frame never wraps
+        self.pos = 0 # Absolute samples received
+        self.pending = np.zeros(0, dtype=np.int16) # Less than a frame, waiting for the rest
+        self.reset()
+
+    def reset(self):
+        self.in_speech = False
+        self.run = 0 # Consecutive speech frames (onset detection)
+        self.start = 0
+        self.last_speech = 0 # Absolute sample where the last speech frame ended
+        self.longest_pause = 0.0
+        self.hint_hangover = None
+
+    def hint(self, text, at=None):
+        """Transcription partielle de la phrase en cours: allonge l'attente si elle finit sur "and", "the"...
+
+        It never shortens the wait: a pause after a complete-looking partial
+        is often a hesitation, and the engines report no confidence to tell.
+
+        at: stream position (pos) of the audio the partial was made from. A
+        hint older than the last speech (the speaker went on, or a new
+        utterance started) is ignored.
+        """
+        if at is not None and (not self.in_speech or self.last_speech > at):
+            return
+        words = text.lower().split()
+        if words and words[-1].strip(",.;:") in CONTINUATIONS:
+            self.hint_hangover = self.max_hangover
+        else:
+            self.hint_hangover = None
+
+    def current_hangover(self):
+        if self.hint_hangover is not None:
+            return self.hint_hangover
+        return min(self.max_hangover, max(self.hangover, 1.5 * self.longest_pause))
+
+    def silence(self):
+        """Secondes sans parole depuis la dernière trame de parole (0 hors phrase)"""
+        return (self.pos - self.last_speech) / self.sample_rate if self.in_speech else 0.0
+
+    def snapshot(self):
+        """PCM de la phrase en cours jusqu'ici (pré-roll compris), pour une transcription partielle"""
+        return self._pcm(self.pos) if self.in_speech else b""
+
+    def feed(self, data):
+        """Octets PCM 16 bits mono du micro -> événements"""
+        samples = np.frombuffer(data, dtype=np.int16) if isinstance(data, (bytes, bytearray)) else data
+        if len(self.pending):
+            samples = np.concatenate((self.pending, samples))
+        usable = len(samples) - len(samples) % self.frame
+        self.pending = samples[usable:].copy()
+        events = []
+        for i in range(0, usable, self.frame):
+            event = self._frame(samples[i:i + self.frame])
+            if event:
+                events.append(event)
+        return events
+
+    def _frame(self, frame):
+        start = self.pos % len(self.ring)
+        self.ring[start:start + len(frame)] = frame
+        self.pos += len(frame)
+        speech = self.classifier.is_speech(frame)
+
+        if not self.in_speech:
+            self.run = self.run + 1 if speech else 0
+            if self.run >= self.onset_frames:
+                self.in_speech = True
+                onset = self.pos - self.run * self.frame
+                self.start = max(0, onset - self.preroll, self.pos - len(self.ring) + self.frame)
+                self.last_speech = self.pos
+                return ("start", None)
+            return None
+
+        if speech:
+            pause = (self.pos - self.frame - self.last_speech) / self.sample_rate
+            if pause > 0:
+                self.longest_pause = max(self.longest_pause, pause)
+                self.hint_hangover = None # The hint described the words before this pause
+            self.last_speech = self.pos
+        silence = (self.pos - self.last_speech) / self.sample_rate
+        if silence >= self.current_hangover() or self.pos - self.start >= self.max_samples:
+            return ("end", self._cut())
+        return None
+
+    def _pcm(self, keep):
+        first = self.start % len(self.ring)
+        idx = (first + np.arange(keep - self.start)) % len(self.ring)
+        return self.ring[idx].tobytes()
+
+    def _cut(self):
+        end = self.pos
+        keep = min(end, self.last_speech + self.frame * 2) # A little trailing silence, not the whole hangover
+        rate = self.sample_rate
+        utterance = Utterance(self._pcm(keep), self.start / rate, self.last_speech / rate, end / rate)
+        self.reset()
+        return utterance
@@ -0,0 +1,185 @@
+"""Wake word local: MFCC + DTW contre quelques enregistrements du mot ("sonia").
+
+Passive mode used to send every utterance to the cloud STT and look for
+"sonia" in the text. The spotter runs on the utterance PCM from the
+Endpointer instead: only phrases that contain the wake word reach STT, and
+only the part after it (the command tail).
+
+Templates are a few recordings of the user saying the wake word, made with
+`python client/wake_word.py enroll`. No model, no training: subsequence DTW
+finds the best match of each template anywhere in the utterance.
+
+Usage: python client/wake_word.py enroll [count]
+"""
+import glob
+import os
+import sys
+import wave
+
+import numpy as np
+
+from vad import SAMPLE_RATE
+
+WAKE_DIR = os.getenv("SONIA_WAKE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "wake_word"))
+# 0 = strict (few false wakes, may miss), 1 = lenient
+SENSITIVITY = float(os.getenv("SONIA_WAKE_SENSITIVITY", "0.5"))
+
+WIN = SAMPLE_RATE * 25 // 1000 # 25 ms analysis window
+HOP = SAMPLE_RATE * 10 // 1000 # 10 ms step
+NFFT = 512
+N_MELS = 26
+N_MFCC = 13
+RANGE_DB = 20 # Mel bands are floored this far below the loudest one: noise and quiet detail look the same
+TRIM_DB = 17 # Template frames kept: within this of the loudest frame (drops the silence around the word)
+
+
+def _mel(hz):
+    return 2595 * np.log10(1 + hz / 700)
+
+
+def _filterbank(sample_rate=SAMPLE_RATE, n_mels=N_MELS, nfft=NFFT, low=80, high=7600):
+    edges = 700 * (10 ** (np.linspace(_mel(low), _mel(high), n_mels + 2) / 2595) - 1)
+    freqs = np.fft.rfftfreq(nfft, 1 / sample_rate)
+    left, center, right = edges[:-2, None], edges[1:-1, None], edges[2:, None]
+    return np.maximum(0, np.minimum((freqs - left) / (center - left), (right - freqs) / (right - center)))
+
+
+FILTERS = _filterbank()
+# DCT-II, coefficients 1..N_MFCC (c0 is loudness: dropped)
+DCT = np.cos(np.pi / N_MELS * (np.arange(N_MELS)[None, :] + 0.5) * np.arange(1, N_MFCC + 1)[:, None])
+WINDOW = np.hamming(WIN)
+
+
+def mfcc(pcm):
+    """PCM int16 -> (MFCC (trames, N_MFCC), énergie log par trame)
+
+    Stationary noise is subtracted per mel band (twice the 10th percentile:
+    the Endpointer's pre-roll guarantees some non-speech frames), then the
+    bands are floored RANGE_DB below the maximum, so a quiet enrollment and
+    a noisy room give comparable features.
+    """
+    x = pcm.astype(np.float32) / 32768.0
+    if len(x) < WIN:
+        x = np.pad(x, (0, WIN - len(x)))
+    n = 1 + (len(x) - WIN) // HOP
+    frames = np.lib.stride_tricks.as_strided(x, (n, WIN), (x.strides[0] * HOP, x.strides[0])) * WINDOW
+    power = (np.abs(np.fft.rfft(frames, NFFT)) ** 2) @ FILTERS.T
+    energy = np.log(power + 1e-8).mean(axis=1)
+    power = np.maximum(power - 2 * np.percentile(power, 10, axis=0), 0)
+    mel = np.log(power + power.max() * 10 ** (-RANGE_DB / 10) + 1e-10)
+    return (mel @ DCT.T).astype(np.float32), energy
+
+
+def subsequence_dtw(template, query):
+    """Meilleur alignement du gabarit entier sur une portion de la requête -> (distance moyenne, trame de fin)
+
+    Steps: diagonal, template-only (query faster) and skip one query frame
+    (query up to twice as slow). Every path has one step per template
+    frame, so each row is a vectorised min over the previous row.
+    """
+    cost = (template * template).sum(1)[:, None] + (query * query).sum(1)[None, :] - 2 * template @ query.T
+    cost = np.sqrt(np.maximum(cost, 0))
+    row = cost[0].copy() # Free start anywhere in the query
+    inf = np.full(2, np.inf, dtype=row.dtype)
+    for i in range(1, len(template)):
+        best = np.minimum(row, np.concatenate((inf[:1], row[:-1])))
+        best = np.minimum(best, np.concatenate((inf, row[:-2])))
+        row = cost[i] + best
+    end = int(np.argmin(row))
+    return float(row[end]) / len(template), end
+
+
+def template_features(pcm):
+    """MFCC d'un enregistrement du mot, sans le silence autour"""
+    features, energy = mfcc(pcm)
+    keep = np.nonzero(energy > energy.max() - TRIM_DB / 10 * np.log(10))[0]
+    return features[keep[0]:keep[-1] + 1]
+
+
+class WakeWordSpotter:
+    """Détecte le mot d'éveil dans une phrase, et où il se termine.
+
+    The threshold is calibrated on the templates themselves: the mean DTW
+    distance between two renditions of the word is what "same word, same
+    speaker" looks like. sensitivity scales it from 0.5x (strict) to 1.5x
+    (lenient).
+    """
+
+    def __init__(self, templates, sensitivity=SENSITIVITY):
+        if len(templates) < 2:
+            raise ValueError("Need at least 2 wake word recordings to calibrate the spotter")
+        self.templates = [template_features(t) for t in templates]
+        pairs = [subsequence_dtw(a, b)[0] for i, a in enumerate(self.templates)
+                 for j, b in enumerate(self.templates) if i != j]
+        self.reference = float(np.mean(pairs))
+        self.set_sensitivity(sensitivity)
+
+    def set_sensitivity(self, sensitivity):
+        self.sensitivity = min(1.0, max(0.0, sensitivity))
+        self.threshold = self.reference * (0.5 + self.sensitivity)
+
+    def score(self, pcm):
+        """-> (distance au gabarit le plus proche, échantillon où le mot se termine)"""
+        query, _ = mfcc(pcm)
+        distance, end = min(subsequence_dtw(t, query) for t in self.templates)
+        return distance, min(len(pcm), end * HOP + WIN)
+
+    def detect(self, pcm):
+        """PCM int16 d'une phrase -> (déclenché, distance, début de la commande en échantillons)"""
+        distance, tail = self.score(pcm)
+        return distance <= self.threshold, distance, tail
+
+
+def read_wav(path):
+    with wave.open(path, "rb") as f:
+        if f.getframerate() != SAMPLE_RATE or f.getnchannels() != 1 or f.getsampwidth() != 2:
+            raise ValueError(f"{path}: expected 16 kHz mono 16-bit")
+        return np.frombuffer(f.readframes(f.getnframes()), dtype=np.int16)
+
+
+def write_wav(path, pcm):
+    with wave.open(path, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(SAMPLE_RATE)
+        f.writeframes(pcm.tobytes())
+
+
+def load_spotter(directory=WAKE_DIR, sensitivity=SENSITIVITY):
+    """Spotter sur les enregistrements du dossier, ou None (pas d'enrôlement: STT sur tout, comme avant)"""
+    paths = sorted(glob.glob(os.path.join(directory, "*.wav")))
+    if len(paths) < 2:
+        print(f"[Wake] No wake word recordings in {directory}: passive mode transcribes everything "
+              f"(run `python client/wake_word.py enroll`)")
+        return None
+    spotter = WakeWordSpotter([read_wav(p) for p in paths], sensitivity)
+    print(f"[Wake] Local wake word spotter: {len(paths)} templates, threshold {spotter.threshold:.2f}")
+    return spotter
+
+
+def enroll(count=3, directory=WAKE_DIR):
+    """Enregistre le mot d'éveil `count` fois au micro (une phrase par prise, découpée par le VAD)"""
+    import speech_recognition as sr # Only needed to record
+
+    from vad import FRAME, Endpointer
+
+    os.makedirs(directory, exist_ok=True)
+    endpointer = Endpointer()
+    with sr.Microphone(sample_rate=SAMPLE_RATE, chunk_size=FRAME) as source:
+        for i in range(count):
+            print(f"[Wake] ({i + 1}/{count}) Say the wake word...")
+            utterance = None
+            while utterance is None:
+                for kind, event in endpointer.feed(source.stream.read(source.CHUNK)):
+                    if kind == "end":
+                        utterance = event
+            path = os.path.join(directory, f"wake_{i + 1}.wav")
+            write_wav(path, np.frombuffer(utterance.pcm, dtype=np.int16))
+            print(f"[Wake] Saved {path} ({utterance.speech_end - utterance.start:.2f}s)")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] != "enroll":
+        print(__doc__.strip().splitlines()[-1])
+        sys.exit(1)
+    enroll(int(sys.argv[2]) if len(sys.argv) > 2 else 3)
@@ -1,56 +1,242 @@
 from PyQt6.QtCore import QThread, pyqtSignal
+import json
+import threading
+import time
+import uuid
 import requests
+from requests.adapters import HTTPAdapter
+from websockets.exceptions import ConnectionClosed
+from websockets.sync.client import connect
 
 SERVER_URL = "http://localhost:8000"
+WS_URL = "ws://localhost:8000/ws"
+CONNECT_TIMEOUT = 3.0
+READ_TIMEOUT = 60.0 # Silence from the server for this long: the request fails instead of hanging the worker
+EXECUTE_TIMEOUT = 120.0 # Open Interpreter fallback can take a while
+CANCEL_GRACE = 1.0 # After a cancel, how long to wait for the server's done frame before moving on
+
+
+class Request:
+    """Une requête au serveur: /chat (WebSocket) ou /execute (HTTP)"""
+
+    def __init__(self, query, endpoint="/chat", session_id=None, speculative=False):
+        self.query = query
+        self.endpoint = endpoint
+        self.session_id = session_id # Conversation id: the server keeps the turn history
+        self.speculative = speculative # Started on a partial transcript: frames held until commit()
+        self.id = None # Wire id of the chat frame sent (a resend after a reconnect gets a new one)
+        self.sent = False
+        self.streamed = False # Frames came back: never resent silently
+        self.cancelled = False
+        self.held = []
+
 
 class APIWorker(QThread):
+    """Un seul thread, connexions persistantes, une requête à la fois; la plus récente remplace les autres.
+
+    submit() never blocks the UI: a query still waiting is replaced, the one
+    in flight is cancelled (the server stops generating, its late frames are
+    dropped). Chat goes over one long-lived /ws connection, /execute over a
+    pooled keep-alive HTTP session.
+    """
+
     token_received = pyqtSignal(str)
+    sentence_ended = pyqtSignal() # The text received so far ends a sentence
     response_complete = pyqtSignal(str)
     error_occurred = pyqtSignal(str)
-    
+    frame_ready = pyqtSignal(object, object, object) # (request, signal, args) -> _deliver, in the UI thread
+
     def __init__(self):
         super().__init__()
-        self.query = None
-        self.endpoint = "/chat" # /chat or /execute
-    
-    def set_query(self, query, endpoint="/chat"):
-        self.query = query
-        self.endpoint = endpoint
-        
+        self.frame_ready.connect(self._deliver)
+        self.ws = None # Persistent /ws connection, reused by every chat query
+        self.http = requests.Session()
+        self.http.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=2))
+        self.lock = threading.Condition()
+        self.current = None # Request in flight
+        self.pending = None # Next request (superseded by any newer one)
+        self.unconfirmed = None # Speculative request already answered, waiting for commit() or cancel()
+        self.running = True
+        self.superseded = 0
+
+    def _latest(self):
+        return self.pending or self.current or self.unconfirmed
+
+    @property
+    def speculative(self):
+        request = self._latest()
+        return bool(request and request.speculative and not request.cancelled)
+
+    def submit(self, query, endpoint="/chat", session_id=None, speculative=False):
+        """Nouvelle requête (thread UI): remplace celle en attente, annule celle en cours"""
+        request = Request(query, endpoint, session_id, speculative)
+        with self.lock:
+            for stale in (self.pending, self.current):
+                if stale and not stale.cancelled:
+                    self.superseded += 1
+            self._cancel(self.current)
+            self._cancel(self.unconfirmed)
+            self.unconfirmed = None
+            self.pending = request
+            self.lock.notify()
+        return request
+
+    def cancel(self):
+        """Annule la réponse en cours et celle en attente (appelable depuis le thread UI)"""
+        with self.lock:
+            self.pending = None
+            self._cancel(self.current)
+            self._cancel(self.unconfirmed)
+            self.unconfirmed = None
+
+    def _cancel(self, request):
+        if request is None or request.cancelled:
+            return
+        request.cancelled = True # Frames still in flight (or queued for the UI thread) are dropped
+        request.held = [] # A wrong guess is never heard
+        if request.sent:
+            self._send({"type": "cancel", "id": request.id}) # Speculative turn dropped too, even if done
+
+    def commit(self):
+        """La transcription finale confirme la requête anticipée: on relâche ce qui est arrivé, puis le direct"""
+        with self.lock:
+            request = self._latest()
+            if not request or not request.speculative or request.cancelled:
+                return
+            self.unconfirmed = None
+            request.speculative = False # Not sent yet: it simply goes out as a normal query
+            held, request.held = request.held, []
+            for signal, args in held:
+                signal.emit(*args)
+            if request.sent:
+                self._send({"type": "commit", "id": request.id})
+
+    def _send(self, message):
+        if self.ws:
+            try:
+                self.ws.send(json.dumps(message))
+            except Exception:
+                pass
+
+    def _emit(self, request, signal, *args):
+        self.frame_ready.emit(request, signal, args)
+
+    def _deliver(self, request, signal, args):
+        """Thread UI: ce qui arrive d'une requête annulée entre-temps est jeté, une spéculation attend commit()"""
+        if request.cancelled:
+            return
+        if request.speculative:
+            request.held.append((signal, args))
+        else:
+            signal.emit(*args)
+
     def run(self):
-        if not self.query: return
-        
-        try:
-            if self.endpoint == "/chat":
-                # Streaming Response
-                full_resp = ""
-                import time
-                start_req = time.time()
-                first_token = True
-                
-                with requests.post(f"{SERVER_URL}/chat", json={"query": self.query}, stream=True) as r:
-                    if r.status_code == 200:
-                        for chunk in r.iter_content(chunk_size=None, decode_unicode=True):
-                            if chunk:
-                                if first_token:
-                                    ttft = time.time() - start_req
-                                    print(f"⏱️ TTFT (Server): {ttft:.2f}s")
-                                    first_token = False
-                                
-                                self.token_received.emit(chunk)
-                                full_resp += chunk
-                        self.response_complete.emit(full_resp)
-                    else:
-                        self.error_occurred.emit(f"Server Error: {r.status_code}")
-            
-            elif self.endpoint == "/execute":
-                 # Execution (Blocking)
-                 r = requests.post(f"{SERVER_URL}/execute", json={"command": self.query})
-                 if r.status_code == 200:
-                     data = r.json()
-                     self.response_complete.emit(data.get("summary", "Done"))
-                 else:
-                     self.error_occurred.emit(f"Exec Error: {r.status_code}")
-                     
-        except Exception as e:
-            self.error_occurred.emit(str(e))
+        while True:
+            with self.lock:
+                while self.running and self.pending is None:
+                    self.lock.wait()
+                if not self.running:
+                    break
+                request, self.pending = self.pending, None
+                self.current = request
+            try:
+                self.process(request)
+            except Exception as e:
+                self._emit(request, self.error_occurred, str(e))
+            finally:
+                with self.lock:
+                    self.current = None
+                    if request.speculative and not request.cancelled:
+                        self.unconfirmed = request
+
+    def process(self, request):
+        if request.endpoint == "/chat":
+            self._chat(request)
+        elif request.endpoint == "/execute":
+            self._execute(request)
+
+    def _execute(self, request):
+        """Commande système: pas annulable côté serveur (effets de bord), le résultat d'une requête annulée est ignoré"""
+        r = self.http.post(f"{SERVER_URL}/execute", json={"command": request.query},
+                           timeout=(CONNECT_TIMEOUT, EXECUTE_TIMEOUT))
+        if r.status_code == 200:
+            self._emit(request, self.response_complete, r.json().get("summary", "Done"))
+        else:
+            self._emit(request, self.error_occurred, f"Exec Error: {r.status_code}")
+
+    def _chat(self, request):
+        """Envoie la requête sur le WebSocket et relaie les frames typées"""
+        for attempt in range(2):
+            if self.ws is None:
+                self.ws = connect(WS_URL, open_timeout=CONNECT_TIMEOUT, compression=None)
+            try:
+                self._chat_once(request)
+                return
+            except TimeoutError:
+                raise
+            except (ConnectionClosed, OSError):
+                self.ws = None
+                if attempt or request.streamed:
+                    raise
+                # Stale connection (server restarted), nothing received yet: reconnect once and resend
+
+    def _chat_once(self, request):
+        full_resp = ""
+        start_req = time.time()
+        first_token = True
+        with self.lock: # A commit or cancel from the UI thread goes out after this frame, never before
+            if request.cancelled:
+                return
+            request.id = uuid.uuid4().hex
+            request.sent = True
+            self.ws.send(json.dumps({"type": "chat", "id": request.id, "query": request.query,
+                                     "session_id": request.session_id, "speculative": request.speculative}))
+        last_frame = time.monotonic()
+        while True:
+            try:
+                raw = self.ws.recv(timeout=CANCEL_GRACE) # Wakes up to notice a cancel the server ignores
+            except TimeoutError:
+                if request.cancelled:
+                    return # Its late frames, if any, are skipped by id
+                if time.monotonic() - last_frame < READ_TIMEOUT:
+                    continue
+                self.ws.close()
+                self.ws = None
+                raise TimeoutError(f"No answer from the server for {READ_TIMEOUT:.0f}s")
+            last_frame = time.monotonic()
+            frame = json.loads(raw)
+            if frame.get("id") != request.id:
+                continue # Late frames of a cancelled request
+            request.streamed = True
+            kind = frame.get("type")
+            if request.cancelled and kind in ("token", "sentence_end"):
+                continue # Waiting for the server's done frame
+            if kind == "token":
+                if first_token:
+                    ttft = time.time() - start_req
+                    print(f"⏱️ TTFT (Server): {ttft:.2f}s")
+                    first_token = False
+                self._emit(request, self.token_received, frame["text"])
+                full_resp += frame["text"]
+            elif kind == "sentence_end":
+                self._emit(request, self.sentence_ended)
+            elif kind == "error":
+                # Reported, never spoken as if it were the answer
+                self._emit(request, self.error_occurred, frame.get("message", "Unknown error"))
+                return
+            elif kind == "done":
+                timings = frame.get("timings") or {}
+                print(f"[API] Done in {timings.get('total_ms')} ms (model {timings.get('model')}, cached {timings.get('cached')})")
+                if not frame.get("cancelled"):
+                    self._emit(request, self.response_complete, full_resp)
+                return
+
+    def stop(self):
+        with self.lock:
+            self.running = False
+            self._cancel(self.current)
+            self.lock.notify()
+        self.wait(2000)
+        self.http.close()
+        if self.ws:
+            self.ws.close()
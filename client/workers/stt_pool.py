@@ -0,0 +1,141 @@
+import threading
+import time
+from collections import deque
+from queue import Empty, Full, Queue
+
+from metrics import latency_stats
+
+
+class STTPool:
+    """Workers STT: la capture dépose les phrases sans attendre, les textes sortent dans l'ordre de capture.
+
+    The queue is bounded: when recognition falls that far behind, the oldest
+    utterance is dropped (stale commands are worse than none).
+
+    Partial transcripts (the utterance still being spoken) go through their
+    own threads and a single slot: a newer snapshot replaces one not started
+    yet, a partial is only reported before its utterance's final transcript,
+    and never after a newer one.
+    """
+
+    def __init__(self, engine, on_text, workers=2, max_pending=8, on_partial=None, partial_workers=2):
+        self.engine = engine
+        self.on_text = on_text
+        self.on_partial = on_partial
+        self.queue = Queue(maxsize=max_pending)
+        self.lock = threading.Lock()
+        self.next_seq = 0 # Sequence number of the next captured utterance
+        self.emit_seq = 0 # Next one to hand to on_text (transcripts finish out of order)
+        self.finished = {} # seq -> text, waiting for the earlier ones
+        # Metrics (s): end of capture -> transcript, and engine time alone; queue depth at submit
+        self.latencies = deque(maxlen=200)
+        self.stt_times = deque(maxlen=200)
+        self.depths = deque(maxlen=200)
+        self.dropped = 0
+        self.partial_times = deque(maxlen=200)
+        self.partial = None # (seq, n, audio, tag): latest snapshot waiting for a partial thread
+        self.partial_count = 0 # Snapshots submitted (n)
+        self.partial_shown = 0 # n of the last one reported
+        self.partial_ready = threading.Condition(self.lock)
+        self.running = True
+        self.threads = [threading.Thread(target=self._worker, daemon=True) for _ in range(workers)]
+        if on_partial: # Two, so a snapshot taken at a pause doesn't wait behind a periodic one
+            self.threads += [threading.Thread(target=self._partial_worker, daemon=True) for _ in range(partial_workers)]
+        for thread in self.threads:
+            thread.start()
+
+    def submit(self, audio):
+        """Appelé par le thread de capture: ne bloque jamais"""
+        with self.lock:
+            seq = self.next_seq
+            self.next_seq += 1
+            self.depths.append(self.queue.qsize())
+        item = (seq, audio, time.perf_counter())
+        while True:
+            try:
+                self.queue.put_nowait(item)
+                return
+            except Full:
+                try:
+                    old_seq, _, _ = self.queue.get_nowait()
+                except Empty:
+                    continue
+                print(f"[STT] Queue full, dropping utterance #{old_seq}")
+                with self.lock:
+                    self.dropped += 1
+                self._finish(old_seq, "")
+
+    def submit_partial(self, audio, tag=None):
+        """Instantané de la phrase en cours (thread de capture, ne bloque jamais). tag revient avec le texte."""
+        with self.lock:
+            self.partial_count += 1
+            self.partial = (self.next_seq, self.partial_count, audio, tag) # seq: the one the final will get
+            self.partial_ready.notify()
+
+    def _partial_worker(self):
+        while True:
+            with self.lock:
+                while self.running and self.partial is None:
+                    self.partial_ready.wait()
+                if not self.running:
+                    break
+                seq, n, audio, tag = self.partial
+                self.partial = None
+            start = time.perf_counter()
+            try:
+                text = self.engine.transcribe(audio)
+            except Exception as e:
+                print(f"[STT] {self.engine.name} partial error: {e}")
+                continue
+            self.partial_times.append(time.perf_counter() - start)
+            with self.lock: # Same lock as finals: a partial never overtakes its own final
+                if text and seq >= self.emit_seq and n > self.partial_shown:
+                    self.partial_shown = n
+                    self.on_partial(text, tag)
+
+    def _worker(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                break
+            seq, audio, captured_at = item
+            start = time.perf_counter()
+            try:
+                text = self.engine.transcribe(audio)
+            except Exception as e:
+                print(f"[STT] {self.engine.name} error: {e}")
+                text = ""
+            end = time.perf_counter()
+            self.stt_times.append(end - start)
+            self.latencies.append(end - captured_at)
+            if text:
+                print(f"⏱️ STT Duration: {end - start:.2f}s (waited {start - captured_at:.2f}s) | Text: {text}")
+            self._finish(seq, text)
+
+    def _finish(self, seq, text):
+        with self.lock: # Held while emitting: transcripts leave strictly in capture order
+            self.finished[seq] = text
+            while self.emit_seq in self.finished:
+                text = self.finished.pop(self.emit_seq)
+                self.emit_seq += 1
+                if text:
+                    self.on_text(text)
+
+    def stats(self):
+        with self.lock:
+            depths = list(self.depths)
+            dropped = self.dropped
+        return {
+            "engine": self.engine.name,
+            "latency": latency_stats(self.latencies),
+            "stt": latency_stats(self.stt_times),
+            "queue": {"depth": self.queue.qsize(), "max": max(depths, default=0), "dropped": dropped},
+            "partial": latency_stats(self.partial_times),
+        }
+
+    def stop(self):
+        with self.lock:
+            self.running = False
+            self.partial_ready.notify_all()
+        for _ in self.threads:
+            self.queue.put(None)
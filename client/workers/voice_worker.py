@@ -1,37 +1,125 @@
 from PyQt6.QtCore import QThread, pyqtSignal
+import os
+import time
+from collections import deque
+import numpy as np
 import speech_recognition as sr
+from metrics import latency_stats
+from stt_engine import create_engine
+from vad import FRAME, SAMPLE_RATE, Endpointer, create_classifier
+from wake_word import load_spotter
+from workers.stt_pool import STTPool
+
+# google (cloud), whisper (local faster-whisper, offline) or fake (tests)
+STT_ENGINE = os.getenv("SONIA_STT_ENGINE", "google")
+STT_WORKERS = int(os.getenv("SONIA_STT_WORKERS", "2"))
+# Frame classifier: energy (NumPy energy + zero-crossing features) or webrtc (model, needs webrtcvad)
+VAD = os.getenv("SONIA_VAD", "energy")
+# Partial transcripts while speaking: every N ms of speech (0 = off; each one is an STT call).
+# Unset: on with a local engine, off with a cloud one (every partial would be one more round trip)
+PARTIAL_MS = os.getenv("SONIA_STT_PARTIAL_MS")
+LOCAL_PARTIAL_MS = 400
+PAUSE_MS = 150 # Silence after which the partial is "settled": it covers everything said so far
+MIN_TAIL = SAMPLE_RATE * 3 // 10 # Shorter than 0.3 s after the wake word: no command, just the wake
 
 class VoiceWorker(QThread):
     voice_detected = pyqtSignal(str)
-    
-    def __init__(self):
+    speech_started = pyqtSignal() # Energy onset of a phrase, before any STT (barge-in)
+    wake_detected = pyqtSignal() # Local spotter heard the wake word (passive mode)
+    partial_detected = pyqtSignal(str, bool) # Hypothesis for the phrase being spoken, settled (speaker paused)
+
+    def __init__(self, engine=None, workers=STT_WORKERS, spotter=None, partial_ms=None):
         super().__init__()
         self.running = True
-        self.recognizer = sr.Recognizer()
-        # Configuration Audio (Ultra-Fast / Aggressive)
-        self.recognizer.energy_threshold = 280 # Slightly more sensitive
-        self.recognizer.dynamic_energy_threshold = True
-        self.recognizer.pause_threshold = 0.4 # 0.2s is too risky (cuts words), 0.4s is the "Alexa" sweet spot
-        self.recognizer.phrase_threshold = 0.2
-        self.recognizer.non_speaking_duration = 0.2 # Instant cut after silence
-    
+        # Endpointing on 20 ms frames: 300 ms pre-roll, adaptive end of phrase, no 5 s cut
+        self.endpointer = Endpointer(create_classifier(VAD))
+        self.endpoint_latencies = deque(maxlen=200) # Last speech frame -> utterance handed to STT (s)
+        # Recognition runs in its own threads: the mic keeps listening during STT round trips
+        self.engine = engine or create_engine(STT_ENGINE)
+        if partial_ms is None:
+            partial_ms = int(PARTIAL_MS) if PARTIAL_MS else LOCAL_PARTIAL_MS if self.engine.local else 0
+        self.stt = STTPool(self.engine, self.voice_detected.emit, workers=workers,
+                           on_partial=self.on_partial if partial_ms else None)
+        self.partial_every = SAMPLE_RATE * partial_ms // 1000
+        self.partial_at = 0 # Endpointer position of the last partial snapshot
+        self.settled_sent = False # One settled partial per pause
+        # Passive mode (no conversation): only utterances with the wake word go to STT.
+        # No enrolled templates (or spotter=False) -> no spotter: everything is transcribed, the app checks the text
+        self.spotter = load_spotter() if spotter is None else spotter
+        self.passive = False
+        self.gated = 0 # Utterances the spotter kept away from STT
+        self.wakes = 0
+        self.spot_times = deque(maxlen=200)
+
     def run(self):
-        with sr.Microphone() as source:
-            print("🎤 Microphone initialized")
+        """Thread de capture: trames micro -> VAD -> phrases confiées au pool STT, sans jamais attendre"""
+        with sr.Microphone(sample_rate=SAMPLE_RATE, chunk_size=FRAME) as source:
+            print(f"🎤 Microphone initialized (VAD: {self.endpointer.classifier.name}, STT: {self.engine.name})")
             while self.running:
                 try:
-                    # print("DEBUG: Listening...")
-                    audio = self.recognizer.listen(source, timeout=1, phrase_time_limit=5)
-                    # Whisper local ou Google
-                    import time
-                    start_stt = time.time()
-                    text = self.recognizer.recognize_google(audio, language="en-US")
-                    end_stt = time.time()
-                    if text:
-                        print(f"⏱️ STT Duration: {end_stt - start_stt:.2f}s | Text: {text}")
-                        self.voice_detected.emit(text)
-                except:
-                    pass
-    
+                    data = source.stream.read(source.CHUNK)
+                except OSError as e:
+                    print(f"[Voice] Capture error: {e}")
+                    continue
+                self.process(data)
+
+    def process(self, data):
+        """Un bloc micro: VAD, phrases terminées vers le STT, partiels de la phrase en cours"""
+        for kind, utterance in self.endpointer.feed(data):
+            if kind == "start":
+                self.partial_at = self.endpointer.pos
+                self.speech_started.emit()
+            else:
+                self.endpoint_latencies.append(utterance.endpoint_latency)
+                self.on_utterance(utterance.pcm)
+        self.maybe_partial()
+
+    def maybe_partial(self):
+        """Instantané de la phrase en cours vers le STT: à intervalle régulier, et une fois par pause"""
+        ep = self.endpointer
+        if not self.partial_every or self.passive or not ep.in_speech:
+            return
+        silence = ep.silence()
+        settled = silence >= PAUSE_MS / 1000
+        if not settled:
+            self.settled_sent = False
+        if settled and not self.settled_sent:
+            self.settled_sent = True
+        elif ep.pos - self.partial_at < self.partial_every or settled:
+            return
+        self.partial_at = ep.pos
+        self.stt.submit_partial(sr.AudioData(ep.snapshot(), SAMPLE_RATE, 2), (ep.pos, settled))
+
+    def on_partial(self, text, tag):
+        """Thread STT partiel: la fin de phrase s'ajuste au texte, l'app peut anticiper la requête"""
+        at, settled = tag
+        self.endpointer.hint(text, at) # Only lengthens the wait (phrase ending on "and", "the"...)
+        self.partial_detected.emit(text, settled)
+
+    def on_utterance(self, pcm):
+        """Phrase terminée -> STT, sauf en mode passif sans le mot d'éveil (alors seule la suite est transcrite)"""
+        if self.passive and self.spotter:
+            start = time.perf_counter()
+            fired, distance, tail = self.spotter.detect(np.frombuffer(pcm, dtype=np.int16))
+            self.spot_times.append(time.perf_counter() - start)
+            if not fired:
+                self.gated += 1
+                return
+            print(f"[Wake] Wake word (distance {distance:.2f} <= {self.spotter.threshold:.2f})")
+            self.wakes += 1
+            self.passive = False # The app confirms through wake_detected; don't gate the next phrase meanwhile
+            self.wake_detected.emit()
+            pcm = pcm[tail * 2:]
+            if len(pcm) < MIN_TAIL * 2:
+                return
+        self.stt.submit(sr.AudioData(pcm, SAMPLE_RATE, 2))
+
+    def stats(self):
+        stats = {**self.stt.stats(), "endpoint": latency_stats(self.endpoint_latencies)}
+        if self.spotter:
+            stats["wake"] = {"wakes": self.wakes, "gated": self.gated, "spotter": latency_stats(self.spot_times)}
+        return stats
+
     def stop(self):
         self.running = False
+        self.stt.stop()
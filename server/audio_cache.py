@@ -0,0 +1,111 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+
+def audio_key(text, voice, rate, engine="edge"):
+    """Adresse de contenu: même texte + voix + débit (+ moteur) = même audio"""
+    raw = "\0".join((engine, voice, rate, " ".join(text.split())))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class AudioCache:
+    """Cache audio adressé par contenu: LRU mémoire + fichiers disque (LRU borné en taille)"""
+
+    def __init__(self, directory="cache/audio", max_memory_bytes=32 * 1024 * 1024, max_disk_bytes=256 * 1024 * 1024):
+        self.directory = directory
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self.memory = OrderedDict() # file name -> bytes; order = LRU (oldest first)
+        self.memory_bytes = 0
+        self.disk = OrderedDict()   # file name -> size, oldest access first
+        self.disk_bytes = 0
+        self.lock = threading.Lock()
+        self.hits = {"memory": 0, "disk": 0}
+        self.misses = 0
+
+        os.makedirs(directory, exist_ok=True)
+        files = []
+        for entry in os.scandir(directory):
+            if entry.is_file() and not entry.name.endswith(".tmp"):
+                stat = entry.stat()
+                files.append((stat.st_mtime, entry.name, stat.st_size))
+        for _, name, size in sorted(files): # mtime = last access (touched on hits)
+            self.disk[name] = size
+            self.disk_bytes += size
+
+    def get(self, key, extension):
+        """Audio en cache ou None. Disque: lecture bloquante, à appeler hors de la boucle (to_thread)."""
+        name = f"{key}.{extension}"
+        with self.lock:
+            data = self.memory.get(name)
+            if data is not None:
+                self.memory.move_to_end(name)
+                if name in self.disk:
+                    self.disk.move_to_end(name) # Hot in memory = recent on disk too
+                self.hits["memory"] += 1
+                return data
+            on_disk = name in self.disk
+            if on_disk:
+                self.disk.move_to_end(name)
+        if on_disk:
+            path = os.path.join(self.directory, name)
+            try:
+                with open(path, "rb") as f:
+                    data = f.read()
+                os.utime(path) # LRU order survives restarts
+            except OSError:
+                data = None
+            if data is not None:
+                with self.lock:
+                    self.hits["disk"] += 1
+                    self._remember(name, data)
+                return data
+        with self.lock:
+            self.misses += 1
+        return None
+
+    def put(self, key, extension, data):
+        """Stocke en mémoire et sur disque (écriture atomique). Bloquant: to_thread."""
+        name = f"{key}.{extension}"
+        path = os.path.join(self.directory, name)
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path) # Readers never see a half-written file
+        except OSError as e:
+            print(f"[AudioCache] Write failed: {e}")
+            return
+        evicted = []
+        with self.lock:
+            self._remember(name, data)
+            self.disk_bytes += len(data) - self.disk.pop(name, 0)
+            self.disk[name] = len(data)
+            while self.disk_bytes > self.max_disk_bytes and len(self.disk) > 1:
+                old, size = self.disk.popitem(last=False)
+                self.disk_bytes -= size
+                evicted.append(old)
+        for old in evicted:
+            try:
+                os.unlink(os.path.join(self.directory, old))
+            except OSError:
+                pass
+
+    def _remember(self, name, data):
+        # Caller holds the lock
+        self.memory_bytes += len(data) - len(self.memory.pop(name, b""))
+        self.memory[name] = data
+        while self.memory_bytes > self.max_memory_bytes and len(self.memory) > 1:
+            _, old = self.memory.popitem(last=False)
+            self.memory_bytes -= len(old)
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "hits": dict(self.hits),
+                "misses": self.misses,
+                "memory": {"entries": len(self.memory), "bytes": self.memory_bytes},
+                "disk": {"entries": len(self.disk), "bytes": self.disk_bytes},
+            }
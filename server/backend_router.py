@@ -0,0 +1,148 @@
+import time
+
+
+class CircuitBreaker:
+    """Disjoncteur par backend: closed -> open après N échecs -> half-open (1 sonde) -> closed"""
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, failure_threshold=3, reset_timeout=30.0, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return self.CLOSED
+        if self.clock() - self.opened_at >= self.reset_timeout:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    def allow(self):
+        state = self.state
+        return state == self.CLOSED or (state == self.HALF_OPEN and not self.probing)
+
+    def begin(self):
+        if self.state == self.HALF_OPEN:
+            self.probing = True # Only one probe request at a time
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.opened_at is None:
+                print(f"[Router] Circuit opened after {self.failures} failures")
+            self.opened_at = self.clock() # (Re)open: wait another reset_timeout
+        self.probing = False
+
+    def release(self):
+        """Sonde annulée sans verdict (ex: course hedgée perdue avant le délai)"""
+        self.probing = False
+
+
+class BackendHealth:
+    """Scores EWMA d'un backend+modèle: TTFT, tokens/s, taux d'erreur"""
+
+    def __init__(self, prior_ttft, prior_tps, alpha=0.3, breaker=None):
+        self.alpha = alpha
+        self.ttft = prior_ttft
+        self.tps = prior_tps
+        self.error_rate = 0.0
+        self.samples = 0
+        self.breaker = breaker or CircuitBreaker()
+
+    def _ewma(self, old, new):
+        return (1 - self.alpha) * old + self.alpha * new
+
+    def record_success(self, ttft, tokens, duration):
+        self.samples += 1
+        self.ttft = self._ewma(self.ttft, ttft)
+        if tokens > 1 and duration > 0:
+            self.tps = self._ewma(self.tps, tokens / duration)
+        self.error_rate = self._ewma(self.error_rate, 0.0)
+        self.breaker.record_success()
+
+    def record_failure(self):
+        self.samples += 1
+        self.error_rate = self._ewma(self.error_rate, 1.0)
+        self.breaker.record_failure()
+
+    def score(self):
+        """Temps estimé pour ~une phrase (TTFT + 20 tokens), pénalisé par les erreurs. Plus bas = mieux."""
+        return (self.ttft + 20 / max(self.tps, 1e-3)) * (1 + 4 * self.error_rate)
+
+
+class BackendRouter:
+    """Choisit, pour chaque tier, le backend sain le plus rapide du moment"""
+
+    def __init__(self, tiers, priors, clock=time.monotonic, failure_threshold=3, reset_timeout=30.0):
+        # tiers: tier -> candidate models; priors: model prefix -> (ttft s, tokens/s) before any sample
+        self.tiers = tiers
+        self.health = {}
+        for candidates in tiers.values():
+            for model in candidates:
+                if model not in self.health:
+                    prior = next(p for prefix, p in priors.items() if model.startswith(prefix))
+                    breaker = CircuitBreaker(failure_threshold, reset_timeout, clock)
+                    self.health[model] = BackendHealth(*prior, breaker=breaker)
+
+    def rank(self, tier):
+        """Candidats du tier, sains d'abord, triés par score"""
+        candidates = sorted(self.tiers[tier], key=lambda m: self.health[m].score())
+        healthy = [m for m in candidates if self.health[m].breaker.allow()]
+        # Everything open: still try, best score first, rather than failing outright
+        return healthy or candidates
+
+    async def track(self, model, factory, timeout=None):
+        """Enveloppe un stream backend et met à jour ses statistiques"""
+        health = self.health[model]
+        health.breaker.begin()
+        start = time.perf_counter()
+        first_at = None
+        tokens = 0
+        try:
+            async for token in factory():
+                if first_at is None:
+                    first_at = time.perf_counter()
+                tokens += 1
+                yield token
+        except Exception:
+            health.record_failure()
+            raise
+        except BaseException:
+            # Cancelled (lost hedge race) or closed (client left)
+            if first_at is not None:
+                health.record_success(first_at - start, tokens, time.perf_counter() - first_at)
+            elif timeout is not None and time.perf_counter() - start >= timeout:
+                health.record_failure() # Missed its first-token deadline
+            else:
+                health.breaker.release()
+            raise
+        if first_at is None:
+            health.record_failure() # Empty response
+        else:
+            health.record_success(first_at - start, tokens, time.perf_counter() - first_at)
+
+    def snapshot(self):
+        return {
+            "backends": {
+                model: {
+                    "state": h.breaker.state,
+                    "ttft_ms": round(h.ttft * 1000),
+                    "tokens_per_s": round(h.tps, 1),
+                    "error_rate": round(h.error_rate, 3),
+                    "score": round(h.score(), 3),
+                    "samples": h.samples,
+                }
+                for model, h in self.health.items()
+            },
+            "routes": {tier: self.rank(tier) for tier in self.tiers},
+        }
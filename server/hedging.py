@@ -0,0 +1,137 @@
+import asyncio
+import time
+from collections import deque
+
+
+class HedgeStats:
+    """Compteurs de hedging + distributions de TTFT par modèle ("overall" = vu par le client)"""
+
+    def __init__(self, window=200, min_samples=20):
+        self.min_samples = min_samples
+        self.window = window
+        self.requests = 0
+        self.hedged = 0     # Secondary started because primary missed its deadline
+        self.failovers = 0  # Secondary started because primary failed
+        self.wins = {"primary": 0, "secondary": 0}
+        self.ttft = {}      # model -> recent TTFT samples (s)
+
+    def record_ttft(self, model, seconds):
+        self.ttft.setdefault(model, deque(maxlen=self.window)).append(seconds)
+
+    def percentile(self, model, p):
+        samples = sorted(self.ttft.get(model, ()))
+        if not samples:
+            return None
+        return samples[min(len(samples) - 1, int(len(samples) * p))]
+
+    def deadline(self, model, default):
+        """p95 du TTFT récent du modèle, ou le budget fixe tant qu'il y a trop peu d'échantillons"""
+        if len(self.ttft.get(model, ())) < self.min_samples:
+            return default
+        return self.percentile(model, 0.95)
+
+    def snapshot(self):
+        return {
+            "requests": self.requests,
+            "hedged": self.hedged,
+            "failovers": self.failovers,
+            "hedge_rate": round(self.hedged / self.requests, 3) if self.requests else 0.0,
+            "wins": dict(self.wins),
+            "ttft_ms": {
+                model: {
+                    "n": len(samples),
+                    "p50": round(self.percentile(model, 0.5) * 1000),
+                    "p95": round(self.percentile(model, 0.95) * 1000),
+                }
+                for model, samples in self.ttft.items() if samples
+            },
+        }
+
+
+async def hedged_stream(primary, secondary=None, budget=1.0, stats=None):
+    """Stream hedgé: lance secondary si primary n'a pas produit de 1er token avant budget.
+
+    primary / secondary are (model_name, factory) pairs, factory() returning an
+    async generator. The first backend to yield a token wins and is streamed to
+    the end; the other one is cancelled (its upstream request is closed).
+    A backend that fails before its first token triggers the other immediately.
+    """
+    start = time.perf_counter()
+    contenders = {} # first-token task -> (role, model, generator, launch time)
+    secondary_started = False
+    errors = []
+
+    def launch(role, model, factory):
+        gen = factory()
+        task = asyncio.ensure_future(gen.__anext__())
+        contenders[task] = (role, model, gen, time.perf_counter())
+
+    if stats:
+        stats.requests += 1
+    launch("primary", *primary)
+
+    winner = None
+    try:
+        while winner is None:
+            if not contenders:
+                raise errors[-1] if errors else RuntimeError("No backend available")
+            timeout = None
+            if secondary and not secondary_started:
+                timeout = max(0.0, start + budget - time.perf_counter())
+            done, _ = await asyncio.wait(contenders, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+
+            if not done: # Primary missed its deadline: hedge
+                print(f"[Hedge] No first token from {primary[0]} after {budget:.2f}s, starting {secondary[0]}")
+                secondary_started = True
+                if stats:
+                    stats.hedged += 1
+                launch("secondary", *secondary)
+                continue
+
+            # Prefer primary if both answered in the same tick
+            for task in sorted(done, key=lambda t: contenders[t][0] != "primary"):
+                role, model, gen, launched = contenders.pop(task)
+                try:
+                    first = task.result()
+                except StopAsyncIteration:
+                    errors.append(RuntimeError(f"{model} returned an empty response"))
+                except Exception as e:
+                    errors.append(e)
+                else:
+                    if stats:
+                        stats.record_ttft(model, time.perf_counter() - launched)
+                    if winner is None:
+                        winner = (role, model, gen, first)
+                    else:
+                        await gen.aclose() # Answered too, but lost the race
+                    continue
+                print(f"[Hedge] {model} failed before first token: {errors[-1]}")
+                if role == "primary" and secondary and not secondary_started:
+                    secondary_started = True
+                    if stats:
+                        stats.failovers += 1
+                    launch("secondary", *secondary)
+
+        role, model, gen, first = winner
+        await _cancel(contenders) # Cancel the loser's upstream request
+        if stats:
+            stats.wins[role] += 1
+            stats.record_ttft("overall", time.perf_counter() - start) # As seen by the client
+
+        yield first
+        async for token in gen:
+            yield token
+    finally:
+        await _cancel(contenders)
+        if winner:
+            await winner[2].aclose()
+
+
+async def _cancel(contenders):
+    tasks = list(contenders)
+    for task in tasks:
+        task.cancel()
+    # Cancellation propagates into each generator, closing its HTTP stream
+    await asyncio.gather(*tasks, return_exceptions=True)
+    for task in tasks:
+        await contenders.pop(task)[2].aclose()
@@ -1,13 +1,24 @@
 
-from fastapi import FastAPI, UploadFile, BackgroundTasks
-from fastapi.responses import StreamingResponse
-from pydantic import BaseModel
+from fastapi import FastAPI, UploadFile, BackgroundTasks, WebSocket, WebSocketDisconnect, HTTPException
+from fastapi.responses import StreamingResponse, Response
+from pydantic import BaseModel, Field
 from optimized_ollama import OptimizedOllama, SmartModelSelector
 from smart_cache import SmartCache
+from semantic_index import normalize
+from single_flight import SingleFlight
+from token_coalescer import coalesce
+from segmenter import SentenceSegmenter
+from tts_engine import DEFAULT_VOICE, create_engine
+from audio_cache import AudioCache, audio_key
+from model_warmup import ModelResidency
+from session_store import SessionStore
+from prompting import dynamic_context
 from interpreter import interpreter
+from contextlib import asynccontextmanager
 import uvicorn
 import asyncio
 import os
+import time
 
 # --- Configuration Open Interpreter ---
 interpreter.offline = True
@@ -32,12 +43,33 @@ Write-Host "hello"
 """
 
 # --- App Definition ---
-app = FastAPI(title="Sonia Brain API", version="1.0")
+@asynccontextmanager
+async def lifespan(app):
+    residency.start() # Background: the API answers /status while models load
+    yield
+    await residency.stop()
+    await ollama.aclose() # Close pooled Ollama connections
+    cache.close() # Flush write-behind cache entries
+
+app = FastAPI(title="Sonia Brain API", version="1.0", lifespan=lifespan)
 
 # --- Services ---
 ollama = OptimizedOllama()
 selector = SmartModelSelector(ollama)
-cache = SmartCache()
+# Paraphrase lookup threshold (cosine similarity), 0 disables it
+cache = SmartCache(semantic_threshold=float(os.getenv("CACHE_SEMANTIC_THRESHOLD", "0.85")))
+inflight = SingleFlight() # Identical in-flight queries share one generation
+# Conversation history per client session, bounded in tokens (flat prompt size / TTFT)
+sessions = SessionStore(max_tokens=int(os.getenv("SESSION_MAX_TOKENS", "1500")))
+
+# Models to keep resident: local chat candidates first, then the Open Interpreter model
+local_models = [m for c in ollama.tiers.values() for m in c if not m.startswith("groq/")]
+local_models.append(interpreter.llm.model.replace("ollama/", ""))
+warmup_models = os.getenv("WARMUP_MODELS", ",".join(dict.fromkeys(local_models))).split(",")
+residency = ModelResidency(ollama, [m.strip() for m in warmup_models if m.strip()])
+# Server-side TTS (/speak): pluggable engine + content-addressed audio cache
+tts = create_engine(os.getenv("TTS_ENGINE", "edge"))
+audio_cache = AudioCache(max_disk_bytes=int(os.getenv("AUDIO_CACHE_MB", "256")) * 1024 * 1024)
 from command_registry import CommandRegistry
 registry = CommandRegistry()
 
@@ -45,6 +77,12 @@ registry = CommandRegistry()
 class ChatRequest(BaseModel):
     query: str
     source: str = "voice"
+    session_id: str | None = None # Conversation id (multi-turn memory), None = stateless
+
+class SpeakRequest(BaseModel):
+    text: str
+    voice: str = DEFAULT_VOICE
+    rate: str = Field("+0%", pattern=r"^[+-]\d{1,3}%$") # Checked here: a bad rate is a 422, not a truncated 200
 
 class CommandRequest(BaseModel):
     command: str
@@ -53,40 +91,221 @@ class CommandRequest(BaseModel):
 
 @app.get("/status")
 def status():
-    return {"status": "online", "model": ollama.current_model}
+    return {
+        "status": residency.overall(), # "warming" until every model is resident
+        "models": residency.snapshot(),
+        "model": ollama.current_model,
+        "router": ollama.router.snapshot(),
+        "hedging": ollama.hedge_stats.snapshot(),
+        "sessions": sessions.snapshot(),
+        "audio_cache": audio_cache.snapshot(),
+    }
 
-@app.post("/chat")
-async def chat_endpoint(req: ChatRequest):
-    """Streaming Chat Endpoint"""
-    query = req.query
+async def answer(query, session_id=None, timings=None, on_turn=None):
+    """Réponse en chunks de texte (cache ou génération coalescée). Les erreurs sont levées.
+
+    timings, if given, receives Ollama's done-frame counters and "cached".
+    on_turn, if given, receives the finished turn (query, response, context)
+    instead of the session history (speculative requests record it on commit).
+    """
     print(f"[Brain] Received Query: {query}")
+    history = sessions.history(session_id)
+    context = dynamic_context()
+
+    def record(response):
+        if session_id:
+            if on_turn:
+                on_turn(query, response, context)
+            else:
+                sessions.add_turn(session_id, query, response, context)
     
-    # 1. Check Cache
-    if cache.is_cacheable(query):
-        cached = cache.get(query)
-        if cached:
-            print(f"[Brain] Cache Hit: {cached}")
-            # Generator for cached response
-            async def cached_stream():
-                yield cached
-            return StreamingResponse(cached_stream(), media_type="text/plain")
-
-    # 2. Stream from Ollama
-    async def generate_stream():
-        full_resp = ""
-        # Note: smart_chat returns a generator (blocking IO usually), we wrap it properly later
-        # For now, simplistic sync generator iteration
-        for token in selector.smart_chat(query):
-             full_resp += token
-             yield token
-             await asyncio.sleep(0.01) # Yield control
-             
-        # Cache Result
-        if cache.is_cacheable(query):
+    # 1. Check Cache (only without history: a follow-up's answer depends on the conversation)
+    use_cache = not history and cache.is_cacheable(query)
+    if use_cache:
+        segments = cache.get_segments(query)
+        if segments:
+            print(f"[Brain] Cache Hit: {''.join(segments)}")
+            if timings is not None:
+                timings["cached"] = True
+            # Replay sentence by sentence so the client can synthesize the first one right away
+            for segment in segments:
+                yield segment
+            record("".join(segments))
+            return
+
+    # 2. Stream from Ollama (coalesced: a retry of an in-flight query joins its stream)
+    def on_complete(full_resp):
+        # Runs once per generation, in the leader
+        if use_cache:
             cache.set(query, full_resp)
+
+    # smart_chat returns an async generator: upstream reads never block the event loop,
+    # so concurrent streams interleave instead of serializing
+    key = " ".join(normalize(query))
+    if history:
+        key = f"{session_id}:{key}" # Only coalesce within the same conversation
+    chunks = []
+    tokens = inflight.stream(key, lambda: selector.smart_chat(query, history, context, timings), on_complete)
+    # Batched into sentence-sized chunks (first token and stalls flushed right away)
+    async for chunk in coalesce(tokens):
+        chunks.append(chunk)
+        yield chunk
+    record("".join(chunks))
+
+@app.post("/chat")
+async def chat_endpoint(req: ChatRequest):
+    """Streaming Chat Endpoint (text/plain, one request per utterance)"""
+    async def generate_stream():
+        try:
+            async for chunk in answer(req.query, req.session_id):
+                yield chunk
+        except Exception as e:
+            yield f"Error: {str(e)}"
             
     return StreamingResponse(generate_stream(), media_type="text/plain")
 
+@app.websocket("/ws")
+async def ws_endpoint(ws: WebSocket):
+    """Canal persistant, frames JSON typées.
+
+    Client -> server: {"type": "chat", "id", "query", "session_id"?, "speculative"?}, {"type": "cancel", "id"},
+                      {"type": "commit", "id"}
+    Server -> client: token {"text"}, sentence_end {"kind": sentence|clause}, error {"message"},
+                      done {"usage", "timings", "cancelled"} - all tagged with the request "id"
+                      (None for an error about a frame that could not be read)
+
+    A speculative chat (started on a partial transcript) streams like any
+    other, but its turn only enters the session history once the client
+    commits it: a guess the final transcript contradicts leaves no trace.
+    """
+    await ws.accept()
+    running = {} # request id -> task
+    speculative = {} # request id -> {"committed", "turn"}: history waits for the commit
+
+    def hold_turn(req_id, session_id):
+        def on_turn(*turn):
+            state = speculative.get(req_id)
+            if state is None:
+                return # Cancelled
+            if state["committed"]:
+                speculative.pop(req_id)
+                sessions.add_turn(session_id, *turn)
+            else:
+                state["turn"] = (session_id, turn)
+        speculative[req_id] = {"committed": False, "turn": None}
+        return on_turn
+
+    def commit(req_id):
+        state = speculative.get(req_id)
+        if state is None:
+            return
+        if state["turn"]:
+            speculative.pop(req_id)
+            session_id, turn = state["turn"]
+            sessions.add_turn(session_id, *turn)
+        else:
+            state["committed"] = True # Still streaming: recorded when it ends
+
+    async def run_chat(req_id, query, session_id, on_turn=None):
+        timings = {}
+        start = time.perf_counter()
+        first = None
+        cancelled = False
+        segmenter = SentenceSegmenter() # Speakable units: the client never rescans the text
+        
+        async def send_pieces(pieces):
+            for piece, kind in pieces:
+                if piece:
+                    await ws.send_json({"type": "token", "id": req_id, "text": piece})
+                if kind:
+                    await ws.send_json({"type": "sentence_end", "id": req_id, "kind": kind})
+        
+        try:
+            try:
+                async for chunk in answer(query, session_id, timings, on_turn):
+                    if first is None:
+                        first = time.perf_counter() - start
+                    await send_pieces(segmenter.feed(chunk))
+                await send_pieces(segmenter.flush())
+            except asyncio.CancelledError:
+                cancelled = True # Client sent "cancel" (or left)
+            except Exception as e:
+                speculative.pop(req_id, None) # Nothing to commit any more
+                # Typed error frame: the client no longer mistakes it for an answer
+                await ws.send_json({"type": "error", "id": req_id, "message": str(e)})
+                return
+            await ws.send_json({
+                "type": "done", "id": req_id, "cancelled": cancelled,
+                "usage": {"prompt_tokens": timings.get("prompt_eval_count"),
+                          "completion_tokens": timings.get("eval_count")},
+                "timings": {
+                    "ttft_ms": round(first * 1000) if first is not None else None,
+                    "total_ms": round((time.perf_counter() - start) * 1000),
+                    "prompt_eval_ms": round(timings["prompt_eval_duration"] / 1e6) if "prompt_eval_duration" in timings else None,
+                    "model": timings.get("model"),
+                    "cached": timings.get("cached", False),
+                },
+            })
+        except Exception:
+            pass # Connection gone: nobody left to report to
+        finally:
+            running.pop(req_id, None)
+
+    try:
+        while True:
+            # A malformed frame gets an error frame: the channel and the other requests on it live on
+            try:
+                msg = await ws.receive_json()
+            except (ValueError, KeyError):
+                await ws.send_json({"type": "error", "id": None, "message": "Invalid frame: not JSON text"})
+                continue
+            if not isinstance(msg, dict):
+                await ws.send_json({"type": "error", "id": None, "message": "Invalid frame: not an object"})
+                continue
+            if msg.get("type") == "chat":
+                req_id = msg.get("id")
+                query = msg.get("query")
+                if not isinstance(query, str) or not query.strip():
+                    await ws.send_json({"type": "error", "id": req_id, "message": "Invalid chat frame: no query"})
+                    continue
+                session_id = msg.get("session_id")
+                on_turn = hold_turn(req_id, session_id) if msg.get("speculative") else None
+                running[req_id] = asyncio.create_task(run_chat(req_id, query, session_id, on_turn))
+            elif msg.get("type") == "commit":
+                commit(msg.get("id"))
+            elif msg.get("type") == "cancel":
+                speculative.pop(msg.get("id"), None) # Its turn, finished or not, is never recorded
+                task = running.get(msg.get("id"))
+                if task:
+                    task.cancel() # Closes the stream: upstream generation stops if nobody else follows it
+    except WebSocketDisconnect:
+        pass
+    finally:
+        for task in list(running.values()):
+            task.cancel()
+
+@app.post("/speak")
+async def speak_endpoint(req: SpeakRequest):
+    """Synthèse vocale côté serveur: audio streamé chunk par chunk, mis en cache par contenu"""
+    text = " ".join(req.text.split())
+    if not text:
+        raise HTTPException(status_code=400, detail="Empty text")
+    key = audio_key(text, req.voice, req.rate, tts.name)
+    # Disk reads/writes run in a thread: the event loop keeps streaming other answers
+    cached = await asyncio.to_thread(audio_cache.get, key, tts.extension)
+    if cached is not None:
+        return Response(cached, media_type=tts.media_type, headers={"X-Audio-Cache": "hit"})
+
+    async def synthesize():
+        chunks = []
+        async for chunk in tts.stream(text, req.voice, req.rate):
+            chunks.append(chunk)
+            yield chunk
+        # Only complete audio is cached (a client that left mid-stream never gets here)
+        await asyncio.to_thread(audio_cache.put, key, tts.extension, b"".join(chunks))
+
+    return StreamingResponse(synthesize(), media_type=tts.media_type, headers={"X-Audio-Cache": "miss"})
+
 @app.post("/execute")
 def execute_endpoint(req: CommandRequest):
     """Execute System Command (Hybrid: Deterministic -> AI Fallback)"""
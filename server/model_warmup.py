@@ -0,0 +1,73 @@
+import asyncio
+import time
+
+
+def _full_name(model):
+    """Ollama reports "mistral-nemo:latest" for "mistral-nemo" """
+    return model if ":" in model else f"{model}:latest"
+
+
+class ModelResidency:
+    """Pré-charge les modèles Ollama au démarrage et les garde résidents (keep-alive rafraîchi)"""
+
+    PENDING, LOADING, READY, ERROR = "pending", "loading", "ready", "error"
+
+    def __init__(self, ollama, models, refresh_interval=240.0):
+        self.ollama = ollama
+        self.models = list(models) # Priority order: loaded one at a time
+        self.refresh_interval = refresh_interval
+        self.state = {m: {"state": self.PENDING, "load_ms": None, "refreshed_at": None} for m in self.models}
+        self.task = None
+
+    def start(self):
+        self.task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self.task:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+
+    async def _run(self):
+        for model in self.models:
+            await self._load(model)
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            await self.refresh()
+
+    async def _load(self, model):
+        entry = self.state[model]
+        entry["state"] = self.LOADING
+        print(f"[Warmup] Loading {model}...")
+        start = time.perf_counter()
+        if await self.ollama.warm_up(model):
+            entry.update(state=self.READY, load_ms=round((time.perf_counter() - start) * 1000), refreshed_at=time.time())
+            print(f"[Warmup] {model} ready in {entry['load_ms']} ms")
+        else:
+            entry["state"] = self.ERROR
+
+    async def refresh(self):
+        """Recharge les modèles évincés, rafraîchit le keep-alive des autres"""
+        try:
+            resident = await self.ollama.resident_models()
+        except Exception as e:
+            print(f"[Warmup] Ollama unreachable: {e}")
+            for entry in self.state.values():
+                entry["state"] = self.ERROR
+            return
+        for model in self.models:
+            if _full_name(model) not in resident:
+                await self._load(model) # Unloaded (memory pressure, Ollama restart...) or never loaded
+            elif await self.ollama.warm_up(model):
+                self.state[model].update(state=self.READY, refreshed_at=time.time())
+
+    def overall(self):
+        """Statut global: warming (chargement en cours), degraded (un modèle en échec) ou online"""
+        states = {e["state"] for e in self.state.values()}
+        if states & {self.PENDING, self.LOADING}:
+            return "warming"
+        if self.ERROR in states:
+            return "degraded"
+        return "online"
+
+    def snapshot(self):
+        return {model: dict(entry) for model, entry in self.state.items()}
@@ -0,0 +1,40 @@
+try:
+    from orjson import loads as _loads # Parses memoryview slices directly, no intermediate str
+    _ZERO_COPY = True
+except ImportError:
+    from json import loads as _loads
+    _ZERO_COPY = False
+
+
+class NDJSONDecoder:
+    """Décodeur NDJSON incrémental pour les réponses HTTP chunked (Ollama)"""
+
+    def __init__(self):
+        self._buffer = bytearray()
+
+    def feed(self, chunk):
+        """Ajoute un chunk brut et retourne les objets des lignes complètes"""
+        buf = self._buffer
+        buf += chunk
+        objects = []
+        start = 0
+        with memoryview(buf) as view:
+            while True:
+                end = buf.find(b"\n", start)
+                if end == -1:
+                    break
+                if end > start:
+                    try:
+                        objects.append(_loads(view[start:end] if _ZERO_COPY else buf[start:end]))
+                    except ValueError:
+                        pass # Malformed line: skip it, keep streaming
+                start = end + 1
+        # Keep only the trailing partial line
+        del buf[:start]
+        return objects
+
+    def flush(self):
+        """Décode la dernière ligne si le flux ne finit pas par un saut de ligne"""
+        objects = self.feed(b"\n") if self._buffer.strip() else []
+        self._buffer.clear()
+        return objects
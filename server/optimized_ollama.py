@@ -1,27 +1,62 @@
-import requests
-import json
+import httpx
 import time
-import datetime
 import os
+import socket
 from groq_client import GroqClient
+from ndjson import NDJSONDecoder
+from hedging import HedgeStats, hedged_stream
+from backend_router import BackendRouter
+from prompting import SYSTEM_PROMPT, build_messages, dynamic_context
+
+# Same num_ctx for warm-up and chat: a different value makes Ollama reload the model
+# (and drop its KV cache)
+NUM_CTX = 4096
+
+# Done-frame fields of /api/chat (durations in ns)
+TIMING_FIELDS = ("prompt_eval_count", "prompt_eval_duration", "eval_count", "eval_duration",
+                 "load_duration", "total_duration")
 
 class OptimizedOllama:
-    def __init__(self, base_url="http://localhost:11434"):
+    def __init__(self, base_url="http://localhost:11434", transport=None):
         self.base_url = base_url
         self.groq = GroqClient()
         
+        # Persistent keep-alive pool shared by chat, warm-up and health checks
+        # (transport is injectable for tests / fake server)
+        if transport is None:
+            transport = httpx.AsyncHTTPTransport(
+                limits=httpx.Limits(max_connections=8, max_keepalive_connections=4, keepalive_expiry=300),
+                # Like requests/urllib3: no Nagle delay between headers and body on reused connections
+                socket_options=[(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)],
+            )
+        self.http = httpx.AsyncClient(base_url=base_url, transport=transport, timeout=httpx.Timeout(None, connect=5.0))
+        
         # Hybrid Model Configuration
         # If Groq is available, we use it for SPEED.
         # Format: "groq/model_name" or "model_name" (for local Ollama)
+        # Each tier lists its candidates in preference order; the router re-ranks them live.
         
-        self.models = {
-            "fast": "groq/llama-3.1-8b-instant" if self.groq.client else "phi3:mini",
-            "balanced": "groq/llama-3.3-70b-versatile" if self.groq.client else "phi3:mini",
-            "smart": "groq/llama-3.3-70b-versatile" if self.groq.client else "phi3:mini",
-            "coding": "groq/llama-3.3-70b-versatile" if self.groq.client else "phi3:mini"
+        local = ["phi3:mini"]
+        self.tiers = {
+            "fast": (["groq/llama-3.1-8b-instant"] if self.groq.client else []) + local,
+            "balanced": (["groq/llama-3.3-70b-versatile", "groq/llama-3.1-8b-instant"] if self.groq.client else []) + local,
+            "smart": (["groq/llama-3.3-70b-versatile"] if self.groq.client else []) + local,
+            "coding": (["groq/llama-3.3-70b-versatile"] if self.groq.client else []) + local,
         }
+        self.models = {tier: candidates[0] for tier, candidates in self.tiers.items()}
         
         self.current_model = "balanced"
+        
+        # How long Ollama keeps a model loaded after a request (refreshed by ModelResidency)
+        self.keep_alive = os.getenv("OLLAMA_KEEP_ALIVE", "10m")
+        
+        # Live TTFT / tokens/s / error scores + circuit breakers per backend+model
+        # Priors (TTFT s, tokens/s) rank candidates before the first samples
+        self.router = BackendRouter(self.tiers, priors={"groq/": (0.4, 300.0), "": (1.5, 30.0)})
+        
+        # Hedging: if the best backend has no first token within the budget, race the runner-up
+        self.hedge_budget = float(os.getenv("HEDGE_BUDGET_MS", "800")) / 1000
+        self.hedge_stats = HedgeStats()
     
     def set_model(self, model_type="fast"):
         """Change le modèle selon le besoin"""
@@ -29,54 +64,97 @@ class OptimizedOllama:
             self.current_model = model_type
             print(f"Switched to {model_type} model: {self.models[model_type]}")
             
-    def chat_streaming(self, query, system_prompt=None, **kwargs):
-        """Générateur qui stream la réponse token par token (Hybrid Groq/Ollama)"""
+    async def chat_streaming(self, query, system_prompt=None, model_type=None, messages=None, timings=None, **kwargs):
+        """Async générateur qui stream la réponse token par token (Hybrid Groq/Ollama, hedgé)
+
+        messages overrides query/system_prompt (see prompting.build_messages).
+        timings, if given, is filled with Ollama's done-frame counters.
+        """
+        if messages is None:
+            messages = build_messages(query, system_prompt=system_prompt or SYSTEM_PROMPT)
+        
+        # model_type is resolved per call: concurrent streams must not race on current_model
+        ranked = self.router.rank(model_type or self.current_model)
+        budget = self.hedge_stats.deadline(ranked[0], self.hedge_budget)
+        
+        def backend(name):
+            factory = lambda: self._backend_stream(name, messages, timings, **kwargs)
+            return (name, lambda: self.router.track(name, factory, timeout=budget))
         
-        model_name = self.models.get(self.current_model, "phi3:mini")
+        primary = backend(ranked[0])
+        secondary = backend(ranked[1]) if len(ranked) > 1 else None
         
-        # --- GROQ ROUTING ---
-        # --- GROQ ROUTING ---
+        # Errors (both backends down) propagate: the endpoint reports them, nothing gets cached
+        async for token in hedged_stream(primary, secondary, budget, self.hedge_stats):
+            yield token
+
+    def _backend_stream(self, model_name, messages, timings=None, **kwargs):
+        # Format: "groq/model_name" or "model_name" (for local Ollama)
         if model_name.startswith("groq/"):
-            try:
-                real_model = model_name.replace("groq/", "")
-                # Test iterator to catch immediate errors
-                iterator = self.groq.stream_chat(query, system_prompt, model=real_model, **kwargs)
-                yield from iterator
-                return # Success
-            except Exception as e:
-                print(f"[Fallback] Groq failed: {e}. Switching to Local (Phi-3)...")
-                model_name = "phi3:mini" # Fallback model
-                # Continue to Ollama logic...
+            return self.groq.stream_chat(messages, model=model_name.replace("groq/", ""), **kwargs)
+        return self._ollama_stream(model_name, messages, timings, **kwargs)
 
-        # --- OLLAMA ROUTING (Fallback) ---
-        url = f"{self.base_url}/api/chat"
+    async def _ollama_stream(self, model_name, messages, timings=None, **kwargs):
         payload = {
             "model": model_name,
-            "messages": [
-                {"role": "system", "content": system_prompt or "You are Sonia, a helpful assistant."},
-                {"role": "user", "content": query}
-            ],
+            "messages": messages,
             "stream": True
         }
         
         if kwargs:
             payload.update(kwargs)
-            if "options" in kwargs: pass 
 
+        # Async NDJSON reader on the pooled connection: each await hands the loop back.
+        # Cancellation (lost hedge race) exits the context and closes the HTTP stream.
+        decoder = NDJSONDecoder()
+        async with self.http.stream("POST", "/api/chat", json=payload) as response:
+            if response.status_code != 200:
+                raise RuntimeError(f"Ollama HTTP {response.status_code} for {model_name}")
+            async for chunk in response.aiter_bytes():
+                for data in decoder.feed(chunk):
+                    if "error" in data:
+                        raise RuntimeError(f"Ollama: {data['error']}")
+                    token = data.get("message", {}).get("content")
+                    if token:
+                        yield token
+                    if data.get("done") and timings is not None:
+                        # prompt_eval_count only counts the tokens Ollama did not find in its KV cache
+                        timings.update({k: data[k] for k in TIMING_FIELDS if k in data})
+                        timings["model"] = model_name
+
+    async def health_check(self):
+        """Vérifie qu'Ollama répond (réutilise le pool)"""
         try:
-            with requests.post(url, json=payload, stream=True) as response:
-                if response.status_code == 200:
-                    for line in response.iter_lines():
-                        if line:
-                            try:
-                                data = json.loads(line)
-                                if "message" in data and "content" in data["message"]:
-                                    token = data["message"]["content"]
-                                    yield token
-                            except:
-                                pass
-        except Exception as e:
-            yield f"Error: {str(e)}"
+            r = await self.http.get("/api/version", timeout=2.0)
+            return r.status_code == 200
+        except httpx.HTTPError:
+            return False
+
+    async def warm_up(self, model, keep_alive=None):
+        """Charge un modèle Ollama en mémoire (prompt minimal, réutilise le pool).
+        Also refreshes its keep-alive when it is already loaded."""
+        payload = {
+            "model": model,
+            "prompt": "Hi",
+            "stream": False,
+            "keep_alive": keep_alive if keep_alive is not None else self.keep_alive,
+            "options": {"num_predict": 1, "num_ctx": NUM_CTX},
+        }
+        try:
+            r = await self.http.post("/api/generate", json=payload, timeout=300.0)
+            return r.status_code == 200
+        except httpx.HTTPError as e:
+            print(f"[Ollama] Warm-up failed for {model}: {e}")
+            return False
+
+    async def resident_models(self):
+        """Modèles actuellement chargés en mémoire par Ollama (/api/ps)"""
+        r = await self.http.get("/api/ps", timeout=5.0)
+        r.raise_for_status()
+        return {m.get("name") for m in r.json().get("models", [])}
+
+    async def aclose(self):
+        await self.http.aclose()
 
 class SmartModelSelector:
     def __init__(self, ollama_instance):
@@ -93,25 +171,22 @@ class SmartModelSelector:
             return "fast"
         return "balanced"
 
-    def smart_chat(self, query):
+    def smart_chat(self, query, history=(), context=None, timings=None):
         model_type = self.select_model_for_query(query)
         self.ollama.set_model(model_type)
         
-        # System Prompt - Fluid & Fast (Direct & Natural)
-        now = datetime.datetime.now().strftime("%Y-%m-%d %H:%M")
-        JARVIS_SYSTEM_PROMPT = f"""You are Sonia, a helpful AI.
-Current Date: {now}
-Interact naturally and fluidly.
-- Be direct and concise.
-- Provide clear answers.
-- Use context."""
+        # Static system prompt + date as a small suffix right before the user turn:
+        # the prefix no longer changes every minute, Ollama reuses its KV cache.
+        # history is the session's previous turns, sent exactly as they were (prefix grows)
+        messages = build_messages(query, history, context or dynamic_context())
         
         # Options
         options = {
-            "keep_alive": -1,
-            "num_ctx": 4096, # Groq handles large context easily
+            "num_ctx": NUM_CTX, # Groq handles large context easily
             "temperature": 0.6,
             "top_k": 50,
             "top_p": 0.9,
         }
-        return self.ollama.chat_streaming(query, JARVIS_SYSTEM_PROMPT, options=options)
+        # keep_alive is a top-level Ollama field (ignored inside "options")
+        return self.ollama.chat_streaming(query, model_type=model_type, messages=messages, timings=timings,
+                                          options=options, keep_alive=self.ollama.keep_alive)
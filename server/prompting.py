@@ -0,0 +1,29 @@
+import datetime
+
+# Static prefix: byte-identical on every request, so Ollama (and Groq) can reuse
+# the KV cache of everything before the first message that differs.
+SYSTEM_PROMPT = """You are Sonia, a helpful AI.
+Interact naturally and fluidly.
+- Be direct and concise.
+- Provide clear answers.
+- Use context."""
+
+
+def dynamic_context(now=None):
+    """Petit suffixe variable (date à la minute), placé juste avant le tour utilisateur"""
+    now = now or datetime.datetime.now()
+    return f"Current Date: {now:%Y-%m-%d %H:%M}"
+
+
+def build_messages(query, history=(), context=None, system_prompt=SYSTEM_PROMPT):
+    """[system statique] + historique + [contexte dynamique] + [utilisateur]
+
+    Everything that changes per request comes last: two consecutive requests
+    share the whole prefix up to (and including) the previous turns.
+    """
+    messages = [{"role": "system", "content": system_prompt}]
+    messages.extend(history)
+    if context:
+        messages.append({"role": "system", "content": context})
+    messages.append({"role": "user", "content": query})
+    return messages
@@ -0,0 +1,174 @@
+import re
+
+TERMINALS = ".!?…"
+CLOSERS = "\"')]»”’"
+CLAUSE_MARKS = ",;:"
+
+# "Mr. Smith", "M. Dupont", "e.g. this": a period that never ends a sentence
+NEVER_END = {
+    # English
+    "mr", "mrs", "ms", "dr", "prof", "sr", "jr", "st", "mt", "vs", "e.g", "i.e", "approx", "fig", "vol",
+    # Français
+    "mme", "mlle", "mlles", "mm", "pr", "ste", "cf", "p", "pp", "ex", "av", "apr", "j.-c", "boul", "bd",
+}
+# "etc." ends a sentence only if an uppercase letter follows ("No. It is sunny." but "No. 5")
+AMBIGUOUS = {"etc", "inc", "ltd", "co", "corp", "env", "a.m", "p.m", "no"}
+
+NORMAL, TERMINAL, AMBIG, CLAUSE = range(4)
+
+# Characters the state machine has to look at; plain word characters are skipped in bulk
+_SPECIAL_RE = re.compile(r'[.!?…,;:\s]')
+
+
+class SentenceSegmenter:
+    """Découpeur incrémental d'un flux de tokens en unités prononçables (phrases, propositions longues).
+
+    feed(text) returns [(piece, kind)] covering text in order: kind is None,
+    "sentence" or "clause" when the piece ends a speakable unit. Each character
+    is looked at once, with a few characters of lookahead state carried over
+    between tokens, so the cost per token is O(len(token)).
+    """
+
+    def __init__(self, clause_min=40):
+        self.clause_min = clause_min # Long units are also cut at , ; : (no waiting for the period)
+        self.reset()
+
+    def reset(self):
+        self.state = NORMAL
+        self.word = ""        # Current word (bounded: reset on whitespace)
+        self.punct = ""       # Terminal punctuation run being confirmed
+        self.unit_len = 0     # Characters in the current unit
+        self.unit_words = 0   # Completed words in the current unit
+        self.content = False  # Current unit has non-space text
+
+    def _is_end(self):
+        """Le point (ou !?…) + blanc qui vient d'être vu termine-t-il la phrase ?"""
+        if self.punct != ".":
+            return True # ! ? ... … ?!
+        base = self.word.lower().rstrip(TERMINALS + CLOSERS).lstrip("\"'([«“")
+        if base in NEVER_END:
+            return False
+        if base in AMBIGUOUS:
+            return None # Decided by the next non-space character
+        if all(len(part) == 1 and part.isalpha() for part in base.split(".")):
+            return False # Initials / acronyms: "J. K. Rowling", "the U.S. Army"
+        if base.isdigit() and self.unit_words == 0:
+            return False # List marker: "1. Preheat the oven"
+        return True
+
+    def feed(self, text):
+        pieces = []
+        start = 0
+        i = 0
+        n = len(text)
+        while i < n:
+            c = text[i]
+            state = self.state
+            cut = None # Boundary position in text (piece = text[start:cut])
+            kind = "sentence"
+
+            if state == TERMINAL:
+                if c in TERMINALS:
+                    self.punct += c
+                    self.word += c
+                elif c in CLOSERS:
+                    self.word += c
+                elif c.isspace():
+                    end = True if c == "\n" else self._is_end()
+                    if end is None:
+                        self.state = AMBIG
+                    elif end:
+                        cut = i + 1
+                    else:
+                        self.state = NORMAL
+                        self.unit_words += 1
+                        self.word = ""
+                else:
+                    # "3.5", "Node.js", "e.g" in progress: not a boundary
+                    self.state = NORMAL
+                    self.word += c
+            elif state == AMBIG:
+                if c == "\n":
+                    cut = i + 1
+                elif c.isupper():
+                    # Boundary before c: c starts the next unit
+                    self._close_unit()
+                    pieces.append((text[start:i], kind))
+                    start = i
+                    continue
+                elif not c.isspace():
+                    self.state = NORMAL
+                    self.unit_words += 1
+                    self.word = c
+            elif state == CLAUSE:
+                if c.isspace():
+                    cut = i + 1
+                    kind = "clause"
+                else:
+                    self.state = NORMAL # "3,5" / "10:30"
+                    self.word += c
+            else:
+                if c in TERMINALS:
+                    if self.content:
+                        self.state = TERMINAL
+                        self.punct = c
+                    self.word += c
+                elif c == "\n":
+                    if self.content:
+                        cut = i + 1
+                elif c.isspace():
+                    if self.word:
+                        self.unit_words += 1
+                        self.word = ""
+                elif c in CLAUSE_MARKS and self.clause_min is not None and self.unit_len >= self.clause_min:
+                    self.state = CLAUSE
+                    self.word += c
+                else:
+                    # Fast path: the run of plain characters up to the next special one
+                    m = _SPECIAL_RE.search(text, i + 1)
+                    j = m.start() if m else n
+                    self.content = True
+                    if len(self.word) < 32:
+                        self.word += text[i:j]
+                    self.unit_len += j - i
+                    i = j
+                    continue
+
+            i += 1
+            self.unit_len += 1
+            if cut is not None:
+                self._close_unit()
+                pieces.append((text[start:cut], kind))
+                start = cut
+        if start < n:
+            pieces.append((text[start:], None))
+        return pieces
+
+    def _close_unit(self):
+        self.state = NORMAL
+        self.word = ""
+        self.punct = ""
+        self.unit_len = 0
+        self.unit_words = 0
+        self.content = False
+
+    def flush(self):
+        """Fin du flux: la dernière unité (non terminée) est close"""
+        ended = self.content
+        self.reset()
+        return [("", "sentence")] if ended else []
+
+
+def split_sentences(text):
+    """Découpe une réponse en phrases prononçables (sans perte de caractères)"""
+    segmenter = SentenceSegmenter(clause_min=None)
+    units = []
+    current = ""
+    for piece, kind in segmenter.feed(text) + segmenter.flush():
+        current += piece
+        if kind and current:
+            units.append(current)
+            current = ""
+    if current:
+        units.append(current)
+    return units
@@ -0,0 +1,149 @@
+import re
+import zlib
+
+import numpy as np
+
+# Contractions fréquentes (STT renvoie l'une ou l'autre forme)
+CONTRACTIONS = {
+    "what's": "what is", "who's": "who is", "where's": "where is", "how's": "how is",
+    "it's": "it is", "that's": "that is", "there's": "there is", "i'm": "i am",
+    "you're": "you are", "we're": "we are", "they're": "they are", "i've": "i have",
+    "don't": "do not", "doesn't": "does not", "can't": "can not", "won't": "will not",
+    "isn't": "is not", "ain't": "is not", "c'est": "ce est", "qu'est-ce": "que est ce", "j'ai": "je ai",
+}
+
+STOPWORDS = {
+    # English
+    "a", "an", "the", "is", "are", "was", "were", "be", "am", "do", "does", "did", "of", "in", "on",
+    "at", "to", "for", "and", "or", "me", "my", "you", "your", "i", "it", "this", "that", "what",
+    "who", "where", "how", "which", "can", "could", "would", "please", "tell", "about", "sonia",
+    "have", "has", "had", "s", "exactly", "explain",
+    # Français
+    "le", "la", "les", "un", "une", "des", "de", "du", "et", "ou", "est", "ce", "que", "qui", "quel",
+    "quelle", "je", "tu", "me", "moi", "dis", "en", "au", "aux",
+}
+
+# Never filler: "is it safe" and "is it not safe" want opposite answers
+NEGATIONS = {"not", "no", "never", "nothing", "ne", "pas", "jamais", "rien"}
+# Question words are stopwords for the bucket ("which planet" ~ "what planet"), but two
+# questions that both have one must ask the same thing ("who is X" is not "where is X")
+QUESTION_WORDS = {"what": "what", "which": "what", "who": "who", "where": "where", "how": "how"}
+
+WORD_RE = re.compile(r"[\w']+")
+
+
+def stem(word):
+    """Pluriel simple: spiders -> spider, capitales -> capitale"""
+    if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+        return word[:-1]
+    return word
+
+
+def _expand(word):
+    if "'" not in word:
+        return word
+    word = CONTRACTIONS.get(word, word)
+    if word.endswith("n't"): # wasn't, didn't, shouldn't...
+        return word[:-3] + " not"
+    if word.startswith("n'"): # n'est, n'a
+        return "ne " + word[2:]
+    return word
+
+
+def normalize(text):
+    """Minuscules, contractions développées, ponctuation retirée, pluriels réduits"""
+    words = [_expand(w) for w in WORD_RE.findall(text.lower())]
+    return [w if w in STOPWORDS else stem(w) for w in " ".join(words).replace("'", " ").split()]
+
+
+def content_words(text):
+    return frozenset(w for w in normalize(text) if w not in STOPWORDS)
+
+
+def signature(words):
+    """Mots de contenu avec répétitions, sans ordre: deux questions équivalentes ont la même"""
+    return tuple(sorted(w for w in words if w not in STOPWORDS))
+
+
+def question_words(words):
+    return {QUESTION_WORDS[w] for w in words if w in QUESTION_WORDS}
+
+
+class SemanticIndex:
+    """Index de paraphrases: seau par mots de contenu, puis similarité de n-grammes hachés (NumPy).
+
+    A cached question only answers a query with exactly the same content
+    words (repetitions and negations included), so the candidates are one
+    dict bucket instead of a scan of the whole index: lookups stay O(1)
+    however large the cache grows, and no vector matrix is kept in memory.
+    The hashed embedding then checks the candidates are phrased the same
+    way; its content-word bigrams make swapped arguments ("10 km to miles"
+    vs "10 miles to km") score low.
+    """
+
+    def __init__(self, dim=512, threshold=0.85):
+        self.dim = dim
+        self.threshold = threshold
+        self.buckets = {}    # signature -> {key: text}
+        self.signatures = {} # key -> signature
+
+    def _bucket(self, feature):
+        h = zlib.crc32(feature.encode("utf-8"))
+        # Signed hashing: collisions cancel out instead of piling up
+        return h % self.dim, 1.0 if h & 0x80000000 else -1.0
+
+    def embed(self, text):
+        return self._embed(normalize(text))
+
+    def _embed(self, words):
+        vec = np.zeros(self.dim, dtype=np.float32)
+        for word in words:
+            weight = 0.3 if word in STOPWORDS else 1.0
+            idx, sign = self._bucket("w:" + word)
+            vec[idx] += sign * weight
+            padded = f"#{word}#"
+            for i in range(len(padded) - 2): # Char trigrams absorb STT typos / plurals
+                idx, sign = self._bucket(padded[i:i + 3])
+                vec[idx] += sign * weight * 0.5
+        content = [w for w in words if w not in STOPWORDS]
+        for pair in zip(content, content[1:]): # Word order: who does what to whom
+            idx, sign = self._bucket("b:" + " ".join(pair))
+            vec[idx] += sign * 1.5
+        norm = np.linalg.norm(vec)
+        return vec / norm if norm else vec
+
+    def add(self, key, text):
+        self.remove(key)
+        sig = signature(normalize(text))
+        self.buckets.setdefault(sig, {})[key] = text
+        self.signatures[key] = sig
+
+    def remove(self, key):
+        sig = self.signatures.pop(key, None)
+        if sig is not None:
+            bucket = self.buckets[sig]
+            del bucket[key]
+            if not bucket:
+                del self.buckets[sig]
+
+    def search(self, text):
+        """Retourne (key, score) de la plus proche question équivalente, ou (None, score)"""
+        words = normalize(text)
+        sig = signature(words)
+        bucket = self.buckets.get(sig)
+        if not bucket:
+            return None, 0.0
+        # Only stopwords left: near-exact match only
+        threshold = self.threshold if sig else 0.99
+        query = self._embed(words)
+        asked = question_words(words)
+        best_key, best = None, 0.0
+        for key, other_text in bucket.items():
+            other = normalize(other_text)
+            other_asked = question_words(other)
+            if asked and other_asked and asked != other_asked:
+                continue
+            score = float(self._embed(other) @ query)
+            if score > best:
+                best_key, best = key, score
+        return (best_key, best) if best >= threshold else (None, best)
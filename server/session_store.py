@@ -0,0 +1,87 @@
+import time
+from collections import OrderedDict, deque
+
+
+def approx_tokens(text):
+    """Estimation rapide (~4 caractères par token + surcoût du message), sans tokenizer"""
+    return len(text) // 4 + 4
+
+
+class Session:
+    """Historique d'une conversation: tours (messages, tokens) + total maintenu incrémentalement"""
+
+    def __init__(self, session_id, now):
+        self.id = session_id
+        self.turns = deque()
+        self.tokens = 0
+        self.last_seen = now
+
+    def history(self):
+        return [message for messages, _ in self.turns for message in messages]
+
+
+class SessionStore:
+    """Sessions multi-tours par session_id client, bornées en tokens (tours les plus anciens évincés)"""
+
+    def __init__(self, max_tokens=1500, ttl=1800.0, max_sessions=256, clock=time.monotonic):
+        self.max_tokens = max_tokens
+        # Trim down to 75% of the budget: the prompt prefix then stays put for
+        # several turns instead of shifting (and missing Ollama's KV cache) every turn
+        self.low_water = int(max_tokens * 0.75)
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self.clock = clock
+        self.sessions = OrderedDict() # LRU: least recently used first
+
+    def get(self, session_id):
+        """Session active pour session_id, ou None (inconnue ou expirée)"""
+        self._expire()
+        session = self.sessions.get(session_id)
+        if session:
+            session.last_seen = self.clock()
+            self.sessions.move_to_end(session_id)
+        return session
+
+    def history(self, session_id):
+        session = self.get(session_id) if session_id else None
+        return session.history() if session else []
+
+    def add_turn(self, session_id, query, response, context=None):
+        """Ajoute un tour, tel qu'envoyé au modèle (contexte dynamique compris)"""
+        session = self.get(session_id)
+        if session is None:
+            session = self.sessions[session_id] = Session(session_id, self.clock())
+            while len(self.sessions) > self.max_sessions:
+                self.sessions.popitem(last=False)
+        messages = []
+        if context:
+            messages.append({"role": "system", "content": context})
+        messages.append({"role": "user", "content": query})
+        messages.append({"role": "assistant", "content": response})
+        # Counted once, when added: the total never needs a full recount
+        tokens = sum(approx_tokens(m["content"]) for m in messages)
+        session.turns.append((messages, tokens))
+        session.tokens += tokens
+        if session.tokens > self.max_tokens:
+            while session.turns and session.tokens > self.low_water:
+                _, old = session.turns.popleft()
+                session.tokens -= old
+        return session
+
+    def drop(self, session_id):
+        self.sessions.pop(session_id, None)
+
+    def _expire(self):
+        now = self.clock()
+        while self.sessions:
+            session = next(iter(self.sessions.values()))
+            if now - session.last_seen < self.ttl:
+                break
+            self.sessions.popitem(last=False)
+
+    def snapshot(self):
+        return {
+            "sessions": len(self.sessions),
+            "max_tokens": self.max_tokens,
+            "tokens": {sid: s.tokens for sid, s in self.sessions.items()},
+        }
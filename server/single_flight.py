@@ -0,0 +1,83 @@
+import asyncio
+
+
+class _Flight:
+    """Une génération en cours: tokens déjà émis + notification des abonnés"""
+
+    def __init__(self, key):
+        self.key = key
+        self.tokens = []
+        self.done = False
+        self.error = None
+        self.listeners = 0
+        self.task = None
+        self._event = asyncio.Event()
+
+    def notify(self):
+        self._event.set()
+        self._event = asyncio.Event()
+
+    async def wait(self):
+        await self._event.wait()
+
+
+class SingleFlight:
+    """Coalesce les requêtes identiques en cours: un seul stream amont, diffusé à N clients"""
+
+    def __init__(self):
+        self.flights = {}
+
+    def stream(self, key, factory, on_complete=None):
+        """Rejoint la génération en cours pour key (replay des tokens déjà émis), ou la démarre.
+
+        factory() returns the upstream async generator; on_complete(full_text)
+        runs once, in the leader, when it finishes normally.
+        """
+        flight = self.flights.get(key)
+        if flight is None:
+            flight = _Flight(key)
+            self.flights[key] = flight
+            flight.task = asyncio.create_task(self._run(key, flight, factory, on_complete))
+        else:
+            print(f"[Brain] Coalesced with in-flight query: {key}")
+        # Counted as soon as it joins: a caller that has not iterated yet still keeps the flight alive
+        flight.listeners += 1
+        return self._follow(flight)
+
+    async def _run(self, key, flight, factory, on_complete):
+        try:
+            async for token in factory():
+                flight.tokens.append(token)
+                flight.notify()
+            if on_complete:
+                on_complete("".join(flight.tokens))
+        except Exception as e:
+            flight.error = e
+        except asyncio.CancelledError:
+            flight.error = RuntimeError("Generation cancelled") # Never a silently truncated answer
+            raise
+        finally:
+            flight.done = True
+            flight.notify()
+            if self.flights.get(key) is flight:
+                del self.flights[key]
+
+    async def _follow(self, flight):
+        i = 0
+        try:
+            while True:
+                while i < len(flight.tokens):
+                    yield flight.tokens[i]
+                    i += 1
+                if flight.done:
+                    if flight.error:
+                        raise flight.error
+                    return
+                await flight.wait()
+        finally:
+            flight.listeners -= 1
+            if flight.listeners == 0 and not flight.done:
+                # Every client left: stop the upstream generation, don't let new ones join it
+                flight.task.cancel()
+                if self.flights.get(flight.key) is flight:
+                    del self.flights[flight.key]
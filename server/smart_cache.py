@@ -1,40 +1,236 @@
-
 import json
 import os
-from pathlib import Path
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from queue import SimpleQueue, Empty
+from semantic_index import SemanticIndex
+from segmenter import split_sentences
+
+# TTL par classe de requête (secondes). None = jamais en cache.
+DEFAULT_TTL = 30 * 24 * 3600
+SEMI_DYNAMIC_TTL = 3600
 
 class SmartCache:
-    def __init__(self, cache_file="cache/query_cache.json"):
-        self.cache_file = cache_file
-        self.cache = self._load_cache()
-        
-    def _load_cache(self):
-        if os.path.exists(self.cache_file):
+    """Cache Q/R: index mémoire LRU + stockage SQLite (WAL) écrit en arrière-plan"""
+
+    def __init__(self, db_file="cache/query_cache.db", legacy_file="cache/query_cache.json",
+                 max_entries=5000, max_bytes=5 * 1024 * 1024, flush_interval=0.5, semantic_threshold=0.85):
+        self.db_file = db_file
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.flush_interval = flush_interval
+
+        # key -> (segments, expires_at); order = LRU (oldest first)
+        # Responses are stored pre-split into sentences so a hit can be streamed per sentence
+        self.entries = OrderedDict()
+        self.total_bytes = 0
+        self.lock = threading.Lock()
+        # Near-duplicate lookup (paraphrases); None disables it
+        self.semantic = SemanticIndex(threshold=semantic_threshold) if semantic_threshold else None
+
+        self._pending = SimpleQueue() # Write-behind ops, drained by the writer thread
+        self._stopped = threading.Event()
+
+        os.makedirs(os.path.dirname(self.db_file) or ".", exist_ok=True)
+        self._init_db(legacy_file)
+        self._load()
+
+        self._writer = threading.Thread(target=self._writer_loop, daemon=True)
+        self._writer.start()
+
+    # --- Storage ---
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_file, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _init_db(self, legacy_file):
+        conn = self._connect()
+        with conn:
+            conn.execute("""CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                response TEXT NOT NULL,
+                expires_at REAL,
+                last_access REAL NOT NULL,
+                segments TEXT
+            )""")
+            columns = [row[1] for row in conn.execute("PRAGMA table_info(entries)")]
+            if "segments" not in columns: # DB created before segmented replay
+                conn.execute("ALTER TABLE entries ADD COLUMN segments TEXT")
+            empty = conn.execute("SELECT 1 FROM entries LIMIT 1").fetchone() is None
+            if empty and legacy_file and os.path.exists(legacy_file):
+                self._import_legacy(conn, legacy_file)
+        conn.close()
+
+    def _import_legacy(self, conn, legacy_file):
+        """Migre l'ancien cache JSON (une seule fois, base vide)"""
+        try:
+            with open(legacy_file, 'r', encoding='utf-8') as f:
+                legacy = json.load(f)
+        except (OSError, ValueError):
+            return
+        now = time.time()
+        rows = [(self._key(q), r, self._expiry(q, now), now) for q, r in legacy.items()
+                if isinstance(r, str) and self.ttl_for(q) is not None]
+        conn.executemany("INSERT OR REPLACE INTO entries (key, response, expires_at, last_access) VALUES (?, ?, ?, ?)", rows)
+        print(f"[Cache] Migrated {len(rows)} entries from {legacy_file}")
+
+    def _load(self):
+        conn = self._connect()
+        now = time.time()
+        rows = conn.execute(
+            "SELECT key, response, expires_at, segments FROM entries WHERE expires_at IS NULL OR expires_at > ? ORDER BY last_access",
+            (now,)
+        ).fetchall()
+        conn.execute("DELETE FROM entries WHERE expires_at IS NOT NULL AND expires_at <= ?", (now,))
+        conn.commit()
+        conn.close()
+        for key, response, expires_at, segments in rows:
+            # Rows migrated from the JSON cache have no segments yet
+            segments = json.loads(segments) if segments else split_sentences(response)
+            self.entries[key] = (segments, expires_at)
+            self.total_bytes += len(response)
+            if self.semantic:
+                self.semantic.add(key, key)
+        self._evict()
+
+    def _writer_loop(self):
+        """Applique les écritures par lots, hors du chemin de la requête"""
+        conn = self._connect()
+        while not self._stopped.is_set() or not self._pending.empty():
             try:
-                with open(self.cache_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            except:
-                return {}
-        return {}
-    
+                ops = [self._pending.get(timeout=self.flush_interval)]
+            except Empty:
+                continue
+            while True:
+                try:
+                    ops.append(self._pending.get_nowait())
+                except Empty:
+                    break
+            self._apply(conn, ops)
+        conn.close()
+
+    def _apply(self, conn, ops):
+        # Only the last op per key matters within a batch
+        latest = {}
+        flushed = []
+        for op in ops:
+            if op[0] == "flush":
+                flushed.append(op[1])
+            elif op[0] == "touch" and latest.get(op[1], ("touch",))[0] != "touch":
+                continue # Don't let a touch hide a pending put/delete
+            else:
+                latest[op[1]] = op
+
+        puts = [op[1:] for op in latest.values() if op[0] == "put"]
+        deletes = [(op[1],) for op in latest.values() if op[0] == "delete"]
+        touches = [(op[2], op[1]) for op in latest.values() if op[0] == "touch"]
+        try:
+            with conn:
+                if puts:
+                    conn.executemany("INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?)", puts)
+                if deletes:
+                    conn.executemany("DELETE FROM entries WHERE key = ?", deletes)
+                if touches:
+                    conn.executemany("UPDATE entries SET last_access = ? WHERE key = ?", touches)
+        except sqlite3.Error as e:
+            print(f"[Cache] Write error: {e}")
+        for done in flushed:
+            done.set()
+
+    # --- Public API ---
+
+    def _key(self, query):
+        return query.lower().strip()
+
+    def _expiry(self, query, now):
+        ttl = self.ttl_for(query)
+        return now + ttl if ttl else None
+
     def get(self, query):
-        """Récupère une réponse exacte si elle existe"""
-        return self.cache.get(query.lower().strip())
-    
+        """Récupère la réponse exacte, ou celle d'une paraphrase proche (si non expirée)"""
+        segments = self.get_segments(query)
+        return "".join(segments) if segments else None
+
+    def get_segments(self, query):
+        """Comme get(), mais retourne la réponse découpée en phrases"""
+        key = self._key(query)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None and self.semantic:
+                # Exact miss: try a paraphrase of a cached question
+                key, score = self.semantic.search(query)
+                entry = self.entries.get(key) if key else None
+                if entry:
+                    print(f"[Cache] Semantic hit ({score:.2f}): '{query}' ~ '{key}'")
+            if entry is None:
+                return None
+            segments, expires_at = entry
+            now = time.time()
+            if expires_at is not None and expires_at <= now:
+                self._remove(key)
+                return None
+            self.entries.move_to_end(key)
+        self._pending.put(("touch", key, now))
+        return segments
+
     def set(self, query, response):
-        """Sauvegarde une nouvelle paire Q/R"""
+        """Sauvegarde une nouvelle paire Q/R (O(1), écriture disque différée)"""
         if len(response) > 500: return # Don't cache long essays
-        
-        self.cache[query.lower().strip()] = response
-        self._save_cache()
-        
-    def _save_cache(self):
-        # Ensure dir exists
-        os.makedirs(os.path.dirname(self.cache_file), exist_ok=True)
-        with open(self.cache_file, 'w', encoding='utf-8') as f:
-            json.dump(self.cache, f, ensure_ascii=False, indent=2)
+        ttl = self.ttl_for(query)
+        if ttl is None: return
+
+        key = self._key(query)
+        now = time.time()
+        segments = split_sentences(response) # Computed once, replayed on every hit
+        with self.lock:
+            if key in self.entries:
+                self._remove(key)
+            self.entries[key] = (segments, now + ttl)
+            self.total_bytes += len(response)
+            if self.semantic:
+                self.semantic.add(key, key)
+            self._evict()
+        self._pending.put(("put", key, response, now + ttl, now, json.dumps(segments, ensure_ascii=False)))
+
+    def _remove(self, key):
+        segments, _ = self.entries.pop(key)
+        self.total_bytes -= sum(len(s) for s in segments)
+        if self.semantic:
+            self.semantic.remove(key)
+        self._pending.put(("delete", key))
+
+    def _evict(self):
+        """Éviction LRU par nombre d'entrées et par taille totale"""
+        while self.entries and (len(self.entries) > self.max_entries or self.total_bytes > self.max_bytes):
+            self._remove(next(iter(self.entries)))
+
+    def flush(self, timeout=5.0):
+        """Attend que les écritures en attente soient sur disque"""
+        done = threading.Event()
+        self._pending.put(("flush", done))
+        return done.wait(timeout)
+
+    def close(self):
+        self._stopped.set()
+        self._writer.join(timeout=5.0)
+
+    def ttl_for(self, query):
+        """Durée de vie selon la classe de requête (None = pas de cache)"""
+        q = query.lower()
+        if not self.is_cacheable(q):
+            return None
+        # Réponses qui vieillissent vite (prix, scores, "latest"...)
+        semi_dynamic_words = ["price", "score", "latest", "stock", "prix", "dernier"]
+        if any(w in q for w in semi_dynamic_words):
+            return SEMI_DYNAMIC_TTL
+        return DEFAULT_TTL
 
     def is_cacheable(self, query):
         # On ne cache pas les commandes dynamiques (heure, météo, news...)
         dynamic_words = ["time", "hour", "weather", "news", "date", "today", "now"]
-        return not any(w in query.lower() for w in dynamic_words)
\ No newline at end of file
+        return not any(w in query.lower() for w in dynamic_words)
@@ -0,0 +1,84 @@
+"""Benchmark: time-to-first-audio (TTFA) of cache hits, monolithic vs sentence replay.
+
+Before: the cached answer was sent as one chunk and spoken in one TTS call,
+so the first audio waited for the whole answer to be synthesized.
+After: the cache replays pre-split sentences, the client synthesizes the first one.
+
+TTFA is the synthesis time of the first spoken unit. It uses a linear model
+of edge-tts latency by default, or real edge-tts calls with --edge.
+
+Usage: python server/tests/bench_cached_replay.py [--edge]
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+sys.path.insert(0, os.path.join(ROOT, "server"))
+sys.path.insert(0, os.path.join(ROOT, "client"))
+
+from smart_cache import SmartCache
+from streaming_tts import StreamingAI
+
+ANSWERS = [
+    "Paris is the capital of France. It has about 2.1 million inhabitants. The Eiffel Tower is its most famous landmark.",
+    "I'm functioning as expected, thank you! How about yourself?",
+    "Water boils at 100 degrees Celsius at sea level. At higher altitudes it boils at a lower temperature, because air pressure is lower.",
+    "Spiders have eight legs. Insects, by contrast, have six. Both are arthropods.",
+]
+
+BASE_LATENCY = 0.25 # Connection + first byte (s)
+PER_CHAR = 0.006    # Synthesis cost per character (s)
+
+
+class RecordingTTS:
+    def __init__(self):
+        self.units = []
+
+    def speak_immediate(self, text):
+        self.units.append(text)
+
+
+def synth_time(text, edge=False):
+    if not edge:
+        return BASE_LATENCY + PER_CHAR * len(text)
+    import edge_tts
+
+    async def run():
+        start = time.perf_counter()
+        communicate = edge_tts.Communicate(text, "en-US-AriaNeural")
+        with tempfile.NamedTemporaryFile(delete=False, suffix=".mp3") as tmp:
+            path = tmp.name
+        await communicate.save(path) # Same path as StreamingTTS._generate_audio
+        os.unlink(path)
+        return time.perf_counter() - start
+
+    return asyncio.run(run())
+
+
+def main():
+    edge = "--edge" in sys.argv
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = SmartCache(db_file=os.path.join(tmp, "cache.db"), legacy_file=None)
+        print(f"{'before (ms)':>12} {'after (ms)':>11}  first unit")
+        for i, answer in enumerate(ANSWERS):
+            cache.set(f"question {i}", answer)
+
+            before = synth_time(answer, edge) # One chunk, one TTS call
+
+            tts = RecordingTTS()
+            ai = StreamingAI(tts)
+            for segment in cache.get_segments(f"question {i}"): # What /ws now streams on a hit
+                ai.process_token(segment)
+                ai.end_unit() # Each cached segment is followed by a sentence_end frame
+            ai.flush_buffer()
+            after = synth_time(tts.units[0], edge)
+
+            print(f"{before * 1000:12.0f} {after * 1000:11.0f}  {tts.units[0]!r}")
+        cache.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""Microbenchmark: tokens/sec decoded from a local fake Ollama server.
+
+Compares the legacy path (new requests.post per query + json.loads per line)
+with the pooled OptimizedOllama client and its incremental NDJSON decoder.
+
+Usage: python server/tests/bench_ollama_stream.py
+"""
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+os.environ.pop("GROQ_API_KEY", None) # Force the Ollama path
+
+import ndjson
+from ndjson import NDJSONDecoder
+from optimized_ollama import OptimizedOllama
+
+TOKENS = 500
+QUERIES = 50
+
+
+def token_lines(n=TOKENS):
+    lines = [json.dumps({"model": "phi3:mini", "message": {"role": "assistant", "content": f" tok{i}"}, "done": False}).encode() + b"\n"
+             for i in range(n)]
+    lines.append(json.dumps({"model": "phi3:mini", "done": True, "eval_count": n}).encode() + b"\n")
+    return lines
+
+
+class FakeOllama(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1" # Keep-alive
+    disable_nagle_algorithm = True # Like Ollama's Go server
+    connections = 0
+    lines = token_lines()
+
+    def setup(self):
+        FakeOllama.connections += 1
+        super().setup()
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        body = b'{"version": "fake"}'
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for line in self.lines: # One chunk per line, like Ollama
+            self.wfile.write(b"%x\r\n%s\r\n" % (len(line), line))
+        self.wfile.write(b"0\r\n\r\n")
+
+
+def legacy_streams(base_url):
+    """Ancien chemin: nouvelle connexion + json.loads par ligne"""
+    tokens, ttfts = 0, []
+    for _ in range(QUERIES):
+        start = time.perf_counter()
+        first = True
+        with requests.post(f"{base_url}/api/chat", json={"model": "phi3:mini"}, stream=True) as response:
+            for line in response.iter_lines():
+                if line:
+                    try:
+                        data = json.loads(line)
+                        if "message" in data and "content" in data["message"]:
+                            if first:
+                                ttfts.append(time.perf_counter() - start)
+                                first = False
+                            tokens += 1
+                    except:
+                        pass
+    return tokens, ttfts
+
+
+async def pooled_streams(ollama):
+    tokens, ttfts = 0, []
+    for i in range(QUERIES):
+        start = time.perf_counter()
+        first = True
+        async for _ in ollama.chat_streaming(f"question {i}"):
+            if first:
+                ttfts.append(time.perf_counter() - start)
+                first = False
+            tokens += 1
+    await ollama.aclose()
+    return tokens, ttfts
+
+
+def bench_decoder_only():
+    payload = b"".join(token_lines(20000))
+    chunks = [payload[i:i + 256] for i in range(0, len(payload), 256)]
+
+    start = time.perf_counter()
+    tokens = 0
+    for line in payload.splitlines():
+        data = json.loads(line)
+        if "message" in data and "content" in data["message"]:
+            tokens += 1
+    legacy = tokens / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    decoder = NDJSONDecoder()
+    tokens = 0
+    for chunk in chunks:
+        for data in decoder.feed(chunk):
+            if data.get("message", {}).get("content"):
+                tokens += 1
+    incremental = tokens / (time.perf_counter() - start)
+    parser = "orjson, zero-copy" if ndjson._ZERO_COPY else "json fallback, one bytes copy per line"
+    print(f"Decoder only  | json.loads/line: {legacy:,.0f} tok/s | NDJSONDecoder ({parser}): {incremental:,.0f} tok/s")
+
+
+def main():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeOllama)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    runs = [
+        ("Legacy", lambda: legacy_streams(base_url)),
+        ("Pooled", lambda: asyncio.run(pooled_streams(OptimizedOllama(base_url=base_url)))),
+    ]
+    for name, run in runs:
+        FakeOllama.connections = 0
+        start = time.perf_counter()
+        tokens, ttfts = run()
+        elapsed = time.perf_counter() - start
+        ttfts.sort()
+        print(f"{name:<13} | {tokens / elapsed:,.0f} tok/s | TTFT p50 {ttfts[len(ttfts) // 2] * 1000:.2f} ms"
+              f" | {FakeOllama.connections} connections for {QUERIES} queries")
+
+    bench_decoder_only()
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
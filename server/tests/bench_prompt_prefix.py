@@ -0,0 +1,79 @@
+"""Benchmark: Ollama prompt-eval time on consecutive queries, before/after the stable prefix.
+
+"before" puts the minute-resolution date at the top of the system prompt (the
+old layout, one minute apart per query), "after" uses prompting.build_messages
+(static system prompt, date suffix before the user turn). Ollama reports in
+its done frame how many prompt tokens it had to evaluate: tokens found in its
+KV cache are skipped.
+
+Needs a running Ollama with the model pulled (default phi3:mini).
+Usage: python server/tests/bench_prompt_prefix.py [model] [queries]
+"""
+import asyncio
+import datetime
+import os
+import statistics
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+os.environ.pop("GROQ_API_KEY", None) # Force the Ollama path
+
+from optimized_ollama import NUM_CTX, OptimizedOllama
+from prompting import SYSTEM_PROMPT, build_messages, dynamic_context
+
+QUESTIONS = [
+    "What is the capital of France?", "Give me a synonym for fast.", "How many legs does a spider have?",
+    "Name a primary colour.", "What is two plus two?", "Say hello in Spanish.",
+    "What is the boiling point of water?", "Name a planet.", "What is the opposite of hot?",
+    "Give me a fruit that is yellow.",
+]
+OPTIONS = {"num_ctx": NUM_CTX, "temperature": 0.6, "top_k": 50, "top_p": 0.9, "num_predict": 16}
+
+
+def before(query, now):
+    header, rest = SYSTEM_PROMPT.split("\n", 1)
+    return [
+        {"role": "system", "content": f"{header}\nCurrent Date: {now:%Y-%m-%d %H:%M}\n{rest}"},
+        {"role": "user", "content": query},
+    ]
+
+
+def after(query, now):
+    return build_messages(query, context=dynamic_context(now))
+
+
+async def run(ollama, layout, queries):
+    start = datetime.datetime.now()
+    evals = []
+    for i in range(queries + 1):
+        timings = {}
+        now = start + datetime.timedelta(minutes=i) # One minute between queries
+        messages = layout(QUESTIONS[i % len(QUESTIONS)], now)
+        async for _ in ollama.chat_streaming(None, model_type="fast", messages=messages, timings=timings,
+                                             options=OPTIONS, keep_alive=ollama.keep_alive):
+            pass
+        if i: # First query only fills the cache
+            evals.append((timings.get("prompt_eval_count", 0), timings.get("prompt_eval_duration", 0) / 1e6))
+    return evals
+
+
+async def main():
+    model = sys.argv[1] if len(sys.argv) > 1 else "phi3:mini"
+    queries = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    ollama = OptimizedOllama()
+    ollama.tiers["fast"] = [model]
+    ollama.router = type(ollama.router)(ollama.tiers, priors={"": (1.5, 30.0)})
+    if not await ollama.warm_up(model):
+        print(f"Ollama not reachable or {model} missing")
+        return
+    print(f"{model}, {queries} consecutive queries, one minute apart")
+    for name, layout in (("before (date in system prompt)", before), ("after  (static prefix)", after)):
+        evals = await run(ollama, layout, queries)
+        counts, ms = zip(*evals)
+        print(f"{name}: {statistics.mean(counts):5.1f} prompt tokens evaluated | "
+              f"prompt eval p50 {statistics.median(ms):6.1f} ms, mean {statistics.mean(ms):6.1f} ms")
+    await ollama.aclose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,91 @@
+"""Benchmark: streaming sentence segmentation, legacy client scan vs SentenceSegmenter.
+
+Legacy is the old StreamingAI.process_token: string concatenation of the
+buffer, several any() scans per token and a regex split of the whole buffer
+on each punctuation token. Measures tokens/s on a long answer streamed in
+~4-character tokens, and boundary accuracy on the test corpus.
+
+Usage: python server/tests/bench_segmenter.py
+"""
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from segmenter import SentenceSegmenter
+from test_segmenter import CORPUS
+
+SENTENCE_SPLIT = re.compile(r'(?<=[.!?])\s+|\n+')
+SENTENCE_END = re.compile(r'[.!?]\s*$')
+
+
+class Legacy:
+    def __init__(self):
+        self.current_buffer = ""
+        self.units = []
+
+    def process_token(self, token):
+        self.current_buffer += token
+        is_sentence_end = any(p in token for p in ['.', '!', '?', '\n'])
+        is_sub_clause = any(p in token for p in [',', ':', ';'])
+        if is_sentence_end:
+            sentences = SENTENCE_SPLIT.split(self.current_buffer)
+            self.current_buffer = "" if SENTENCE_END.search(sentences[-1]) else sentences.pop()
+            self.units.extend(sentences)
+        elif is_sub_clause and len(self.current_buffer) > 40:
+            self.units.append(self.current_buffer)
+            self.current_buffer = ""
+
+    def flush(self):
+        if self.current_buffer.strip():
+            self.units.append(self.current_buffer)
+        return [u.strip() for u in self.units if u.strip()]
+
+
+def segment(text, size=4, clause_min=None):
+    segmenter = SentenceSegmenter(clause_min=clause_min)
+    units, current = [], []
+    for i in range(0, len(text), size):
+        for piece, kind in segmenter.feed(text[i:i + size]):
+            current.append(piece)
+            if kind:
+                units.append("".join(current))
+                current = []
+    if segmenter.flush():
+        units.append("".join(current))
+    return [u.strip() for u in units if u.strip()]
+
+
+def legacy_segment(text, size=4):
+    legacy = Legacy()
+    for i in range(0, len(text), size):
+        legacy.process_token(text[i:i + size])
+    return legacy.flush()
+
+
+def throughput(label, text):
+    tokens = len(text) // 4
+    print(f"{label}: {len(text)} chars, {tokens} tokens of 4 chars")
+    for name, fn in (("legacy   ", lambda: legacy_segment(text)),
+                     ("segmenter", lambda: segment(text, clause_min=40))):
+        start = time.perf_counter()
+        for _ in range(5):
+            fn()
+        elapsed = (time.perf_counter() - start) / 5
+        print(f"  {name}: {tokens / elapsed / 1000:7.0f} k tokens/s ({elapsed / tokens * 1e6:.2f} µs/token)")
+
+
+def main():
+    throughput("prose", " ".join(t for t, _ in CORPUS) * 40)
+    # One long unit full of decimals: every "." token made the legacy code re-split the whole buffer
+    throughput("figures", "Readings were " + " ".join(f"{i}.5 volts and" for i in range(2000)) + " done.")
+
+    for name, fn in (("legacy   ", legacy_segment), ("segmenter", segment)):
+        exact = sum(fn(t) == [u.strip() for u in expected] for t, expected in CORPUS)
+        print(f"{name}: {exact}/{len(CORPUS)} corpus texts segmented exactly")
+
+
+if __name__ == "__main__":
+    main()
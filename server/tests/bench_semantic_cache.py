@@ -0,0 +1,97 @@
+"""Benchmark: paraphrase hit rate and lookup latency of SmartCache's semantic layer.
+
+Usage: python server/tests/bench_semantic_cache.py [threshold]
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from smart_cache import SmartCache
+
+# Cached question -> paraphrases a voice user might say instead
+PARAPHRASES = {
+    "what's the capital of France": ["what is the capital of France?", "What is the capital of France", "the capital of france"],
+    "how are you doing": ["how are you doing today sonia", "how are you doing?", "sonia how are you doing"],
+    "who wrote Romeo and Juliet": ["who wrote romeo and juliet?", "tell me who wrote Romeo & Juliet", "who is it that wrote romeo and juliet"],
+    "how tall is the Eiffel tower": ["how tall is the eiffel tower?", "what's the height of the Eiffel tower", "how tall's the eiffel tower"],
+    "what is the speed of light": ["what's the speed of light", "speed of light?", "tell me the speed of light"],
+    "how many legs does a spider have": ["how many legs do spiders have", "how many legs has a spider", "a spider has how many legs"],
+    "what is the boiling point of water": ["what's the boiling point of water?", "boiling point of water", "water boiling point"],
+    "who painted the Mona Lisa": ["who painted mona lisa", "who was the painter of the Mona Lisa", "who painted the mona lisa?"],
+    "quelle est la capitale de l'Espagne": ["c'est quoi la capitale de l'Espagne", "quelle est la capitale de l espagne ?", "la capitale de l'Espagne"],
+    "what is photosynthesis": ["what's photosynthesis", "explain photosynthesis", "what is photosynthesis exactly"],
+    "how do I make pancakes": ["how do you make pancakes", "how can I make pancakes", "how to make pancakes"],
+    "what is the largest planet": ["what's the largest planet", "which planet is the largest", "the largest planet?"],
+    "is it safe to eat raw chicken": ["is it safe to eat raw chicken?", "is eating raw chicken safe"],
+    "convert 10 miles to km": ["convert 10 miles to km please", "convert ten miles to km"],
+}
+
+# Different questions that share most words with a cached one: must miss
+NEGATIVES = [
+    "what's the capital of Spain", "who wrote Hamlet", "how tall is the Empire State building",
+    "what is the speed of sound", "how many legs does an ant have", "what is the boiling point of milk",
+    "who painted the Sistine chapel", "quelle est la capitale de l'Italie", "what is the smallest planet",
+    "how do I make crepes", "where is the Eiffel tower", "who are you", "what is the freezing point of water",
+    "how are you feeling", "what is gravity",
+    # Same words plus a negation, an extra word, a repeat, or swapped arguments
+    "is it not safe to eat raw chicken", "how tall is the eiffel tower in feet", "what is 2 plus 2 plus 2",
+    "convert 10 km to miles", "who painted the Mona Lisa first", "how many legs does a spider not have",
+    "what is the speed of light in water", "how do I not make pancakes",
+]
+
+FILLER = 5000
+
+
+def main():
+    threshold = float(sys.argv[1]) if len(sys.argv) > 1 else 0.85
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = SmartCache(db_file=os.path.join(tmp, "cache.db"), legacy_file=None,
+                           max_entries=FILLER * 2, semantic_threshold=threshold)
+        for i in range(FILLER): # Realistic index size
+            cache.set(f"random filler question number {i} about topic {i * 31 % 97}", "filler")
+        for question in PARAPHRASES:
+            cache.set(question, f"answer: {question}")
+
+        hits, wrong, latencies = 0, 0, []
+        misses = []
+        for question, variants in PARAPHRASES.items():
+            for variant in variants:
+                start = time.perf_counter()
+                answer = cache.get(variant)
+                latencies.append(time.perf_counter() - start)
+                if answer == f"answer: {question}":
+                    hits += 1
+                elif answer is not None:
+                    wrong += 1
+                else:
+                    misses.append(variant)
+
+        false_hits = []
+        for question in NEGATIVES:
+            start = time.perf_counter()
+            answer = cache.get(question)
+            latencies.append(time.perf_counter() - start)
+            if answer is not None:
+                false_hits.append(question)
+
+        start = time.perf_counter()
+        for question in PARAPHRASES:
+            cache.get(question)
+        exact = (time.perf_counter() - start) / len(PARAPHRASES)
+        cache.close()
+
+    total = sum(len(v) for v in PARAPHRASES.values())
+    latencies.sort()
+    print(f"Threshold {threshold} | index size {FILLER + len(PARAPHRASES):,}")
+    print(f"Paraphrase hit rate : {hits}/{total} ({hits / total:.0%}) | wrong answers: {wrong}")
+    print(f"False hits          : {len(false_hits)}/{len(NEGATIVES)} {false_hits}")
+    print(f"Missed paraphrases  : {misses}")
+    print(f"Semantic lookup     : p50 {latencies[len(latencies) // 2] * 1000:.2f} ms | p99 {latencies[-1] * 1000:.2f} ms")
+    print(f"Exact lookup        : {exact * 1e6:.1f} us")
+
+
+if __name__ == "__main__":
+    main()
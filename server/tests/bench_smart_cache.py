@@ -0,0 +1,92 @@
+"""Benchmark: SmartCache.set/get cost at 10k and 100k entries.
+
+Compares the legacy store (whole JSON file rewritten on every set) with the
+SQLite WAL store (in-memory LRU index + write-behind batches).
+
+Usage: python server/tests/bench_smart_cache.py
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from smart_cache import SmartCache
+
+SIZES = [10_000, 100_000]
+ANSWER = "Paris is the capital of France. It is known for the Eiffel Tower."
+
+
+def percentile(samples, p):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * p))]
+
+
+def bench_legacy(tmp, n, sets=5):
+    """Ancien SmartCache.set: json.dump(indent=2) de tout le dict à chaque miss"""
+    path = os.path.join(tmp, f"legacy_{n}.json")
+    cache = {f"question number {i}": ANSWER for i in range(n)}
+    samples = []
+    for i in range(sets):
+        start = time.perf_counter()
+        cache[f"new question {i}"] = ANSWER
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(cache, f, ensure_ascii=False, indent=2)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def bench_sqlite(tmp, n, sets=2000):
+    db = os.path.join(tmp, f"cache_{n}.db")
+    cache = SmartCache(db_file=db, legacy_file=None, max_entries=n, max_bytes=n * len(ANSWER))
+    for i in range(n):
+        cache.set(f"question number {i}", ANSWER)
+    cache.flush(timeout=120)
+
+    set_samples = []
+    for i in range(sets): # Past max_entries: every set also evicts
+        start = time.perf_counter()
+        cache.set(f"new question {i}", ANSWER)
+        set_samples.append(time.perf_counter() - start)
+
+    get_samples = []
+    for i in range(sets):
+        start = time.perf_counter()
+        cache.get(f"question number {i * 7 % n}")
+        get_samples.append(time.perf_counter() - start)
+
+    miss_samples = [] # Exact misses: each one also goes through the semantic index
+    for i in range(sets):
+        start = time.perf_counter()
+        cache.get(f"question number {n + i} please")
+        miss_samples.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    cache.flush(timeout=120)
+    flush_time = time.perf_counter() - start
+    cache.close()
+
+    start = time.perf_counter()
+    SmartCache(db_file=db, legacy_file=None, max_entries=n, max_bytes=n * len(ANSWER)).close()
+    load_time = time.perf_counter() - start
+    return set_samples, get_samples, miss_samples, flush_time, load_time
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in SIZES:
+            legacy = bench_legacy(tmp, n)
+            sets, gets, misses, flush_time, load_time = bench_sqlite(tmp, n)
+            print(f"--- {n:,} entries ---")
+            print(f"Legacy JSON set   | mean {sum(legacy) / len(legacy) * 1000:9.2f} ms")
+            print(f"SQLite set        | mean {sum(sets) / len(sets) * 1e6:9.2f} us | p99 {percentile(sets, 0.99) * 1e6:.2f} us")
+            print(f"SQLite get        | mean {sum(gets) / len(gets) * 1e6:9.2f} us | p99 {percentile(gets, 0.99) * 1e6:.2f} us")
+            print(f"SQLite miss       | mean {sum(misses) / len(misses) * 1e6:9.2f} us | p99 {percentile(misses, 0.99) * 1e6:.2f} us")
+            print(f"Write-behind flush| {len(sets)} sets + evictions in {flush_time * 1000:.1f} ms (off request path)")
+            print(f"Startup load      | {load_time * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Benchmark: /chat stream duration and HTTP chunk count, fixed sleep vs coalescing.
+
+Drives a StreamingResponse directly over ASGI (no socket) with a fake backend
+emitting a 300-token answer, and counts the body messages the server sends.
+"legacy" is the old generate_stream (one chunk per token + asyncio.sleep(0.01)),
+"coalesced" goes through token_coalescer.coalesce.
+
+Usage: python server/tests/bench_token_coalescing.py
+"""
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from fastapi.responses import StreamingResponse
+
+from token_coalescer import coalesce
+
+TOKENS = 300
+WORDS = "The quick brown fox jumps over the lazy dog and keeps running".split()
+
+
+async def fake_backend(token_delay):
+    """~300 tokens, a sentence end every 15 tokens"""
+    for i in range(TOKENS):
+        if token_delay:
+            await asyncio.sleep(token_delay)
+        else:
+            await asyncio.sleep(0) # Still an async source: hand the loop back
+        yield (" " + WORDS[i % len(WORDS)]) + ("." if i % 15 == 14 else "")
+
+
+async def legacy(token_delay):
+    async for token in fake_backend(token_delay):
+        yield token
+        await asyncio.sleep(0.01) # Yield control
+
+
+async def coalesced(token_delay):
+    async for chunk in coalesce(fake_backend(token_delay)):
+        yield chunk
+
+
+async def run(stream):
+    chunks = 0
+    first = None
+    start = time.perf_counter()
+
+    async def receive():
+        await asyncio.Event().wait() # Client never disconnects
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal chunks, first
+        if message["type"] == "http.response.body" and message.get("body"):
+            chunks += 1
+            if first is None:
+                first = time.perf_counter() - start
+
+    scope = {"type": "http", "asgi": {"version": "3.0", "spec_version": "2.4"}, "http_version": "1.1",
+             "method": "POST", "path": "/chat", "headers": []}
+    await StreamingResponse(stream, media_type="text/plain")(scope, receive, send)
+    return time.perf_counter() - start, first, chunks
+
+
+async def main():
+    print(f"{TOKENS}-token answer")
+    for label, delay in (("cloud backend, 3 ms/token", 0.003), ("local backend, 25 ms/token", 0.025),
+                         ("instant backend", 0.0)):
+        print(label)
+        for name, factory in (("legacy   ", legacy), ("coalesced", coalesced)):
+            total, ttft, chunks = await run(factory(delay))
+            print(f"  {name}: stream {total * 1000:7.0f} ms | first chunk {ttft * 1000:5.1f} ms | {chunks:3d} HTTP chunks")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
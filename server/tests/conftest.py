@@ -0,0 +1,22 @@
+import importlib.util
+import os
+import sys
+
+import pytest
+
+SERVER_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+# Server modules use flat imports (run as `python server/main.py`)
+sys.path.insert(0, SERVER_DIR)
+
+
+@pytest.fixture(scope="session")
+def server_main():
+    """server/main.py, chargé par chemin: client/main.py porte le même nom quand les deux suites tournent ensemble"""
+    module = sys.modules.get("server_main")
+    if module is None:
+        spec = importlib.util.spec_from_file_location("server_main", os.path.join(SERVER_DIR, "main.py"))
+        module = importlib.util.module_from_spec(spec)
+        sys.modules["server_main"] = module
+        spec.loader.exec_module(module)
+    return module
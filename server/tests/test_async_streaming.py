@@ -0,0 +1,61 @@
+import asyncio
+import json
+import time
+
+import httpx
+
+from optimized_ollama import OptimizedOllama, SmartModelSelector
+
+TOKENS_PER_STREAM = 20
+TOKEN_DELAY = 0.01 # Simulated generation latency per token
+
+
+def fake_ollama_transport():
+    """Fake Ollama /api/chat: NDJSON stream, one line per token"""
+    async def handler(request):
+        async def body():
+            for i in range(TOKENS_PER_STREAM):
+                await asyncio.sleep(TOKEN_DELAY)
+                line = {"message": {"role": "assistant", "content": f"tok{i} "}, "done": False}
+                yield (json.dumps(line) + "\n").encode()
+            yield b'{"done": true}\n'
+        return httpx.Response(200, content=body())
+    return httpx.MockTransport(handler)
+
+
+async def consume(selector, query):
+    tokens = []
+    async for token in selector.smart_chat(query):
+        tokens.append(token)
+    return tokens
+
+
+def run_clients(clients):
+    ollama = OptimizedOllama(transport=fake_ollama_transport())
+    selector = SmartModelSelector(ollama)
+
+    async def main():
+        start = time.perf_counter()
+        results = await asyncio.gather(*(consume(selector, f"question {i}") for i in range(clients)))
+        return results, time.perf_counter() - start
+
+    return asyncio.run(main())
+
+
+def test_stream_yields_tokens(monkeypatch):
+    monkeypatch.delenv("GROQ_API_KEY", raising=False)
+    results, _ = run_clients(1)
+    assert results[0] == [f"tok{i} " for i in range(TOKENS_PER_STREAM)]
+
+
+def test_concurrent_streams_interleave(monkeypatch):
+    monkeypatch.delenv("GROQ_API_KEY", raising=False)
+    _, single = run_clients(1)
+    results, multi = run_clients(8)
+
+    assert all(len(r) == TOKENS_PER_STREAM for r in results)
+    single_tps = TOKENS_PER_STREAM / single
+    multi_tps = 8 * TOKENS_PER_STREAM / multi
+    print(f"1 client: {single_tps:.0f} tok/s | 8 clients: {multi_tps:.0f} tok/s")
+    # Serialized streams would keep aggregate throughput flat
+    assert multi_tps > 4 * single_tps
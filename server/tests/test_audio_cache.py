@@ -0,0 +1,48 @@
+import asyncio
+
+from audio_cache import AudioCache, audio_key
+from tts_engine import ToneTTSEngine
+
+
+def synthesize(engine, text, voice="en-US-AriaNeural", rate="+0%"):
+    async def main():
+        return b"".join([chunk async for chunk in engine.stream(text, voice, rate)])
+    return asyncio.run(main())
+
+
+def test_tone_engine_is_deterministic():
+    engine = ToneTTSEngine()
+    a = synthesize(engine, "Hello there.")
+    assert a == synthesize(engine, "Hello there.") and a.startswith(b"RIFF")
+    assert a != synthesize(engine, "Hello there.", voice="fr-FR-DeniseNeural")
+    assert len(synthesize(engine, "Hello there.", rate="+50%")) < len(a)
+
+
+def test_key_covers_text_voice_rate_and_engine():
+    key = audio_key("Hello  there.", "v1", "+0%")
+    assert key == audio_key(" Hello there. ", "v1", "+0%") # Whitespace-normalized
+    assert len({key, audio_key("Hello there.", "v2", "+0%"), audio_key("Hello there.", "v1", "+10%"),
+                audio_key("Hello there.", "v1", "+0%", engine="tone")}) == 4
+
+
+def test_memory_and_disk_hits_survive_restart(tmp_path):
+    cache = AudioCache(directory=str(tmp_path))
+    assert cache.get("k1", "wav") is None
+    cache.put("k1", "wav", b"audio-1")
+    assert cache.get("k1", "wav") == b"audio-1"
+    reopened = AudioCache(directory=str(tmp_path))
+    assert reopened.get("k1", "wav") == b"audio-1"
+    assert reopened.snapshot()["hits"] == {"memory": 0, "disk": 1}
+    assert reopened.get("k1", "wav") == b"audio-1" # Promoted to memory
+    assert reopened.snapshot()["hits"]["memory"] == 1
+
+
+def test_lru_size_limits(tmp_path):
+    cache = AudioCache(directory=str(tmp_path), max_memory_bytes=250, max_disk_bytes=350)
+    for i in range(5):
+        cache.put(f"k{i}", "wav", bytes([i]) * 100)
+        cache.get("k0", "wav") # Keep k0 hot
+    assert cache.memory_bytes <= 250 and cache.disk_bytes <= 350
+    assert "k0.wav" in cache.memory and "k0.wav" in cache.disk
+    assert sorted(p.name for p in tmp_path.iterdir()) == sorted(cache.disk)
+    assert cache.get("k1", "wav") is None # Least recently used: evicted everywhere
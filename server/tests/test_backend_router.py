@@ -0,0 +1,93 @@
+import asyncio
+
+import pytest
+
+from backend_router import BackendRouter, CircuitBreaker
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_router(clock=None):
+    tiers = {"fast": ["groq/llama-3.1-8b-instant", "phi3:mini"]}
+    return BackendRouter(tiers, priors={"groq/": (0.4, 300.0), "": (1.5, 30.0)}, clock=clock or FakeClock(),
+                         failure_threshold=2, reset_timeout=30.0)
+
+
+async def tokens(*items, error=None, delay=0.0):
+    for item in items:
+        await asyncio.sleep(delay)
+        yield item
+    if error:
+        raise error
+
+
+def consume(router, model, factory, timeout=None):
+    async def main():
+        return [t async for t in router.track(model, factory, timeout)]
+    return asyncio.run(main())
+
+
+def test_breaker_opens_then_half_open_probe_closes_it():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30.0, clock=clock)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open" and not breaker.allow()
+
+    clock.now = 31.0
+    assert breaker.state == "half_open" and breaker.allow()
+    breaker.begin()
+    assert not breaker.allow() # One probe at a time
+    breaker.record_success()
+    assert breaker.state == "closed"
+
+
+def test_failed_probe_reopens():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30.0, clock=clock)
+    breaker.record_failure()
+    clock.now = 31.0
+    breaker.begin()
+    breaker.record_failure()
+    assert breaker.state == "open"
+
+
+def test_router_prefers_prior_then_skips_open_backend():
+    router = make_router()
+    assert router.rank("fast") == ["groq/llama-3.1-8b-instant", "phi3:mini"]
+
+    for _ in range(2):
+        with pytest.raises(RuntimeError):
+            consume(router, "groq/llama-3.1-8b-instant", lambda: tokens(error=RuntimeError("503")))
+    assert router.rank("fast") == ["phi3:mini"]
+    assert router.snapshot()["backends"]["groq/llama-3.1-8b-instant"]["state"] == "open"
+
+
+def test_router_reranks_on_measured_latency():
+    router = make_router()
+    for _ in range(5):
+        consume(router, "groq/llama-3.1-8b-instant", lambda: tokens("a", "b", delay=0.05))
+        consume(router, "phi3:mini", lambda: tokens("a", "b", "c", "d"))
+    assert router.rank("fast")[0] == "phi3:mini"
+
+
+def test_cancelled_after_deadline_counts_as_timeout():
+    router = make_router()
+
+    async def main():
+        gen = router.track("phi3:mini", lambda: tokens("a", delay=1.0), timeout=0.01)
+        task = asyncio.ensure_future(gen.__anext__())
+        await asyncio.sleep(0.05)
+        task.cancel() # Lost the hedge race
+        await asyncio.gather(task, return_exceptions=True)
+
+    asyncio.run(main())
+    health = router.health["phi3:mini"]
+    assert health.error_rate > 0 and health.breaker.failures == 1
@@ -0,0 +1,73 @@
+import asyncio
+
+import pytest
+
+from hedging import HedgeStats, hedged_stream
+
+
+class FakeBackend:
+    def __init__(self, first_delay=0.0, tokens=("a", "b", "c"), error=None):
+        self.first_delay = first_delay
+        self.tokens = tokens
+        self.error = error
+        self.started = False
+        self.closed = False
+
+    async def generate(self):
+        self.started = True
+        try:
+            await asyncio.sleep(self.first_delay)
+            if self.error:
+                raise self.error
+            for token in self.tokens:
+                yield token
+                await asyncio.sleep(0.001)
+        finally:
+            self.closed = True
+
+
+def run(primary, secondary, budget=0.05):
+    stats = HedgeStats()
+
+    async def main():
+        pair = lambda name, b: (name, b.generate) if b else None
+        return [t async for t in hedged_stream(pair("groq", primary), pair("phi3", secondary), budget, stats)]
+
+    return asyncio.run(main()), stats
+
+
+def test_fast_primary_never_starts_secondary():
+    primary, secondary = FakeBackend(), FakeBackend(tokens=("x",))
+    tokens, stats = run(primary, secondary)
+    assert tokens == ["a", "b", "c"]
+    assert not secondary.started
+    assert stats.hedged == 0 and stats.wins["primary"] == 1
+
+
+def test_slow_primary_is_hedged_and_cancelled():
+    primary, secondary = FakeBackend(first_delay=1.0), FakeBackend(tokens=("x", "y"))
+    tokens, stats = run(primary, secondary)
+    assert tokens == ["x", "y"]
+    assert primary.closed # Loser's upstream stream was closed
+    assert stats.hedged == 1 and stats.wins["secondary"] == 1
+    assert stats.snapshot()["ttft_ms"]["phi3"]["n"] == 1
+
+
+def test_primary_error_fails_over_immediately():
+    primary, secondary = FakeBackend(error=RuntimeError("rate limited")), FakeBackend(tokens=("x",))
+    tokens, stats = run(primary, secondary, budget=10.0)
+    assert tokens == ["x"]
+    assert stats.failovers == 1 and stats.hedged == 0
+
+
+def test_all_backends_failing_raises():
+    with pytest.raises(RuntimeError, match="offline"):
+        run(FakeBackend(error=RuntimeError("rate limited")), FakeBackend(error=RuntimeError("offline")))
+
+
+def test_deadline_follows_p95_once_enough_samples():
+    stats = HedgeStats(min_samples=20)
+    assert stats.deadline("groq", 0.8) == 0.8
+    for i in range(100):
+        stats.record_ttft("groq", i / 100)
+    assert stats.deadline("groq", 0.8) == 0.95
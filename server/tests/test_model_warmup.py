@@ -0,0 +1,66 @@
+import asyncio
+import json
+
+import httpx
+
+from model_warmup import ModelResidency
+from optimized_ollama import OptimizedOllama
+
+
+class FakeOllama:
+    """Fake /api/generate (loads a model) and /api/ps (lists loaded models)"""
+
+    def __init__(self, load_delay=0.05):
+        self.load_delay = load_delay
+        self.loaded = set()
+        self.generate_calls = []
+
+    async def handler(self, request):
+        if request.url.path == "/api/generate":
+            model = json.loads(request.content)["model"]
+            self.generate_calls.append(model)
+            await asyncio.sleep(self.load_delay)
+            self.loaded.add(model if ":" in model else f"{model}:latest")
+            return httpx.Response(200, json={"done": True})
+        if request.url.path == "/api/ps":
+            return httpx.Response(200, json={"models": [{"name": m} for m in sorted(self.loaded)]})
+        return httpx.Response(404)
+
+
+def test_models_warm_up_in_background_then_report_online(monkeypatch):
+    monkeypatch.delenv("GROQ_API_KEY", raising=False)
+    fake = FakeOllama()
+
+    async def main():
+        ollama = OptimizedOllama(transport=httpx.MockTransport(fake.handler))
+        residency = ModelResidency(ollama, ["phi3:mini", "mistral-nemo"], refresh_interval=3600)
+        assert residency.overall() == "warming"
+        residency.start()
+        await asyncio.sleep(0.02)
+        assert residency.snapshot()["phi3:mini"]["state"] == "loading"
+        assert residency.overall() == "warming"
+        await asyncio.sleep(0.2)
+        status = residency.overall()
+        await residency.stop()
+        return status, residency.snapshot()
+
+    status, snapshot = asyncio.run(main())
+    assert status == "online"
+    assert fake.generate_calls == ["phi3:mini", "mistral-nemo"] # Priority order, one at a time
+    assert all(entry["load_ms"] is not None for entry in snapshot.values())
+
+
+def test_refresh_reloads_evicted_model(monkeypatch):
+    monkeypatch.delenv("GROQ_API_KEY", raising=False)
+    fake = FakeOllama(load_delay=0)
+
+    async def main():
+        ollama = OptimizedOllama(transport=httpx.MockTransport(fake.handler))
+        residency = ModelResidency(ollama, ["phi3:mini"])
+        await residency.refresh() # Not resident yet: loads it
+        fake.loaded.clear()       # Ollama evicted it
+        await residency.refresh()
+        return residency.overall()
+
+    assert asyncio.run(main()) == "online"
+    assert fake.generate_calls == ["phi3:mini", "phi3:mini"]
@@ -0,0 +1,30 @@
+import json
+
+from ndjson import NDJSONDecoder
+
+
+def ndjson(*objects):
+    return b"".join(json.dumps(o).encode() + b"\n" for o in objects)
+
+
+def test_lines_split_across_chunks():
+    payload = ndjson({"message": {"content": "Bon"}}, {"message": {"content": "jour"}}, {"done": True})
+    decoder = NDJSONDecoder()
+    objects = []
+    for i in range(0, len(payload), 7): # Arbitrary chunk boundaries
+        objects.extend(decoder.feed(payload[i:i + 7]))
+    assert [o.get("message", {}).get("content") for o in objects] == ["Bon", "jour", None]
+    assert objects[-1]["done"] is True
+
+
+def test_malformed_line_is_skipped():
+    decoder = NDJSONDecoder()
+    assert decoder.feed(b'{"a": 1}\nnot json\n\n{"b": 2}\n') == [{"a": 1}, {"b": 2}]
+
+
+def test_flush_without_trailing_newline():
+    decoder = NDJSONDecoder()
+    assert decoder.feed(b'{"a": 1}\n{"b": ') == [{"a": 1}]
+    decoder.feed(b"2}")
+    assert decoder.flush() == [{"b": 2}]
+    assert decoder.flush() == []
@@ -0,0 +1,56 @@
+import asyncio
+import datetime
+import json
+
+import httpx
+
+from optimized_ollama import OptimizedOllama, SmartModelSelector
+from prompting import SYSTEM_PROMPT, build_messages, dynamic_context
+
+
+def test_prefix_is_stable_across_minutes():
+    a = build_messages("hello", context=dynamic_context(datetime.datetime(2024, 5, 1, 10, 0)))
+    b = build_messages("hello", context=dynamic_context(datetime.datetime(2024, 5, 1, 10, 1)))
+    assert a[0] == b[0] == {"role": "system", "content": SYSTEM_PROMPT}
+    assert "Date" not in SYSTEM_PROMPT
+    # Only the date suffix differs, right before the user turn
+    assert a[-2] != b[-2] and a[-1] == b[-1]
+
+
+def test_history_extends_the_prefix():
+    history = [{"role": "user", "content": "hi"}, {"role": "assistant", "content": "Hello!"}]
+    first = build_messages("hi")
+    second = build_messages("how are you", history=history, context="Current Date: x")
+    assert second[:2] == [first[0], history[0]]
+    assert second[-1] == {"role": "user", "content": "how are you"}
+
+
+def test_smart_chat_sends_static_prefix_and_collects_timings(monkeypatch):
+    monkeypatch.delenv("GROQ_API_KEY", raising=False)
+    payloads = []
+
+    async def handler(request):
+        payloads.append(json.loads(request.content))
+        lines = [
+            {"message": {"role": "assistant", "content": "Hi"}, "done": False},
+            {"done": True, "prompt_eval_count": 12, "prompt_eval_duration": 3_000_000, "eval_count": 1},
+        ]
+        return httpx.Response(200, content="".join(json.dumps(l) + "\n" for l in lines).encode())
+
+    ollama = OptimizedOllama(transport=httpx.MockTransport(handler))
+
+    async def main():
+        timings = {}
+        tokens = [t async for t in ollama.chat_streaming("hello", timings=timings)]
+        async for _ in SmartModelSelector(ollama).smart_chat("hello"):
+            pass
+        await ollama.aclose()
+        return tokens, timings
+
+    tokens, timings = asyncio.run(main())
+    assert tokens == ["Hi"]
+    assert timings["prompt_eval_count"] == 12 and timings["model"] == "phi3:mini"
+    messages = payloads[1]["messages"]
+    assert messages[0]["content"] == SYSTEM_PROMPT
+    assert messages[-2]["content"].startswith("Current Date:")
+    assert payloads[1]["options"]["num_ctx"] == 4096
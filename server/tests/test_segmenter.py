@@ -0,0 +1,74 @@
+import random
+
+from segmenter import SentenceSegmenter, split_sentences
+
+# (text, expected speakable units)
+CORPUS = [
+    ("Paris is the capital. It has 2.1 million people!", ["Paris is the capital. ", "It has 2.1 million people!"]),
+    ("Mr. Smith met Dr. Who. They talked.", ["Mr. Smith met Dr. Who. ", "They talked."]),
+    ("Mrs. Jones and Prof. Lee agreed. Good.", ["Mrs. Jones and Prof. Lee agreed. ", "Good."]),
+    ("Use e.g. a fork. Or i.e. a spoon.", ["Use e.g. a fork. ", "Or i.e. a spoon."]),
+    ("J. K. Rowling wrote it. The U.S. Army won.", ["J. K. Rowling wrote it. ", "The U.S. Army won."]),
+    ("Apples, pears, etc. Then more.", ["Apples, pears, etc. ", "Then more."]),
+    ("Apples, pears, etc. and more.", ["Apples, pears, etc. and more."]),
+    ("Meet at 9 a.m. Then lunch.", ["Meet at 9 a.m. ", "Then lunch."]),
+    ("Pi is 3.14159. It never ends.", ["Pi is 3.14159. ", "It never ends."]),
+    ("It was built in 1889. It is tall.", ["It was built in 1889. ", "It is tall."]),
+    ("1. Preheat the oven.\n2. Bake it.", ["1. Preheat the oven.\n", "2. Bake it."]),
+    ("Wait... What? Really?! Ok.", ["Wait... ", "What? ", "Really?! ", "Ok."]),
+    ("He said \"Hi.\" Then left.", ["He said \"Hi.\" ", "Then left."]),
+    ("Use Node.js v1.2 now. Done", ["Use Node.js v1.2 now. ", "Done"]),
+    ("Is it raining? No. It is sunny.", ["Is it raining? ", "No. ", "It is sunny."]),
+    ("The answer is no. It is sunny today.", ["The answer is no. ", "It is sunny today."]),
+    ("Take the No. 5 bus. It is faster.", ["Take the No. 5 bus. ", "It is faster."]),
+    ("First line\nSecond line", ["First line\n", "Second line"]),
+    # Français
+    ("M. Dupont est là. Il attend.", ["M. Dupont est là. ", "Il attend."]),
+    ("Mme Durand et Mlle. Roux arrivent. Voilà.", ["Mme Durand et Mlle. Roux arrivent. ", "Voilà."]),
+    ("Quoi ? Non ! Il coûte 3,5 euros.", ["Quoi ? ", "Non ! ", "Il coûte 3,5 euros."]),
+    ("Voir cf. page 3. Ensuite, on part.", ["Voir cf. page 3. ", "Ensuite, on part."]),
+    ("Il mesure env. 300 mètres. Impressionnant.", ["Il mesure env. 300 mètres. ", "Impressionnant."]),
+    ("Il est né en 52 av. J.-C. à Rome.", ["Il est né en 52 av. J.-C. à Rome."]),
+    ("Il est 10h30. Le train part à 10:45.", ["Il est 10h30. ", "Le train part à 10:45."]),
+]
+
+
+def test_corpus_boundaries():
+    for text, expected in CORPUS:
+        assert split_sentences(text) == expected, text
+
+
+def stream_units(text, sizes):
+    """Rejoue text en tokens de tailles aléatoires, regroupe par frontière"""
+    segmenter = SentenceSegmenter(clause_min=None)
+    units, current, i = [], "", 0
+    while i < len(text):
+        size = next(sizes)
+        for piece, kind in segmenter.feed(text[i:i + size]):
+            current += piece
+            if kind:
+                units.append(current)
+                current = ""
+        i += size
+    for piece, kind in segmenter.flush():
+        units.append(current + piece)
+        current = ""
+    return units + ([current] if current else [])
+
+
+def test_token_splits_do_not_change_boundaries():
+    rng = random.Random(7)
+    sizes = iter(lambda: rng.randint(1, 6), None)
+    for text, expected in CORPUS:
+        assert stream_units(text, sizes) == expected, text
+
+
+def test_long_clauses_are_cut_early():
+    segmenter = SentenceSegmenter(clause_min=40)
+    text = "When you consider the number of stars in the sky, it is humbling, truly. Yes."
+    pieces = segmenter.feed(text) + segmenter.flush()
+    kinds = [(piece, kind) for piece, kind in pieces if kind]
+    assert kinds[0] == ("When you consider the number of stars in the sky, ", "clause")
+    assert "".join(piece for piece, _ in pieces) == text
+    # Short units and decimals with commas are left alone
+    assert [k for _, k in SentenceSegmenter().feed("Il coûte 3,5 euros, pas plus. ") if k] == ["sentence"]
@@ -0,0 +1,42 @@
+from semantic_index import SemanticIndex, content_words
+
+
+def build_index():
+    index = SemanticIndex(threshold=0.85)
+    for question in ["what's the capital of france", "how many legs does a spider have", "who wrote hamlet",
+                     "is it safe to eat raw chicken", "convert 10 miles to km", "how tall is the eiffel tower",
+                     "what is 2 plus 2"]:
+        index.add(question, question)
+    return index
+
+
+def test_paraphrases_hit():
+    index = build_index()
+    assert index.search("What is the capital of France?")[0] == "what's the capital of france"
+    assert index.search("how many legs do spiders have")[0] == "how many legs does a spider have"
+
+
+def test_near_miss_questions_do_not_hit():
+    index = build_index()
+    assert index.search("what's the capital of Spain")[0] is None
+    assert index.search("who wrote romeo and juliet")[0] is None
+    assert index.search("is it not safe to eat raw chicken")[0] is None # Negation
+    assert index.search("isn't it safe to eat raw chicken")[0] is None
+    assert index.search("convert 10 km to miles")[0] is None # Same words, swapped arguments
+    assert index.search("how tall is the eiffel tower in feet")[0] is None # Extra content word
+    assert index.search("what is 2 plus 2 plus 2")[0] is None # Repeated words count
+    assert index.search("where is the eiffel tower")[0] is None # Another question word
+    assert index.search("how tall's the Eiffel tower?")[0] == "how tall is the eiffel tower"
+
+
+def test_removed_entries_are_not_returned():
+    index = build_index()
+    index.remove("who wrote hamlet")
+    assert index.search("who wrote hamlet")[0] is None
+    index.add("who painted the mona lisa", "who painted the mona lisa")
+    assert index.search("who painted the Mona Lisa?")[0] == "who painted the mona lisa"
+
+
+def test_content_words_ignore_stopwords_and_plurals():
+    assert content_words("How many legs does the spider have?") == {"many", "leg", "spider"}
+    assert content_words("Wasn't it raw?") == {"not", "raw"} # Negations are content
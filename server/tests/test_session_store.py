@@ -0,0 +1,52 @@
+from prompting import build_messages
+from session_store import SessionStore, approx_tokens
+
+
+def test_history_replays_turns_as_sent():
+    store = SessionStore()
+    store.add_turn("s1", "hi", "Hello!", context="Current Date: x")
+    assert store.history("s1") == [
+        {"role": "system", "content": "Current Date: x"},
+        {"role": "user", "content": "hi"},
+        {"role": "assistant", "content": "Hello!"},
+    ]
+    assert store.history("other") == [] and store.history(None) == []
+
+
+def test_token_budget_stays_flat_over_long_conversation():
+    store = SessionStore(max_tokens=400)
+    sizes = []
+    for i in range(200):
+        session = store.add_turn("s1", f"question number {i} " * 3, f"answer {i} " * 20)
+        # Incremental total always matches a full recount
+        assert session.tokens == sum(approx_tokens(m["content"]) for m in session.history())
+        sizes.append(session.tokens)
+    assert max(sizes) <= 400
+    assert min(sizes[20:]) >= store.low_water // 2 # Trimmed, not wiped
+    # Oldest turns went first
+    assert "answer 199" in store.history("s1")[-1]["content"]
+    assert not any("question number 0 " in m["content"] for m in store.history("s1"))
+
+
+def test_prefix_is_stable_between_trims():
+    store = SessionStore(max_tokens=400)
+    prev = None
+    shifts = 0
+    for i in range(100):
+        messages = build_messages(f"q{i}", store.history("s1"))
+        if prev is not None and messages[:len(prev)] != prev:
+            shifts += 1
+        store.add_turn("s1", f"q{i}", f"a{i} " * 20)
+        prev = messages[:-1] + [messages[-1], store.history("s1")[-1]]
+    # Hysteresis: the prefix only moves when a batch of old turns is evicted
+    assert shifts < 100 / 4
+
+
+def test_idle_sessions_expire_and_count_is_bounded():
+    now = [0.0]
+    store = SessionStore(ttl=60, max_sessions=3, clock=lambda: now[0])
+    for sid in "abcd":
+        store.add_turn(sid, "hi", "hello")
+    assert list(store.sessions) == ["b", "c", "d"] # LRU eviction
+    now[0] = 61
+    assert store.get("b") is None and not store.sessions
@@ -0,0 +1,97 @@
+import asyncio
+
+from single_flight import SingleFlight
+
+
+class FakeBackend:
+    def __init__(self, tokens=("Paris ", "is ", "the ", "capital."), delay=0.01):
+        self.tokens = tokens
+        self.delay = delay
+        self.calls = 0
+        self.closed = False
+
+    async def generate(self):
+        self.calls += 1
+        try:
+            for token in self.tokens:
+                await asyncio.sleep(self.delay)
+                yield token
+        finally:
+            self.closed = True
+
+
+async def collect(agen):
+    return [token async for token in agen]
+
+
+def test_identical_concurrent_requests_share_one_generation():
+    backend = FakeBackend()
+    completed = []
+
+    async def main():
+        flights = SingleFlight()
+        streams = [flights.stream("capital of france", backend.generate, completed.append) for _ in range(5)]
+        return await asyncio.gather(*(collect(s) for s in streams))
+
+    results = asyncio.run(main())
+    assert backend.calls == 1
+    assert all(r == list(backend.tokens) for r in results)
+    assert completed == ["Paris is the capital."] # Cache written once
+
+
+def test_late_follower_replays_emitted_tokens():
+    backend = FakeBackend()
+
+    async def main():
+        flights = SingleFlight()
+        leader = asyncio.create_task(collect(flights.stream("q", backend.generate)))
+        await asyncio.sleep(backend.delay * 2.5) # Leader already emitted 2 tokens
+        follower = await collect(flights.stream("q", backend.generate))
+        return await leader, follower, flights.flights
+
+    leader, follower, inflight = asyncio.run(main())
+    assert backend.calls == 1
+    assert leader == follower == list(backend.tokens)
+    assert inflight == {}
+
+
+def test_different_queries_are_not_coalesced():
+    backend = FakeBackend()
+
+    async def main():
+        flights = SingleFlight()
+        await asyncio.gather(collect(flights.stream("a", backend.generate)), collect(flights.stream("b", backend.generate)))
+
+    asyncio.run(main())
+    assert backend.calls == 2
+
+
+def test_upstream_cancelled_when_all_listeners_leave():
+    backend = FakeBackend(delay=0.05)
+
+    async def main():
+        flights = SingleFlight()
+        stream = flights.stream("q", backend.generate)
+        assert await stream.__anext__() == "Paris "
+        await stream.aclose() # Client disconnected
+        await asyncio.sleep(0.01)
+        return flights.flights
+
+    assert asyncio.run(main()) == {}
+    assert backend.closed
+
+
+def test_follower_that_has_not_started_keeps_the_generation():
+    backend = FakeBackend(delay=0.05)
+
+    async def main():
+        flights = SingleFlight()
+        first = flights.stream("q", backend.generate)
+        assert await first.__anext__() == "Paris "
+        second = flights.stream("q", backend.generate) # Joined, not iterating yet
+        await first.aclose() # The first client left
+        await asyncio.sleep(0.01)
+        return await collect(second)
+
+    assert asyncio.run(main()) == list(FakeBackend().tokens) # Full answer, not an empty one
+    assert backend.calls == 1
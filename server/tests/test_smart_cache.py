@@ -0,0 +1,70 @@
+import json
+import time
+
+from smart_cache import SmartCache
+
+
+def make_cache(tmp_path, **kwargs):
+    return SmartCache(db_file=str(tmp_path / "cache.db"), legacy_file=str(tmp_path / "legacy.json"), **kwargs)
+
+
+def test_persists_across_restarts(tmp_path):
+    cache = make_cache(tmp_path)
+    cache.set("How are you", "Fine, thanks.")
+    cache.close()
+
+    reopened = make_cache(tmp_path)
+    assert reopened.get("  how are YOU ") == "Fine, thanks."
+    reopened.close()
+
+
+def test_dynamic_queries_are_not_stored(tmp_path):
+    cache = make_cache(tmp_path)
+    cache.set("what time is it", "It is 10:00.")
+    assert cache.get("what time is it") is None
+    assert cache.ttl_for("latest bitcoin price") < cache.ttl_for("capital of france")
+    cache.close()
+
+
+def test_expired_entries_are_dropped(tmp_path):
+    cache = make_cache(tmp_path)
+    cache.set("capital of france", "Paris.")
+    response, _ = cache.entries["capital of france"]
+    cache.entries["capital of france"] = (response, time.time() - 1)
+    assert cache.get("capital of france") is None
+    cache.close()
+
+
+def test_lru_eviction_keeps_recent_entries(tmp_path):
+    cache = make_cache(tmp_path, max_entries=2)
+    cache.set("q1", "a1")
+    cache.set("q2", "a2")
+    cache.get("q1") # q1 becomes most recent
+    cache.set("q3", "a3")
+    assert cache.get("q2") is None
+    assert cache.get("q1") == "a1" and cache.get("q3") == "a3"
+    cache.close()
+
+    reopened = make_cache(tmp_path, max_entries=2)
+    assert set(reopened.entries) == {"q1", "q3"}
+    reopened.close()
+
+
+def test_legacy_json_is_migrated(tmp_path):
+    (tmp_path / "legacy.json").write_text(json.dumps({"hello": "Hi!", "weather now": "Sunny"}), encoding="utf-8")
+    cache = make_cache(tmp_path)
+    assert cache.get("hello") == "Hi!"
+    assert cache.get("weather now") is None
+    cache.close()
+
+
+def test_responses_are_stored_pre_segmented(tmp_path):
+    cache = make_cache(tmp_path)
+    cache.set("capital of france", "Paris is the capital. It has 2.1 million people!")
+    assert cache.get_segments("capital of france") == ["Paris is the capital. ", "It has 2.1 million people!"]
+    cache.close()
+
+    reopened = make_cache(tmp_path)
+    assert reopened.get_segments("capital of france") == ["Paris is the capital. ", "It has 2.1 million people!"]
+    assert reopened.get("capital of france") == "Paris is the capital. It has 2.1 million people!"
+    reopened.close()
@@ -0,0 +1,26 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from audio_cache import AudioCache
+from tts_engine import create_engine
+
+
+@pytest.fixture
+def client(server_main, monkeypatch, tmp_path):
+    monkeypatch.setattr(server_main, "tts", create_engine("tone")) # TTS_ENGINE=tone
+    monkeypatch.setattr(server_main, "audio_cache", AudioCache(directory=str(tmp_path)))
+    return TestClient(server_main.app)
+
+
+def test_speak_streams_then_serves_from_cache(client):
+    first = client.post("/speak", json={"text": "Hello there.", "rate": "+10%"})
+    assert first.status_code == 200 and first.headers["X-Audio-Cache"] == "miss"
+    assert first.headers["content-type"] == "audio/wav" and first.content.startswith(b"RIFF")
+    second = client.post("/speak", json={"text": " Hello  there. ", "rate": "+10%"})
+    assert second.headers["X-Audio-Cache"] == "hit" and second.content == first.content
+
+
+def test_speak_rejects_bad_input_before_streaming(client):
+    assert client.post("/speak", json={"text": "   "}).status_code == 400
+    for rate in ("fast", "10%", "+10", "+1000%"):
+        assert client.post("/speak", json={"text": "Hello.", "rate": rate}).status_code == 422, rate
@@ -0,0 +1,61 @@
+import asyncio
+
+import pytest
+
+from token_coalescer import coalesce
+
+
+async def produce(tokens, delay=0.0, stall_after=None, stall=0.0):
+    for i, token in enumerate(tokens):
+        await asyncio.sleep(stall if i == stall_after else delay)
+        yield token
+
+
+def collect(source, **kwargs):
+    async def main():
+        return [chunk async for chunk in coalesce(source, **kwargs)]
+    return asyncio.run(main())
+
+
+def test_lossless_and_flushed_on_sentence_boundaries():
+    tokens = ["Hello", " there", ".", " How", " are", " you", "?", " Fine", " thanks"]
+    chunks = collect(produce(tokens), max_latency=1.0)
+    assert "".join(chunks) == "".join(tokens)
+    assert chunks == ["Hello", " there.", " How are you?", " Fine thanks"]
+
+
+def test_size_limit():
+    chunks = collect(produce(["x"] + ["abcd"] * 100), max_latency=1.0, max_chars=32)
+    assert all(len(c) <= 32 for c in chunks) and len(chunks) == 1 + 400 // 32 + 1
+
+
+def test_stalled_backend_flushes_buffer_without_waiting():
+    async def main():
+        out = []
+        start = asyncio.get_running_loop().time()
+        async for chunk in coalesce(produce(["A", " b", " c", " d"], stall_after=3, stall=0.3), max_latency=0.02):
+            out.append((chunk, asyncio.get_running_loop().time() - start))
+        return out
+    out = asyncio.run(main())
+    assert [c for c, _ in out] == ["A", " b c", " d"]
+    assert out[1][1] < 0.2 # Sent before the stall ended
+
+
+def test_errors_propagate_and_upstream_is_closed():
+    closed = []
+
+    async def failing():
+        try:
+            yield "a"
+            yield "b"
+            raise RuntimeError("backend down")
+        finally:
+            closed.append(True)
+
+    async def main():
+        async for _ in coalesce(failing()):
+            pass
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(main())
+    assert closed
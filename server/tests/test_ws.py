@@ -0,0 +1,165 @@
+import asyncio
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+
+from session_store import SessionStore
+from single_flight import SingleFlight
+from smart_cache import SmartCache
+
+
+class Brain:
+    """smart_chat simulé: des tokens par requête, éventuellement une erreur ou une attente (gate)"""
+
+    def __init__(self):
+        self.answers = {}
+        self.gate = threading.Event()
+
+    async def smart_chat(self, query, history=(), context=None, timings=None):
+        tokens, error, gated = self.answers.get(query, (["Pong."], None, False))
+        for i, token in enumerate(tokens):
+            if gated and i == 1:
+                while not self.gate.is_set(): # Set from the test thread
+                    await asyncio.sleep(0.005)
+            yield token
+        if error:
+            raise error
+
+
+@pytest.fixture
+def brain(server_main, monkeypatch, tmp_path):
+    brain = Brain()
+    monkeypatch.setattr(server_main.selector, "smart_chat", brain.smart_chat)
+    monkeypatch.setattr(server_main, "cache", SmartCache(db_file=str(tmp_path / "cache.db"),
+                                                         legacy_file=str(tmp_path / "cache.json")))
+    monkeypatch.setattr(server_main, "sessions", SessionStore())
+    monkeypatch.setattr(server_main, "inflight", SingleFlight())
+    yield brain
+    brain.gate.set()
+    server_main.cache.close()
+
+
+def until_done(ws, req_id):
+    """Frames reçues jusqu'au done (ou à l'erreur) de req_id"""
+    frames = []
+    while True:
+        frame = ws.receive_json()
+        frames.append(frame)
+        if frame["id"] == req_id and frame["type"] in ("done", "error"):
+            return frames
+
+
+def ping(ws, req_id="ping"):
+    """Aller-retour: tout ce que le client a envoyé avant a été traité par le serveur"""
+    ws.send_json({"type": "chat", "id": req_id, "query": "ping"})
+    return until_done(ws, req_id)
+
+
+def test_chat_frames_are_typed_and_ordered(server_main, brain):
+    brain.answers["hi"] = (["Hello there. ", "How are ", "you?"], None, False)
+    with TestClient(server_main.app).websocket_connect("/ws") as ws:
+        ws.send_json({"type": "chat", "id": "r1", "query": "hi"})
+        frames = until_done(ws, "r1")
+    assert {f["id"] for f in frames} == {"r1"}
+    kinds = [f["type"] for f in frames]
+    assert kinds[0] == "token" and kinds[-1] == "done" and kinds.count("done") == 1
+    assert "error" not in kinds
+    text, units, current = "", [], ""
+    for frame in frames:
+        if frame["type"] == "token":
+            text += frame["text"]
+            current += frame["text"]
+        elif frame["type"] == "sentence_end":
+            units.append(current)
+            current = ""
+    assert text == "Hello there. How are you?"
+    assert units == ["Hello there. ", "How are you?"] # Each sentence_end follows its sentence's tokens
+    assert kinds[-2] == "sentence_end"
+    assert frames[-1]["cancelled"] is False and frames[-1]["timings"]["ttft_ms"] is not None
+
+
+def test_upstream_error_is_an_error_frame_not_an_answer(server_main, brain):
+    brain.answers["boom"] = (["Partial "], RuntimeError("model unavailable"), False)
+    with TestClient(server_main.app).websocket_connect("/ws") as ws:
+        ws.send_json({"type": "chat", "id": "r1", "query": "boom"})
+        frames = until_done(ws, "r1")
+        assert frames[-1] == {"type": "error", "id": "r1", "message": "model unavailable"}
+        later = ping(ws) # Anything r1 sent after its error would arrive before this
+    assert not [f for f in frames + later if f["id"] == "r1" and f["type"] == "done"]
+    assert later[-1]["type"] == "done"
+
+
+def test_cancel_ends_with_a_cancelled_done(server_main, brain):
+    brain.answers["long"] = (["First sentence. ", "Never sent."], None, True)
+    with TestClient(server_main.app).websocket_connect("/ws") as ws:
+        ws.send_json({"type": "chat", "id": "r1", "query": "long"})
+        assert ws.receive_json() == {"type": "token", "id": "r1", "text": "First sentence. "}
+        ws.send_json({"type": "cancel", "id": "r1"})
+        frames = until_done(ws, "r1")
+    assert frames[-1]["type"] == "done" and frames[-1]["cancelled"] is True
+    assert all("Never sent." not in f.get("text", "") for f in frames)
+
+
+def speculate(ws, req_id, query):
+    ws.send_json({"type": "chat", "id": req_id, "query": query, "session_id": "s1", "speculative": True})
+
+
+def test_speculative_turn_recorded_when_committed_mid_stream(server_main, brain):
+    brain.answers["what time is it"] = (["It is ", "noon."], None, True)
+    with TestClient(server_main.app).websocket_connect("/ws") as ws:
+        speculate(ws, "r1", "what time is it")
+        assert ws.receive_json()["type"] == "token"
+        ws.send_json({"type": "commit", "id": "r1"})
+        ping(ws) # Commit handled while r1 still streams
+        assert server_main.sessions.history("s1") == []
+        brain.gate.set()
+        until_done(ws, "r1")
+        ping(ws, "ping2")
+    turns = [(m["role"], m["content"]) for m in server_main.sessions.history("s1") if m["role"] != "system"]
+    assert turns == [("user", "what time is it"), ("assistant", "It is noon.")]
+
+
+def test_speculative_turn_recorded_when_committed_after_the_stream(server_main, brain):
+    brain.answers["tell me a joke"] = (["Knock knock."], None, False)
+    with TestClient(server_main.app).websocket_connect("/ws") as ws:
+        speculate(ws, "r1", "tell me a joke")
+        until_done(ws, "r1")
+        assert server_main.sessions.history("s1") == [] # Answered, but the final transcript is not in yet
+        ws.send_json({"type": "commit", "id": "r1"})
+        ping(ws)
+        ws.send_json({"type": "commit", "id": "r1"}) # Twice: still one turn
+        ping(ws, "ping2")
+    turns = [(m["role"], m["content"]) for m in server_main.sessions.history("s1") if m["role"] != "system"]
+    assert turns == [("user", "tell me a joke"), ("assistant", "Knock knock.")]
+
+
+def test_speculative_turn_dropped_when_cancelled_after_the_stream(server_main, brain):
+    brain.answers["what is the"] = (["A guess."], None, False)
+    with TestClient(server_main.app).websocket_connect("/ws") as ws:
+        speculate(ws, "r1", "what is the")
+        until_done(ws, "r1")
+        ws.send_json({"type": "cancel", "id": "r1"}) # The final transcript said something else
+        ws.send_json({"type": "commit", "id": "r1"}) # Too late: nothing left to commit
+        ping(ws)
+    assert server_main.sessions.history("s1") == []
+
+
+def test_malformed_frames_do_not_close_the_channel(server_main, brain):
+    brain.answers["long"] = (["First sentence. ", "Second one."], None, True)
+    with TestClient(server_main.app).websocket_connect("/ws") as ws:
+        ws.send_json({"type": "chat", "id": "r1", "query": "long"})
+        frames = [ws.receive_json()]
+        ws.send_text("{not json")
+        frames += until_done(ws, None) # r1's frames may come in between
+        assert frames[-1] == {"type": "error", "id": None, "message": "Invalid frame: not JSON text"}
+        ws.send_json(["chat"])
+        frames += until_done(ws, None)
+        ws.send_json({"type": "chat", "id": "r2"})
+        frames += until_done(ws, "r2")
+        assert frames[-1] == {"type": "error", "id": "r2", "message": "Invalid chat frame: no query"}
+        brain.gate.set() # r1 was never cancelled
+        frames += until_done(ws, "r1")
+        assert "".join(f.get("text", "") for f in frames) == "First sentence. Second one."
+        assert frames[-1]["type"] == "done" and not frames[-1]["cancelled"]
+        assert ping(ws)[-1]["type"] == "done"
@@ -0,0 +1,61 @@
+import asyncio
+import re
+import time
+
+# End of sentence (optionally followed by closing quotes/brackets and spaces), or a newline
+_BOUNDARY_RE = re.compile(r'(?:[.!?:;]["\')\]]*|\n)\s*$')
+
+
+def ends_sentence(text):
+    return _BOUNDARY_RE.search(text) is not None
+
+
+async def coalesce(tokens, max_latency=0.025, max_chars=256):
+    """Regroupe les tokens en chunks HTTP: flush en fin de phrase, après max_latency ou max_chars.
+
+    The first token goes out alone (no TTFT penalty). After that a chunk is
+    never held longer than max_latency: if the backend stalls, whatever is
+    buffered is flushed without waiting for the next token.
+    """
+    it = tokens.__aiter__()
+    pending = None
+    buffer = []
+    size = 0
+    deadline = None
+    first = True
+    try:
+        while True:
+            if pending is None:
+                pending = asyncio.ensure_future(it.__anext__())
+            if buffer:
+                done, _ = await asyncio.wait((pending,), timeout=max(0.0, deadline - time.perf_counter()))
+                if not done: # Backend is slow: don't sit on what we have
+                    yield "".join(buffer)
+                    buffer, size = [], 0
+                    continue
+            try:
+                token = await pending
+            except StopAsyncIteration:
+                break
+            finally:
+                if pending.done():
+                    pending = None
+            if first:
+                first = False
+                yield token
+                continue
+            if not buffer:
+                deadline = time.perf_counter() + max_latency
+            buffer.append(token)
+            size += len(token)
+            if size >= max_chars or ends_sentence(token):
+                yield "".join(buffer)
+                buffer, size = [], 0
+        if buffer:
+            yield "".join(buffer)
+    finally:
+        if pending is not None:
+            pending.cancel()
+            await asyncio.gather(pending, return_exceptions=True)
+        if hasattr(it, "aclose"):
+            await it.aclose()
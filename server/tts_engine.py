@@ -0,0 +1,83 @@
+import asyncio
+import math
+import struct
+import zlib
+from abc import ABC, abstractmethod
+
+DEFAULT_VOICE = "en-US-AriaNeural"
+
+
+class TTSEngine(ABC):
+    """Interface d'un moteur TTS: stream(text, voice, rate) -> chunks audio (bytes)"""
+
+    name = "base"
+    media_type = "application/octet-stream"
+    extension = "bin"
+
+    @abstractmethod
+    def stream(self, text, voice=DEFAULT_VOICE, rate="+0%"):
+        """Async generator: audio chunks as soon as they are synthesized"""
+
+
+class EdgeTTSEngine(TTSEngine):
+    """Edge TTS (MP3), chunks relayés dès qu'ils arrivent du service"""
+
+    name = "edge"
+    media_type = "audio/mpeg"
+    extension = "mp3"
+
+    async def stream(self, text, voice=DEFAULT_VOICE, rate="+0%"):
+        import edge_tts # Only needed when this engine is selected
+
+        communicate = edge_tts.Communicate(text, voice, rate=rate)
+        async for chunk in communicate.stream():
+            if chunk["type"] == "audio":
+                yield chunk["data"]
+
+
+class ToneTTSEngine(TTSEngine):
+    """Moteur local déterministe (tests, bancs, dev hors ligne): un bip WAV par caractère.
+
+    Same (text, voice, rate) always gives the same bytes. latency simulates the
+    time to first chunk of a real engine.
+    """
+
+    name = "tone"
+    media_type = "audio/wav"
+    extension = "wav"
+
+    def __init__(self, sample_rate=16000, char_ms=20, chunk_bytes=4096, latency=0.0):
+        self.sample_rate = sample_rate
+        self.char_ms = char_ms
+        self.chunk_bytes = chunk_bytes
+        self.latency = latency
+
+    def render(self, text, voice=DEFAULT_VOICE, rate="+0%"):
+        speed = 1.0 + int(rate.strip("%") or 0) / 100
+        samples_per_char = max(1, int(self.sample_rate * self.char_ms / 1000 / speed))
+        base = 200 + zlib.crc32(voice.encode("utf-8")) % 200
+        pcm = bytearray()
+        for c in text:
+            freq = base + (ord(c) % 32) * 15
+            step = 2 * math.pi * freq / self.sample_rate
+            pcm += struct.pack(f"<{samples_per_char}h", *(int(8000 * math.sin(step * i)) for i in range(samples_per_char)))
+        header = b"RIFF" + struct.pack("<I", 36 + len(pcm)) + b"WAVEfmt " + struct.pack(
+            "<IHHIIHH", 16, 1, 1, self.sample_rate, self.sample_rate * 2, 2, 16) + b"data" + struct.pack("<I", len(pcm))
+        return header + bytes(pcm)
+
+    async def stream(self, text, voice=DEFAULT_VOICE, rate="+0%"):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        audio = self.render(text, voice, rate)
+        for i in range(0, len(audio), self.chunk_bytes):
+            yield audio[i:i + self.chunk_bytes]
+            await asyncio.sleep(0)
+
+
+ENGINES = {"edge": EdgeTTSEngine, "tone": ToneTTSEngine}
+
+
+def create_engine(name="edge"):
+    if name not in ENGINES:
+        raise ValueError(f"Unknown TTS engine: {name} (available: {', '.join(ENGINES)})")
+    return ENGINES[name]()
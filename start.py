@@ -4,6 +4,7 @@
 import sys
 import subprocess
 import time
+import requests
 from pathlib import Path
 from logger_config import logger
 from dotenv import load_dotenv
@@ -11,6 +12,21 @@ from dotenv import load_dotenv
 # Load environment variables from .env file
 load_dotenv()
 
+def wait_for_brain(url="http://127.0.0.1:8000/status", timeout=180):
+    """Poll /status until models are loaded ("online") or failed ("degraded")"""
+    deadline = time.time() + timeout
+    status = None
+    while time.time() < deadline:
+        try:
+            status = requests.get(url, timeout=2).json().get("status")
+            if status in ("online", "degraded"):
+                logger.info(f"Brain {status}.")
+                return
+        except requests.RequestException:
+            pass # API not up yet
+        time.sleep(0.5)
+    logger.warning(f"Brain not ready after {timeout}s (status: {status}), starting anyway.")
+
 def main():
     logger.info("Launching Sonia System...")
     
@@ -19,8 +35,8 @@ def main():
     server_cmd = [sys.executable, "server/main.py"]
     server_process = subprocess.Popen(server_cmd)
     
-    # Wait for server to be ready (naive wait)
-    time.sleep(3)
+    # Wait until the brain has its models resident (not just the API up)
+    wait_for_brain()
     
     # 2. Launch Client (Body)
     logger.info("Starting Body (Client)...")